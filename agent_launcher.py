@@ -3,7 +3,10 @@
 import argparse
 import asyncio
 import json
+import math
 import os
+import random
+import time
 
 from dotenv import load_dotenv
 from pipecatcloud import AgentStartError
@@ -12,12 +15,8 @@ from pipecatcloud.session import Session, SessionParams
 load_dotenv()
 
 
-async def launch_agent(agent_name: str = "pipecat-test-agent", data: dict = None):
-    """
-    Create a room using Agent Session fromp Pipecat Cloud
-    """
-    key = os.getenv("PIPECAT_CLOUD_API_KEY")
-    print("key", key)
+def build_room_properties() -> dict:
+    """Daily room properties for recording and transcription storage."""
     bucket_name = os.getenv("BUCKET_NAME")
     bucket_region = os.getenv("BUCKET_REGION")
     assume_role_arn = os.getenv("ASSUME_ROLE_ARN")
@@ -59,6 +58,20 @@ async def launch_agent(agent_name: str = "pipecat-test-agent", data: dict = None
         "enable_transcription_storage": True,
         "transcription_bucket": transcription_bucket,
     }
+    return properties
+
+
+async def launch_agent(
+    agent_name: str = "pipecat-test-agent",
+    data: dict = None,
+    properties: dict | None = None,
+):
+    """
+    Create a room using Agent Session fromp Pipecat Cloud
+    """
+    key = os.getenv("PIPECAT_CLOUD_API_KEY")
+    if properties is None:
+        properties = build_room_properties()
     try:
         session = Session(
             api_key=key,
@@ -78,6 +91,147 @@ async def launch_agent(agent_name: str = "pipecat-test-agent", data: dict = None
         print(f"Unexpected error: {e}")
 
 
+class RateLimiter:
+    """Spaces calls at least `1 / rate` seconds apart; no limit if rate is 0."""
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+async def launch_batch(
+    agent_name: str,
+    payloads: list[dict | None],
+    *,
+    concurrency: int = 10,
+    rate: float = 5.0,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> dict:
+    """Start one session per payload and summarize start latency.
+
+    At most `concurrency` starts are in flight, and new requests, retries
+    included, are sent at most `rate` per second. A start that fails with
+    `AgentStartError` is retried up to `retries` times with exponential
+    backoff and jitter; other errors fail that session only. Start latency
+    is the successful request alone; total latency also counts time spent
+    queued and retrying.
+    """
+    key = os.getenv("PIPECAT_CLOUD_API_KEY")
+    # Same for every session, so built once
+    properties = build_room_properties()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    results = []
+
+    async def launch(index: int, data: dict | None):
+        session = Session(
+            api_key=key,
+            agent_name=agent_name,
+            params=SessionParams(
+                use_daily=True, data=data, daily_room_properties=properties
+            ),
+        )
+        result = {"index": index, "attempts": 0}
+        first_attempt = time.perf_counter()
+        async with semaphore:
+            for attempt in range(retries + 1):
+                await limiter.wait()
+                result["attempts"] = attempt + 1
+                start = time.perf_counter()
+                try:
+                    response = await session.start()
+                except AgentStartError as e:
+                    result["error"] = str(e)
+                    if attempt < retries:
+                        delay = backoff * 2**attempt
+                        await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                    continue
+                except Exception as e:
+                    result["error"] = str(e)
+                    break
+                result.pop("error", None)
+                result["start_latency"] = time.perf_counter() - start
+                result["total_latency"] = time.perf_counter() - first_attempt
+                result["room"] = response.get("dailyRoom")
+                break
+        results.append(result)
+        status = result.get("room") or f"failed: {result.get('error')}"
+        print(f"[{index}] {status} ({result['attempts']} attempts)")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(launch(i, data) for i, data in enumerate(payloads)))
+    elapsed = time.perf_counter() - started
+
+    succeeded = [r for r in results if "start_latency" in r]
+    summary = {
+        "sessions": len(payloads),
+        "succeeded": len(succeeded),
+        "failed": len(payloads) - len(succeeded),
+        "retries": sum(r["attempts"] - 1 for r in results),
+        "elapsed_seconds": elapsed,
+    }
+    for name in ("start_latency", "total_latency"):
+        values = [r[name] for r in succeeded]
+        summary[f"{name}_seconds"] = {
+            f"p{round(q * 100)}": percentile(values, q) for q in (0.5, 0.9, 0.99)
+        }
+        summary[f"{name}_seconds"]["max"] = max(values, default=0.0)
+    return summary
+
+
+def read_payloads(path: str) -> list[dict | None]:
+    """Read one `data` payload per line of a JSONL file; `null` for none."""
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                payloads.append(json.loads(line))
+    return payloads
+
+
+async def run_batch(args, payloads: list[dict | None]) -> dict:
+    runner = None
+    if args.mock:
+        from mock_session_api import MockSessionAPI, start_mock_server
+
+        runner, url = await start_mock_server(MockSessionAPI())
+        os.environ["PIPECAT_API_HOST"] = url
+        os.environ.setdefault("PIPECAT_CLOUD_API_KEY", "mock")
+        for name in ("BUCKET_NAME", "BUCKET_REGION", "ASSUME_ROLE_ARN"):
+            os.environ.setdefault(name, "mock")
+    try:
+        return await launch_batch(
+            args.agent_name,
+            payloads,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            retries=args.retries,
+            backoff=args.backoff,
+        )
+    finally:
+        if runner:
+            await runner.cleanup()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Launch Agent deployed on Pipecat Cloud"
@@ -86,9 +240,37 @@ def main():
         "--agent-name", default="pipecat-test-agent", help="Name of the agent to launch"
     )
     parser.add_argument("--data", type=str, help="JSON data to pass to the agent")
+    parser.add_argument(
+        "--batch", type=str, help="JSONL file with one data payload per session"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="Maximum starts in flight"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=5.0, help="Maximum start requests per second"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=3, help="Retries per session on start errors"
+    )
+    parser.add_argument(
+        "--backoff", type=float, default=0.5, help="First retry delay in seconds"
+    )
+    parser.add_argument(
+        "--mock", action="store_true", help="Launch against a local mock API"
+    )
 
     args = parser.parse_args()
 
+    if args.batch:
+        try:
+            payloads = read_payloads(args.batch)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading batch file: {e}")
+            return
+        summary = asyncio.run(run_batch(args, payloads))
+        print(json.dumps(summary, indent=2))
+        return
+
     data = None
     if args.data:
         try:
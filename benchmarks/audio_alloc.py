@@ -0,0 +1,134 @@
+"""Audio allocation benchmark: bytes allocated per second of audio per session.
+
+Runs one session's worth of audio through the parts of the audio path this
+repo owns, once copying frames as before and once with `zero_copy`:
+
+- input: framing a recording into 20 ms input frames, as `LoopbackTransport`
+- vad: Silero VAD over every input frame
+- tts_framing: splitting synthesized audio into output frames
+
+Python has no cumulative allocation counter, so each step is run on its
+own under tracemalloc and the memory it allocates above its starting point
+is summed over all steps. Buffers freed and reallocated within one step are
+counted once, so the totals are a lower bound, and the same for both modes.
+
+Usage:
+    python benchmarks/audio_alloc.py --wav utterance.wav
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+import numpy as np  # noqa: E402
+
+from audio_buffers import frame_views  # noqa: E402
+from config import AUDIO_CONFIG, LOOPBACK_CONFIG  # noqa: E402
+from loopback_transport import load_wav, loopback_chunks  # noqa: E402
+from vad_pool import get_vad_pool  # noqa: E402
+
+# TTS audio arrives at this rate and is played at the loopback rate
+TTS_SAMPLE_RATE = 24000
+
+
+class AllocationMeter:
+    """Sums the memory allocated by each measured step, per stage."""
+
+    def __init__(self):
+        self.bytes: dict[str, int] = {}
+
+    def measure(self, stage: str, step):
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        result = step()
+        allocated = tracemalloc.get_traced_memory()[1] - start
+        self.bytes[stage] = self.bytes.get(stage, 0) + allocated
+        return result
+
+
+def sine(seconds: float, sample_rate: int) -> bytes:
+    samples = np.arange(int(seconds * sample_rate))
+    tone = 1000 * np.sin(2 * np.pi * 220 * samples / sample_rate)
+    return tone.astype(np.int16).tobytes()
+
+
+async def run_session(audio: bytes, tts_audio: bytes, zero_copy: bool) -> dict:
+    AUDIO_CONFIG["zero_copy"] = zero_copy
+    sample_rate = LOOPBACK_CONFIG["sample_rate"]
+    chunk_bytes = sample_rate * LOOPBACK_CONFIG["chunk_ms"] // 1000 * 2
+    meter = AllocationMeter()
+
+    # Input: frame the recording and run VAD on every frame
+    analyzer = get_vad_pool().create_analyzer()
+    analyzer.set_sample_rate(sample_rate)
+    chunks = iter(loopback_chunks(audio, b"", chunk_bytes, zero_copy=zero_copy))
+    while True:
+        chunk = meter.measure("input", lambda: next(chunks, None))
+        if chunk is None:
+            break
+        meter.measure("vad", functools.partial(analyzer.analyze_audio, chunk))
+        del chunk
+
+    # Output: frame TTS audio
+    tts_chunk_bytes = TTS_SAMPLE_RATE // 10 * 2
+    if zero_copy:
+        frames = iter(frame_views(tts_audio, tts_chunk_bytes))
+    else:
+        frames = (
+            tts_audio[i : i + tts_chunk_bytes]
+            for i in range(0, len(tts_audio), tts_chunk_bytes)
+        )
+    while True:
+        frame = meter.measure("tts_framing", lambda: next(frames, None))
+        if frame is None:
+            break
+        del frame
+
+    seconds = {
+        "input": len(audio) / (2 * sample_rate),
+        "vad": len(audio) / (2 * sample_rate),
+        "tts_framing": len(tts_audio) / (2 * TTS_SAMPLE_RATE),
+    }
+    per_second = {stage: meter.bytes[stage] / seconds[stage] for stage in meter.bytes}
+    per_second["total"] = sum(per_second.values())
+    return per_second
+
+
+async def run(args) -> dict:
+    audio = load_wav(args.wav)
+    tts_audio = sine(args.tts_seconds, TTS_SAMPLE_RATE)
+    # Load the VAD models and let both modes reach a steady state first
+    get_vad_pool().preload()
+    default = AUDIO_CONFIG["zero_copy"]
+    report = {"unit": "bytes allocated per second of audio, per session"}
+    tracemalloc.start()
+    try:
+        for mode, zero_copy in (("copy", False), ("zero_copy", True)):
+            await run_session(audio, tts_audio, zero_copy)
+            report[mode] = await run_session(audio, tts_audio, zero_copy)
+    finally:
+        tracemalloc.stop()
+        AUDIO_CONFIG["zero_copy"] = default
+    report["reduction"] = 1 - report["zero_copy"]["total"] / report["copy"]["total"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio allocation benchmark")
+    parser.add_argument("--wav", required=True, help="16 kHz 16-bit mono WAV")
+    parser.add_argument(
+        "--tts-seconds", type=float, default=10.0, help="Bot audio per session"
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
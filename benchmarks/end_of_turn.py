@@ -0,0 +1,165 @@
+"""End-of-turn benchmark: VAD silence timeout vs the semantic turn analyzer.
+
+Replays recorded user turns through Silero VAD frame by frame, as the input
+transport does, and ends each turn either once the VAD has heard its default
+`stop_secs` of silence, as `main()` does without SEMANTIC_TURN, or when
+`SemanticTurnAnalyzer` decides the turn is over. Transcripts are replayed
+from word timings, each word arriving as an interim result `--stt-latency`
+seconds after it was spoken.
+
+Each recording is one user turn cut from a conversation, pauses included:
+a 16 kHz 16-bit mono WAV next to a JSON file of the same name holding the
+`words` of a Deepgram transcription (`word`, `punctuated_word`, `end`).
+A turn ended before its last word is a false interrupt, where the bot would
+have cut the user off. For the others, the response delay is the time from
+the end of the last word to the end of the turn, which the LLM request waits
+on before it can start.
+
+Usage:
+    python benchmarks/end_of_turn.py --recordings conversations/
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from pipecat.audio.turn.base_turn_analyzer import EndOfTurnState  # noqa: E402
+from pipecat.audio.vad.vad_analyzer import VADParams, VADState  # noqa: E402
+
+from config import LOOPBACK_CONFIG, TURN_CONFIG  # noqa: E402
+from latency_metrics import LatencyHistogram  # noqa: E402
+from loopback_transport import load_wav, loopback_chunks  # noqa: E402
+from turn_detection import SemanticTurnAnalyzer  # noqa: E402
+from vad_pool import get_vad_pool  # noqa: E402
+
+# Silence played after each turn; long enough for either detector to end it
+TRAILING_SILENCE_SECS = TURN_CONFIG["vad_stop_secs"] + TURN_CONFIG["max_stop_secs"] + 1
+
+
+def load_recordings(path: str) -> list[tuple[bytes, list[dict]]]:
+    recordings = []
+    for wav in sorted(glob.glob(os.path.join(path, "*.wav"))):
+        with open(os.path.splitext(wav)[0] + ".json") as f:
+            words = json.load(f)["words"]
+        if words:
+            recordings.append((load_wav(wav), words))
+    return recordings
+
+
+def transcript_at(words: list[dict], seconds: float, stt_latency: float) -> str:
+    return " ".join(
+        word.get("punctuated_word", word["word"])
+        for word in words
+        if word["end"] + stt_latency <= seconds
+    )
+
+
+async def detect_end(
+    audio: bytes,
+    words: list[dict],
+    turn: SemanticTurnAnalyzer | None,
+    stt_latency: float,
+) -> float:
+    """Return the second at which the turn in `audio` is ended."""
+    sample_rate = LOOPBACK_CONFIG["sample_rate"]
+    chunk_bytes = sample_rate * LOOPBACK_CONFIG["chunk_ms"] // 1000 * 2
+    silence = bytes(int(TRAILING_SILENCE_SECS * sample_rate) * 2)
+    vad_params = VADParams(stop_secs=TURN_CONFIG["vad_stop_secs"]) if turn else None
+    vad = get_vad_pool().create_analyzer(params=vad_params)
+    vad.set_sample_rate(sample_rate)
+    if turn:
+        turn.set_sample_rate(sample_rate)
+
+    vad_state = VADState.QUIET
+    text = ""
+    seconds = 0.0
+    for chunk in loopback_chunks(audio, silence, chunk_bytes, zero_copy=True):
+        seconds += len(chunk) / (2 * sample_rate)
+        # Like the input transport, only settled VAD states count
+        previous = vad_state
+        state = vad.analyze_audio(chunk)
+        if state in (VADState.SPEAKING, VADState.QUIET):
+            vad_state = state
+        stopped = previous == VADState.SPEAKING and vad_state == VADState.QUIET
+        if turn is None:
+            if stopped:
+                return seconds
+            continue
+
+        heard = transcript_at(words, seconds, stt_latency)
+        if heard != text:
+            text = heard
+            turn.observe_transcript(text, final=False)
+        end_of_turn = turn.append_audio(chunk, vad_state == VADState.SPEAKING)
+        if end_of_turn == EndOfTurnState.INCOMPLETE and stopped:
+            end_of_turn, _ = await turn.analyze_end_of_turn()
+        if end_of_turn == EndOfTurnState.COMPLETE:
+            return seconds
+    return seconds
+
+
+async def run_detector(recordings, semantic: bool, stt_latency: float) -> dict:
+    delays = []
+    false_interrupts = 0
+    score_time = LatencyHistogram()
+    for audio, words in recordings:
+        turn = SemanticTurnAnalyzer() if semantic else None
+        end = await detect_end(audio, words, turn, stt_latency)
+        last_word = words[-1]["end"]
+        if end < last_word:
+            false_interrupts += 1
+        else:
+            delays.append((end - last_word) * 1000)
+        if turn:
+            score_time.merge(turn.score_time)
+
+    report = {
+        "median_response_delay_ms": statistics.median(delays) if delays else None,
+        "max_response_delay_ms": max(delays) if delays else None,
+        "false_interrupt_rate": false_interrupts / len(recordings),
+    }
+    if semantic:
+        report["score_ms"] = score_time.as_dict()
+    return report
+
+
+async def run(args) -> dict:
+    recordings = load_recordings(args.recordings)
+    if not recordings:
+        raise SystemExit(f"No transcribed WAV recordings in {args.recordings}")
+    get_vad_pool().preload()
+    return {
+        "turns": len(recordings),
+        "stt_latency_ms": args.stt_latency * 1000,
+        "vad": {
+            "stop_secs": VADParams().stop_secs,
+            **await run_detector(recordings, False, args.stt_latency),
+        },
+        "semantic": await run_detector(recordings, True, args.stt_latency),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-of-turn benchmark")
+    parser.add_argument(
+        "--recordings", required=True, help="Directory of WAV + JSON user turns"
+    )
+    parser.add_argument(
+        "--stt-latency",
+        type=float,
+        default=0.3,
+        help="Seconds from a word to its transcript",
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
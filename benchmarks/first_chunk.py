@@ -0,0 +1,111 @@
+"""TTS chunking benchmark: time to first audio, sentence vs early flush.
+
+Streams sample responses token by token, at a given LLM TTFB and token rate,
+through pipecat's default sentence aggregator and through
+`EarlyFlushTextAggregator`. Time to first audio is when the first chunk is
+ready plus the TTS TTFB. This isolates the chunking stage; to measure it end
+to end, compare `load_test.py` runs with and without `--sentence-chunking`.
+
+Usage:
+    python benchmarks/first_chunk.py --token-delay 0.03
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from pipecat.utils.text.simple_text_aggregator import (  # noqa: E402
+    SimpleTextAggregator,
+)
+
+from config import STUB_CONFIG  # noqa: E402
+from tts_chunking import EarlyFlushTextAggregator  # noqa: E402
+
+RESPONSES = [
+    STUB_CONFIG["llm_response"],
+    "Well, if you ask me, the best thing about a long walk in the park on a "
+    "sunny afternoon is the chance to forget about your inbox for a while. "
+    "Try it this weekend.",
+    "Sure thing, here is one about computers: why did the computer go to the "
+    "doctor after a long week at the office? Because it had a virus!",
+    "The quickest way to get there from the station is to take the number "
+    "twelve bus towards the harbour and get off after four stops. It takes "
+    "about ten minutes.",
+    "Honestly I think that is a great question and there are a few different "
+    "ways we could look at it depending on what you care about most.",
+]
+
+
+async def stream(aggregator, response: str, ttfb: float, token_delay: float):
+    """Return (seconds to first chunk, number of chunks) for one response."""
+    tokens = response.split(" ")
+    start = time.perf_counter()
+    first_chunk = None
+    chunks = 0
+    await aggregator.reset()
+    await asyncio.sleep(ttfb)
+    for i, token in enumerate(tokens):
+        if i:
+            await asyncio.sleep(token_delay)
+        chunk = await aggregator.aggregate(token if i == 0 else f" {token}")
+        if chunk:
+            chunks += 1
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start
+    if aggregator.text.strip():
+        chunks += 1
+    if first_chunk is None:
+        # Flushed only at the end of the response
+        first_chunk = time.perf_counter() - start
+    return first_chunk, chunks
+
+
+async def run(args) -> dict:
+    report = {}
+    aggregators = {
+        "sentence": SimpleTextAggregator(),
+        "early_flush": EarlyFlushTextAggregator(),
+    }
+    for name, aggregator in aggregators.items():
+        first_audio = []
+        chunk_counts = []
+        for _ in range(args.repeat):
+            for response in RESPONSES:
+                first_chunk, chunks = await stream(
+                    aggregator, response, args.llm_ttfb, args.token_delay
+                )
+                first_audio.append((first_chunk + args.tts_ttfb) * 1000)
+                chunk_counts.append(chunks)
+        report[name] = {
+            "time_to_first_audio_ms": {
+                "p50": statistics.median(first_audio),
+                "max": max(first_audio),
+            },
+            "chunks_per_response": statistics.mean(chunk_counts),
+        }
+        if isinstance(aggregator, EarlyFlushTextAggregator):
+            report[name]["first_chunk_flushes"] = aggregator.flushes
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS chunking benchmark")
+    parser.add_argument("--llm-ttfb", type=float, default=STUB_CONFIG["llm_ttfb"])
+    parser.add_argument(
+        "--token-delay", type=float, default=STUB_CONFIG["llm_token_delay"]
+    )
+    parser.add_argument("--tts-ttfb", type=float, default=STUB_CONFIG["tts_ttfb"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Offline load test: run N concurrent bot pipelines in one process.
+
+Each session streams a recorded WAV file through `LoopbackTransport` into the
+same pipeline `main()` builds in production, with stub STT, LLM and TTS
+services in place of Deepgram, OpenAI and Cartesia. Nothing leaves the
+machine, so the results reflect this worker's own limits: CPU per session,
+event-loop lag, memory growth and turn latency.
+
+Usage:
+    python benchmarks/load_test.py --wav utterance.wav --sessions 20
+
+With `--profile DIR`, every session is profiled as with PROFILE_SAMPLE_RATE=1;
+comparing `cpu_percent_per_session` with a run without it gives the
+profiler's overhead.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from pipecat.transports.base_transport import TransportParams  # noqa: E402
+
+import bot  # noqa: E402
+from config import (  # noqa: E402
+    ENV_VARS,
+    LOOPBACK_CONFIG,
+    STUB_CONFIG,
+    STUB_PROVIDERS_CONFIG,
+)
+from latency_metrics import LatencyHistogram, TurnLatencyTracker  # noqa: E402
+from loop_monitor import EventLoopLagMonitor, rss_bytes  # noqa: E402
+from loopback_transport import LoopbackTransport, load_wav  # noqa: E402
+from provider_registry import ProviderRegistry  # noqa: E402
+from service_factory import ServiceFactory  # noqa: E402
+from stub_services import create_stub_services  # noqa: E402
+from vad_pool import get_vad_pool  # noqa: E402
+
+# Options applied to the stub services, which --failover does not use
+STUB_SERVICE_OPTIONS = (
+    "stt_latency",
+    "llm_ttfb",
+    "tts_ttfb",
+    "llm_response",
+    "sentence_chunking",
+)
+
+
+async def run_session(
+    index: int, audio: bytes, turns: int, create_services
+) -> TurnLatencyTracker:
+    session_id = f"load-{index}"
+    transport = LoopbackTransport(
+        audio,
+        TransportParams(
+            audio_in_enabled=True,
+            audio_out_enabled=True,
+            audio_in_sample_rate=LOOPBACK_CONFIG["sample_rate"],
+            vad_analyzer=get_vad_pool().create_analyzer(),
+        ),
+        turns=turns,
+        client_id=session_id,
+    )
+    tracker = TurnLatencyTracker(session_id)
+    await bot.main(
+        transport,
+        session_id=session_id,
+        services=create_services(),
+        latency_tracker=tracker,
+    )
+    return tracker
+
+
+async def run(args) -> dict:
+    audio = load_wav(args.wav)
+    latencies = {
+        "stt_latency": args.stt_latency,
+        "llm_ttfb": args.llm_ttfb,
+        "tts_ttfb": args.tts_ttfb,
+        "llm_response": args.llm_response,
+        "early_flush": not args.sentence_chunking,
+    }
+    registry = None
+    create_services = functools.partial(create_stub_services, **latencies)
+    if args.failover:
+        registry = ProviderRegistry(STUB_PROVIDERS_CONFIG)
+        create_services = ServiceFactory(registry=registry).create_session_services
+
+    monitor = EventLoopLagMonitor()
+    monitor.start()
+    rss_start = rss_bytes()
+    rss_peak = rss_start
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    async def sample_memory():
+        nonlocal rss_peak
+        while True:
+            rss_peak = max(rss_peak, rss_bytes())
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_memory())
+    sessions = []
+    for i in range(args.sessions):
+        session = run_session(i, audio, args.turns, create_services)
+        sessions.append(asyncio.create_task(session))
+        await asyncio.sleep(args.ramp)
+    trackers = await asyncio.gather(*sessions)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    sampler.cancel()
+    await monitor.stop()
+    rss_end = rss_bytes()
+
+    stages = {name: LatencyHistogram() for name in trackers[0].histograms}
+    for tracker in trackers:
+        for name, histogram in tracker.histograms.items():
+            stages[name].merge(histogram)
+
+    report = {
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "cpu_percent_per_session": 100 * cpu / wall / args.sessions,
+        "event_loop_lag_ms": monitor.histogram.as_dict(),
+        "rss_start_mb": rss_start / 2**20,
+        "rss_peak_mb": rss_peak / 2**20,
+        "rss_end_mb": rss_end / 2**20,
+        "rss_growth_per_session_mb": (rss_peak - rss_start) / 2**20 / args.sessions,
+        "turn_latency_ms": stages.pop("total").as_dict(),
+        "stage_latency_ms": {name: h.as_dict() for name, h in stages.items()},
+    }
+    if registry:
+        report["providers"] = registry.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the bot")
+    parser.add_argument("--wav", required=True, help="16 kHz 16-bit mono WAV file")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument(
+        "--ramp", type=float, default=0.1, help="Seconds between session starts"
+    )
+    parser.add_argument("--stt-latency", type=float, default=STUB_CONFIG["stt_latency"])
+    parser.add_argument("--llm-ttfb", type=float, default=STUB_CONFIG["llm_ttfb"])
+    parser.add_argument("--tts-ttfb", type=float, default=STUB_CONFIG["tts_ttfb"])
+    parser.add_argument(
+        "--llm-response",
+        default=STUB_CONFIG["llm_response"],
+        help="Text the stub LLM streams back, one word per token",
+    )
+    parser.add_argument(
+        "--sentence-chunking",
+        action="store_true",
+        help="Send TTS whole sentences only, without flushing the first early",
+    )
+    parser.add_argument(
+        "--failover",
+        action="store_true",
+        help="Route between the flaky stub providers in STUB_PROVIDERS_CONFIG",
+    )
+    parser.add_argument(
+        "--profile",
+        help="Profile every session into this directory, to measure the overhead",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.failover:
+        # Failover sessions are built by the service factory, with the
+        # timings in STUB_PROVIDERS_CONFIG and the configured TTS chunking
+        ignored = [
+            "--" + dest.replace("_", "-")
+            for dest in STUB_SERVICE_OPTIONS
+            if getattr(args, dest) != parser.get_default(dest)
+        ]
+        if ignored:
+            parser.error(f"--failover cannot be combined with {', '.join(ignored)}")
+
+    if args.profile:
+        os.environ[ENV_VARS["PROFILE_SAMPLE_RATE"]] = "1"
+        os.environ[ENV_VARS["PROFILE_DIR"]] = args.profile
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Logging benchmark: event loop lag with logging off, through loguru, and queued.
+
+Runs a number of fake sessions on one event loop. Every 20 ms audio frame,
+each logs `--debug-per-frame` debug events, as the VAD, cache and
+speculation paths do, and every `--transcript-every` frames a transcript
+line at info level. The same run is repeated with logging off, with
+loguru's synchronous file handler as without STRUCTURED_LOGS, and with
+`configure_structured_logging()`, which queues records for a background
+thread that samples, encodes and writes them in batches. Event loop lag is
+measured by an `EventLoopLagMonitor`, and the time each log call takes on
+the loop is timed.
+
+Usage:
+    python benchmarks/logging_lag.py --sessions 100 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from loguru import logger  # noqa: E402
+
+from latency_metrics import LatencyHistogram  # noqa: E402
+from loop_monitor import EventLoopLagMonitor  # noqa: E402
+from structured_logging import configure_structured_logging, log  # noqa: E402
+
+FRAME_SECS = 0.02
+
+
+async def run_session(index: int, frames: int, args, call_time: LatencyHistogram):
+    text = f"session {index} says something about the weather"
+    for frame in range(frames):
+        start = time.perf_counter()
+        for _ in range(args.debug_per_frame):
+            log.debug("tts_cache_miss", text)
+        if frame % args.transcript_every == 0:
+            log.info("transcript_line", f"user: {text}")
+        call_time.record((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(FRAME_SECS)
+
+
+async def run_mode(mode: str, path: str, args) -> dict:
+    logger.remove()
+    sink = None
+    output = None
+    if mode == "loguru":
+        logger.add(path, level="DEBUG")
+    elif mode == "structured":
+        output = open(path, "w")
+        sink = configure_structured_logging(output)
+
+    monitor = EventLoopLagMonitor(interval=0.01)
+    call_time = LatencyHistogram()
+    frames = int(args.seconds / FRAME_SECS)
+    cpu_start = time.process_time()
+    monitor.start()
+    try:
+        await asyncio.gather(
+            *(run_session(i, frames, args, call_time) for i in range(args.sessions))
+        )
+    finally:
+        await monitor.stop()
+        cpu = time.process_time() - cpu_start
+        logger.remove()
+        log.sink = None
+        if sink:
+            sink.close()
+            output.close()
+
+    report = {
+        "event_loop_lag_ms": monitor.histogram.as_dict(),
+        "log_calls_per_frame_ms": call_time.as_dict(),
+        "cpu_seconds": cpu,
+        "bytes_written": os.path.getsize(path) if mode != "off" else 0,
+    }
+    if sink:
+        report["records_written"] = sink.written
+        report["debug_sampled_out"] = sink.sampled_out
+        report["dropped"] = sink.dropped
+    return report
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "sessions": args.sessions,
+            "log_calls_per_second": (
+                args.sessions
+                * (args.debug_per_frame + 1 / args.transcript_every)
+                / FRAME_SECS
+            ),
+        }
+        for mode in ("off", "loguru", "structured"):
+            path = os.path.join(directory, f"{mode}.log")
+            results[mode] = await run_mode(mode, path, args)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging event loop lag benchmark")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument(
+        "--debug-per-frame",
+        type=int,
+        default=2,
+        help="Debug events each session logs per 20 ms frame",
+    )
+    parser.add_argument(
+        "--transcript-every",
+        type=int,
+        default=50,
+        help="Frames between transcript lines",
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
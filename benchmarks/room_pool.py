@@ -0,0 +1,89 @@
+"""Room acquisition benchmark: pooled rooms vs creating one per run.
+
+Runs against `mock_daily_api.py`, which answers each REST call after a
+fixed latency, and times `RoomPool.acquire()` for a number of runs. Without
+the pool every acquisition creates a room and then a token, which is two
+round-trips; with it, the room is already waiting. Between runs the pool
+is given `--gap` seconds to top itself back up, as it would while a
+conversation is in progress.
+
+Usage:
+    python benchmarks/room_pool.py --runs 20 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# local_runner logs through src/structured_logging.py
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import aiohttp  # noqa: E402
+from pipecat.transports.services.helpers.daily_rest import (  # noqa: E402
+    DailyRESTHelper,
+)
+
+from local_runner import RoomPool  # noqa: E402
+from mock_daily_api import MockDailyAPI, start_mock_server  # noqa: E402
+
+PROPERTIES = {"enable_prejoin_ui": False}
+
+
+async def time_acquisitions(helper, size: int, runs: int, gap: float) -> dict:
+    pool = RoomPool(helper, PROPERTIES, size=size)
+    if size:
+        await pool.fill()
+        pool.start()
+    try:
+        for _ in range(runs):
+            await pool.acquire()
+            await asyncio.sleep(gap)
+    finally:
+        await pool.close()
+    latencies = [s * 1000 for s in pool.acquire_latencies]
+    return {
+        "p50_ms": statistics.median(latencies),
+        "max_ms": max(latencies),
+    }
+
+
+async def run(args) -> dict:
+    api = MockDailyAPI(latency=args.latency)
+    runner, url = await start_mock_server(api)
+    try:
+        async with aiohttp.ClientSession() as session:
+            helper = DailyRESTHelper(
+                daily_api_key="mock", daily_api_url=url, aiohttp_session=session
+            )
+            return {
+                "rest_latency_ms": args.latency * 1000,
+                "create_per_run": await time_acquisitions(
+                    helper, 0, args.runs, args.gap
+                ),
+                "pooled": await time_acquisitions(
+                    helper, args.pool_size, args.runs, args.gap
+                ),
+                "rooms_created": api.rooms_created,
+                "tokens_created": api.tokens_created,
+            }
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Room acquisition benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="REST latency")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--gap", type=float, default=0.5, help="Seconds per run")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
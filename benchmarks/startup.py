@@ -0,0 +1,164 @@
+"""Startup benchmark: bot import time, warm-up breakdown and first-call latency.
+
+The import is measured in a fresh interpreter with `-X importtime`, so the
+numbers match a cold container. Importing the bot must stay cheap: the run
+fails if it takes longer than `--max-import-seconds` or loads any of the
+provider modules that are meant to be imported on first use. The warm-up is
+then timed on its own, and a first and a second offline session run in that
+same process against stub services, showing how much of the first call's
+turn latency is still one-time setup.
+
+Usage:
+    python benchmarks/startup.py --wav utterance.wav --max-first-turn-ms 1500
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+SRC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"
+)
+
+# Import-time budget for the bot module, without warm-up
+IMPORT_BUDGET_SECONDS = 2.0
+
+# Modules the bot imports only when a session needs them
+LAZY_MODULES = [
+    "daily",
+    "onnxruntime",
+    "deepgram",
+    "openai",
+    "pipecat.transports.services.daily",
+    "pipecat.services.deepgram.stt",
+    "pipecat.services.openai.llm",
+    "pipecat.services.cartesia.tts",
+    "service_factory",
+    "vad_pool",
+]
+
+# Runs in the child interpreter; prints a JSON report on the last line
+CHILD_SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import bot
+import_seconds = time.perf_counter() - start
+loaded = sorted(sys.modules)
+
+from vad_pool import get_vad_pool
+from warmup import warm_up
+warm_up_report = warm_up(get_vad_pool())
+
+async def first_sessions(wav):
+    from pipecat.transports.base_transport import TransportParams
+    from config import LOOPBACK_CONFIG
+    from latency_metrics import TurnLatencyTracker
+    from loopback_transport import LoopbackTransport, load_wav
+    from stub_services import create_stub_services
+
+    audio = load_wav(wav)
+    results = []
+    for i in range(2):
+        transport = LoopbackTransport(
+            audio,
+            TransportParams(
+                audio_in_enabled=True,
+                audio_out_enabled=True,
+                audio_in_sample_rate=LOOPBACK_CONFIG["sample_rate"],
+                vad_analyzer=get_vad_pool().create_analyzer(),
+            ),
+            client_id=f"startup-{i}",
+        )
+        tracker = TurnLatencyTracker(f"startup-{i}")
+        session_start = time.perf_counter()
+        await bot.main(
+            transport,
+            session_id=f"startup-{i}",
+            services=create_stub_services(),
+            latency_tracker=tracker,
+        )
+        results.append({
+            "session_seconds": time.perf_counter() - session_start,
+            "turn_ms": tracker.histograms["total"].percentile(0.5),
+        })
+    return results
+
+report = {
+    "import_seconds": import_seconds,
+    "loaded_modules": loaded,
+    "warm_up": warm_up_report,
+}
+if len(sys.argv) > 1:
+    report["sessions"] = asyncio.run(first_sessions(sys.argv[1]))
+print(json.dumps(report))
+"""
+
+
+def parse_importtime(stderr: str, top: int) -> list[dict]:
+    """Sum `-X importtime` self time per top-level package."""
+    totals: dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [{"package": name, "seconds": seconds} for name, seconds in ranked[:top]]
+
+
+def run(args) -> dict:
+    command = [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT]
+    if args.wav:
+        command.append(os.path.abspath(args.wav))
+    # Measure a plain import, as outside the container image
+    env = {k: v for k, v in os.environ.items() if k != "WARMUP_ON_IMPORT"}
+    result = subprocess.run(
+        command, cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    loaded = set(report.pop("loaded_modules"))
+    report["eagerly_imported"] = [m for m in LAZY_MODULES if m in loaded]
+    report["import_breakdown"] = parse_importtime(result.stderr, args.top)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark for the bot")
+    parser.add_argument("--wav", help="16 kHz 16-bit mono WAV for test sessions")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument(
+        "--max-import-seconds", type=float, default=IMPORT_BUDGET_SECONDS
+    )
+    parser.add_argument("--max-first-turn-ms", type=float)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    # Fail when over budget, so CI catches startup regressions
+    failures = []
+    import_seconds = report["import_seconds"]
+    if args.max_import_seconds and import_seconds > args.max_import_seconds:
+        failures.append(f"import took {import_seconds:.2f}s")
+    if report["eagerly_imported"]:
+        eager = ", ".join(report["eagerly_imported"])
+        failures.append(f"import loaded {eager}")
+    sessions = report.get("sessions")
+    if args.max_first_turn_ms and sessions:
+        if sessions[0]["turn_ms"] > args.max_first_turn_ms:
+            failures.append(f"first turn took {sessions[0]['turn_ms']:.0f}ms")
+    if failures:
+        sys.exit("Over budget: " + ", ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,11 @@
 # SPDX-License-Identifier: BSD 2-Clause License
 #
 
+import asyncio
+import hashlib
+import json
 import os
+import time
 
 import aiohttp
 from dotenv import load_dotenv
@@ -14,33 +18,183 @@ from pipecat.transports.services.helpers.daily_rest import (
     DailyRoomParams,
 )
 
+from structured_logging import log
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Lifetime of a meeting token, in seconds
+TOKEN_EXPIRY_TIME: float = 60 * 60
 
-async def configure(aiohttp_session: aiohttp.ClientSession):
-    # (url, token) = await configure_with_args(aiohttp_session)
-    (url, token) = await configure_with_args(aiohttp_session)
-    return (url, token)
+# Pooled rooms whose token expires within this many seconds get a new one
+TOKEN_REFRESH_MARGIN: float = 10 * 60
 
 
-RECORD_VIDEO = os.getenv("RECORD_VIDEO")
+class RoomPool:
+    """Daily rooms and meeting tokens created ahead of time.
 
-print("RECORD_VIDEO", RECORD_VIDEO)
+    `acquire()` hands out a pooled room immediately, then tops the pool back
+    up in the background, so the REST round-trips to create a room and a
+    token are off the path to the next conversation. Tokens are valid for
+    `expiry_time`; pooled rooms get a fresh token once theirs is within
+    `refresh_margin` of expiring, so a room is never handed out with less
+    than that left. A saved room whose token has expired between runs still
+    exists in Daily, so it gets a new token rather than being replaced.
 
+    With `store_path`, the pool is saved to disk after every change and
+    loaded on start, so rooms created while one local run is in progress
+    are ready for the next run. The file holds meeting tokens, so it is
+    readable by its owner only.
 
-async def configure_with_args(aiohttp_session: aiohttp.ClientSession = None):
-    key = os.getenv("DAILY_API_KEY")
-    if not key:
-        raise Exception(
-            "No Daily API key specified. set DAILY_API_KEY in your environment to specify a Daily API key, available from https://dashboard.daily.co/developers."
+    REST calls go through `helper`'s aiohttp session, so `close()` the pool
+    before closing that session.
+
+    Attributes:
+        size: Number of rooms kept ready
+        acquire_latencies: Seconds each `acquire()` took
+    """
+
+    def __init__(
+        self,
+        helper: DailyRESTHelper,
+        properties: dict,
+        *,
+        size: int = 2,
+        expiry_time: float = TOKEN_EXPIRY_TIME,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+        store_path: str | None = None,
+    ):
+        self.size = size
+        self.acquire_latencies: list[float] = []
+        self._helper = helper
+        self._properties = properties
+        # Rooms created with other properties are not handed out
+        self._properties_key = hashlib.sha256(
+            json.dumps(properties, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        self._expiry_time = expiry_time
+        self._refresh_margin = refresh_margin
+        self._store_path = store_path
+        self._rooms: list[dict] = []
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self):
+        """Load saved rooms and start keeping the pool full and fresh."""
+        self._load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._save()
+
+    async def acquire(self) -> tuple[str, str]:
+        """Return (room_url, token), from the pool if a room is ready."""
+        start = time.perf_counter()
+        if self._rooms:
+            room = self._rooms.pop(0)
+            self._save()
+            if self._expiring(room):
+                await self._refresh(room)
+        else:
+            room = await self._create_room()
+        self._wake.set()
+        self.acquire_latencies.append(time.perf_counter() - start)
+        return room["url"], room["token"]
+
+    async def fill(self):
+        """Refresh expiring tokens and create rooms until the pool is full."""
+        for room in self._rooms:
+            if self._expiring(room):
+                await self._refresh(room)
+        missing = self.size - len(self._rooms)
+        if missing > 0:
+            rooms = await asyncio.gather(*(self._create_room() for _ in range(missing)))
+            self._rooms.extend(rooms)
+        self._save()
+
+    async def _maintain(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self.fill()
+            except Exception as e:
+                log.warning("room_pool_fill_error", e)
+            # Sleep until the first token needs refreshing or a room is taken
+            timeout = self._expiry_time - self._refresh_margin
+            if self._rooms:
+                next_expiry = min(room["expires_at"] for room in self._rooms)
+                timeout = next_expiry - self._refresh_margin - time.time()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(1.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _create_room(self) -> dict:
+        room = await self._helper.create_room(
+            DailyRoomParams(properties=self._properties)
         )
+        if not room.url:
+            raise HTTPException(status_code=500, detail="Failed to create room")
+        token = await self._helper.get_token(room.url, self._expiry_time)
+        return {
+            "url": room.url,
+            "token": token,
+            "expires_at": time.time() + self._expiry_time,
+            "properties": self._properties_key,
+        }
+
+    def _expiring(self, room: dict) -> bool:
+        return room["expires_at"] - time.time() < self._refresh_margin
+
+    async def _refresh(self, room: dict):
+        room["token"] = await self._helper.get_token(room["url"], self._expiry_time)
+        room["expires_at"] = time.time() + self._expiry_time
+
+    def _load(self):
+        if not self._store_path or not os.path.exists(self._store_path):
+            return
+        try:
+            with open(self._store_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("room_pool_file_ignored", e)
+            return
+        self._rooms = [
+            room for room in saved if room.get("properties") == self._properties_key
+        ]
 
-    daily_rest_helper = DailyRESTHelper(
-        daily_api_key=key,
-        daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
-        aiohttp_session=aiohttp_session,
-    )
+    def _save(self):
+        if not self._store_path:
+            return
+        try:
+            fd = os.open(self._store_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # Also for a file created before it was written owner-only
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._rooms, f)
+        except OSError as e:
+            log.warning("room_pool_save_error", e)
+
+
+_room_pool: RoomPool | None = None
+
+
+async def configure(aiohttp_session: aiohttp.ClientSession):
+    # (url, token) = await configure_with_args(aiohttp_session)
+    (url, token) = await configure_with_args(aiohttp_session)
+    return (url, token)
+
+
+def room_properties() -> dict:
+    record_video = os.getenv("RECORD_VIDEO")
     # Get S3 bucket configuration from environment variables
     bucket_name = os.getenv("BUCKET_NAME")
     bucket_region = os.getenv("BUCKET_REGION")
@@ -70,7 +224,7 @@ async def configure_with_args(aiohttp_session: aiohttp.ClientSession = None):
         "allow_api_access": True,
     }
 
-    if RECORD_VIDEO == "True":
+    if record_video == "True":
         properties = {
             "enable_prejoin_ui": False,
             "enable_recording": "cloud",
@@ -90,17 +244,46 @@ async def configure_with_args(aiohttp_session: aiohttp.ClientSession = None):
             "enable_prejoin_ui": False,
             "transcription_bucket": transcription_bucket,
         }
+    return properties
 
-    room = await daily_rest_helper.create_room(DailyRoomParams(properties=properties))
-    if not room.url:
-        raise HTTPException(status_code=500, detail="Failed to create room")
-
-    url = room.url
 
-    # Create a meeting token for the given room with an expiration 1 hour in
-    # the future.
-    expiry_time: float = 60 * 60
+async def configure_with_args(aiohttp_session: aiohttp.ClientSession = None):
+    global _room_pool
+    key = os.getenv("DAILY_API_KEY")
+    if not key:
+        raise Exception(
+            "No Daily API key specified. set DAILY_API_KEY in your environment to specify a Daily API key, available from https://dashboard.daily.co/developers."
+        )
 
-    token = await daily_rest_helper.get_token(url, expiry_time)
+    if _room_pool is None:
+        daily_rest_helper = DailyRESTHelper(
+            daily_api_key=key,
+            daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
+            aiohttp_session=aiohttp_session,
+        )
+        # Rooms with a token valid for 1 hour, created ahead of time and
+        # saved so the next local run can start without waiting for them
+        _room_pool = RoomPool(
+            daily_rest_helper,
+            room_properties(),
+            size=int(os.getenv("DAILY_ROOM_POOL_SIZE", "2")),
+            store_path=os.getenv("DAILY_ROOM_POOL_FILE", ".daily_room_pool.json"),
+        )
+        _room_pool.start()
 
+    (url, token) = await _room_pool.acquire()
+    log.info("room_acquired", _room_pool.acquire_latencies[-1] * 1000)
     return (url, token)
+
+
+async def close_room_pool():
+    """Stop topping up the room pool and save it.
+
+    The pool makes its REST calls on the aiohttp session passed to
+    `configure()`, so call this before closing that session. The next
+    `configure()` starts a new pool on the session it is given.
+    """
+    global _room_pool
+    if _room_pool is not None:
+        await _room_pool.close()
+        _room_pool = None
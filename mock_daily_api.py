@@ -0,0 +1,88 @@
+## Local fake of the Daily REST API rooms and meeting-tokens endpoints
+
+import argparse
+import asyncio
+import itertools
+import time
+
+from aiohttp import web
+
+
+class MockDailyAPI:
+    """Creates fake rooms and meeting tokens, each after `latency` seconds.
+
+    Responses have the fields `DailyRESTHelper` parses, so it can be
+    pointed here with `DAILY_API_URL`.
+
+    Attributes:
+        rooms_created: Number of rooms created
+        tokens_created: Number of meeting tokens created
+    """
+
+    def __init__(self, *, latency: float = 0.15):
+        self.rooms_created = 0
+        self.tokens_created = 0
+        self._latency = latency
+        self._ids = itertools.count(1)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/rooms", self.create_room)
+        app.router.add_post("/meeting-tokens", self.create_token)
+        return app
+
+    async def create_room(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(self._latency)
+        self.rooms_created += 1
+        name = f"mock-room-{next(self._ids)}"
+        return web.json_response(
+            {
+                "id": name,
+                "name": name,
+                "api_created": True,
+                "privacy": payload.get("privacy", "public"),
+                "url": f"https://mock.daily.co/{name}",
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                "config": payload.get("properties", {}),
+            }
+        )
+
+    async def create_token(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(self._latency)
+        self.tokens_created += 1
+        properties = payload.get("properties", {})
+        token = f"mock-token-{properties.get('room_name')}-{properties.get('exp')}"
+        return web.json_response({"token": token})
+
+
+async def start_mock_server(
+    api: MockDailyAPI, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Serve `api` in the running loop; return the runner and its base URL."""
+    runner = web.AppRunner(api.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Daily REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    print(f"Set DAILY_API_URL=http://{args.host}:{args.port} to use this mock")
+    web.run_app(
+        MockDailyAPI(latency=args.latency).create_app(),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
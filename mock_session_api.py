@@ -0,0 +1,118 @@
+## Local mock of the Pipecat Cloud session API, for testing agent_launcher.py
+
+import argparse
+import asyncio
+import itertools
+import random
+
+from aiohttp import web
+
+START_PATH = "/v1/public/{service}/start"
+
+
+class MockSessionAPI:
+    """Answers session start requests like Pipecat Cloud, without starting agents.
+
+    Each start takes `latency` seconds, give or take `jitter`. Requests beyond
+    `capacity` concurrent starts, and a random `error_rate` share of the
+    rest, fail with a 429 like an agent at capacity.
+
+    Attributes:
+        started: Number of sessions started
+        rejected: Number of start requests refused
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.3,
+        jitter: float = 0.2,
+        error_rate: float = 0.05,
+        capacity: int = 20,
+    ):
+        self.started = 0
+        self.rejected = 0
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._capacity = capacity
+        self._in_flight = 0
+        self._ids = itertools.count(1)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(START_PATH, self.start)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+    async def start(self, request: web.Request) -> web.Response:
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return web.json_response(
+                {"error": "No API key provided", "code": "401"}, status=401
+            )
+        payload = await request.json()
+        if self._in_flight >= self._capacity or random.random() < self._error_rate:
+            self.rejected += 1
+            return web.json_response(
+                {"error": "Agent at capacity", "code": "429", "status": "429"},
+                status=429,
+            )
+
+        self._in_flight += 1
+        try:
+            delay = self._latency + random.uniform(-self._jitter, self._jitter)
+            await asyncio.sleep(max(0.0, delay))
+        finally:
+            self._in_flight -= 1
+        self.started += 1
+        session = next(self._ids)
+        response = {"sessionId": f"mock-{session}"}
+        if payload.get("createDailyRoom"):
+            response["dailyRoom"] = f"https://mock.daily.co/room-{session}"
+            response["dailyToken"] = f"mock-token-{session}"
+        return web.json_response(response)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "started": self.started,
+                "rejected": self.rejected,
+                "in_flight": self._in_flight,
+            }
+        )
+
+
+async def start_mock_server(
+    api: MockSessionAPI, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Serve `api` in the running loop; return the runner and its base URL."""
+    runner = web.AppRunner(api.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Pipecat Cloud session API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=20)
+    args = parser.parse_args()
+
+    api = MockSessionAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        capacity=args.capacity,
+    )
+    print(f"Set PIPECAT_API_HOST=http://{args.host}:{args.port} to use this mock")
+    web.run_app(api.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from collections.abc import Iterator
+
+import numpy as np
+
+
+def frame_views(audio: bytes, frame_bytes: int) -> Iterator[memoryview]:
+    """Split `audio` into frames that share its memory instead of copying it.
+
+    Pipecat's audio consumers only read frames (`len()`, `np.frombuffer()`,
+    `bytearray.extend()`), so a view is as good as a copy for them.
+    """
+    view = memoryview(audio)
+    for i in range(0, len(view), frame_bytes):
+        yield view[i : i + frame_bytes]
+
+
+class AudioBufferPool:
+    """Preallocated NumPy scratch buffers, reused from one audio frame to the next.
+
+    Each caller asks for its buffer by name, so two users never share one.
+    A buffer only grows, to the next power of two, when a frame is larger
+    than any seen before; after the first few frames every request is served
+    without allocating.
+
+    Attributes:
+        allocations: Number of times a buffer had to be allocated or grown
+    """
+
+    def __init__(self):
+        self.allocations = 0
+        self._buffers: dict[str, np.ndarray] = {}
+
+    def get(self, name: str, size: int, dtype=np.float32) -> np.ndarray:
+        """Return a view of `size` elements of the named buffer."""
+        buffer = self._buffers.get(name)
+        if buffer is None or len(buffer) < size or buffer.dtype != dtype:
+            capacity = 1 << max(size - 1, 1).bit_length()
+            buffer = np.empty(capacity, dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+        return buffer[:size]
+
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self._buffers.values())
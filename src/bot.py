@@ -5,58 +5,61 @@
 #
 
 import os
+from typing import TYPE_CHECKING
 
-import aiohttp
-from dotenv import load_dotenv
-from loguru import logger
 from pipecat.adapters.schemas.function_schema import FunctionSchema
-from pipecat.adapters.schemas.tools_schema import ToolsSchema
-from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.frames.frames import EndTaskFrame, TTSSpeakFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
-from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 from pipecat.processors.frame_processor import FrameDirection
 from pipecat.processors.transcript_processor import TranscriptProcessor
-from pipecat.services.cartesia.tts import CartesiaTTSService
-from pipecat.services.deepgram.stt import DeepgramSTTService
-from pipecat.services.llm_service import FunctionCallParams
-from pipecat.services.openai.llm import OpenAILLMService
-from pipecat.transports.services.daily import DailyParams, DailyTransport
-from pipecatcloud.agent import DailySessionArguments
 from pydantic import BaseModel
 
 from config import (
     BOT_NAMES,
     ENV_VARS,
     EVENT_HANDLERS,
-    LLM_CONFIG,
     LOG_MESSAGES,
-    SYSTEM_MESSAGES,
-    TTS_CONFIG,
+    TTS_PHRASES,
 )
+from context_compactor import ContextCompactor
+from interruption import InterruptionProbe, InterruptionTracker
+from latency_metrics import LatencyProbe, TurnLatencyTracker
+from profiler import SessionProfiler, should_profile
+from prompt_cache import build_context_messages
+from speculative_llm import SpeculationManager, SpeculationTrigger
+from structured_logging import bind_log_session, configure_structured_logging, log
+from tools import Tool, ToolExecutor, tools_schema
 from transcript_handler import TranscriptHandler
+from transcript_sinks import create_transcript_sinks
+from turn_detection import (
+    SemanticTurnAnalyzer,
+    TurnTranscriptTap,
+    create_turn_analyzers,
+)
 
-# Load environment variables
-load_dotenv(override=True)
+if TYPE_CHECKING:
+    from pipecat.services.llm_service import FunctionCallParams
+    from pipecat.transports.services.daily import DailyTransport
+    from pipecatcloud.agent import DailySessionArguments
 
-# Check if we're in local development mode
-LOCAL_RUN = os.getenv(ENV_VARS["LOCAL_RUN"])
-if LOCAL_RUN:
-    import argparse
-    import asyncio
-    import webbrowser
+    from service_factory import SessionServices
 
-    try:
-        # Required to run local_runner.py
-        import os
-        import sys
+# With STRUCTURED_LOGS set, logs are queued and written as batched JSON lines
+# by a background thread, instead of synchronously on the event loop
+if os.getenv(ENV_VARS["STRUCTURED_LOGS"]):
+    configure_structured_logging()
 
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        from local_runner import configure
-    except ImportError:
-        logger.error(LOG_MESSAGES["import_error"])
+# Importing this module has no other side effects and does not load the Daily
+# transport, provider SDKs or onnxruntime; those are imported by the first
+# session that needs them. The container image sets WARMUP_ON_IMPORT so they
+# are loaded at container start instead, before the first session arrives.
+if os.getenv(ENV_VARS["WARMUP_ON_IMPORT"]):
+    from vad_pool import get_vad_pool
+    from warmup import warm_up
+
+    warm_up(get_vad_pool())
 
 
 class BodyRequest(BaseModel):
@@ -82,72 +85,140 @@ end_conversation_function = FunctionSchema(
 )
 
 
-async def end_conversation(params: FunctionCallParams):
-    await params.llm.push_frame(TTSSpeakFrame("Have a nice day!"))
+async def end_conversation(params: "FunctionCallParams"):
+    await params.llm.push_frame(TTSSpeakFrame(TTS_PHRASES["farewell"]))
 
     # Signal that the task should end after processing this frame
     await params.llm.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
 
 
-async def main(transport: DailyTransport, user_context: str | None = None):
+# Tools available to the LLM; add new ones here
+TOOLS = [
+    Tool(end_conversation_function, end_conversation, has_result=False),
+]
+
+# Built once so the tool schema is identical across sessions
+tools = tools_schema(TOOLS)
+
+
+async def main(
+    transport: "DailyTransport",
+    user_context: str | None = None,
+    session_id: str | None = None,
+    services: "SessionServices | None" = None,
+    latency_tracker: TurnLatencyTracker | None = None,
+):
     """Main pipeline setup and execution function.
 
     Args:
-        transport: The DailyTransport instance
+        transport: The DailyTransport instance, or any transport with the
+            same event handlers and recording methods
+        user_context: Optional user context appended to the system prompt
+        session_id: Optional session ID used to label transcript output
+        services: Services to use instead of ones from the service factory
+        latency_tracker: Tracker to record turn latency into
     """
-    tts = CartesiaTTSService(
-        api_key=os.getenv(ENV_VARS["CARTESIA_API_KEY"]), voice_id=TTS_CONFIG["voice_id"]
-    )
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 
-    sst = DeepgramSTTService(
-        api_key=os.getenv(ENV_VARS["DEEPGRAM_API_KEY"]),
-    )
+    from provider_registry import ProviderHealthProbe
+    from service_factory import get_service_factory
+    from tts_cache import CachedSpeechTextRelay, TTSCacheProcessor, get_tts_cache
 
-    llm = OpenAILLMService(
-        api_key=os.getenv(ENV_VARS["OPENAI_API_KEY"]), model=LLM_CONFIG["model"]
-    )
+    # Label this session's logs, including those of the pipeline's tasks
+    bind_log_session(session_id)
 
-    # Register the function with the LLM
-    llm.register_function("end_conversation", end_conversation)
+    # Provider connections and cached phrases are warmed when the worker or
+    # local run starts, by warm_connections(), not on this session's time
+    tts_cache = get_tts_cache()
+    if services is None:
+        services = get_service_factory().create_session_services()
+    tts = services.tts
+    sst = services.stt
+    llm = services.llm
 
-    content = SYSTEM_MESSAGES["initial_system_prompt"]
-    if user_context:
-        content += f"\n\nUser context: {user_context}"
+    # Register the tools with the LLM
+    tool_executor = ToolExecutor(TOOLS, session_id)
+    tool_executor.register(llm)
 
-    messages = [
-        {
-            "role": "system",
-            "content": content,
-        },
-    ]
-
-    tools = ToolsSchema(standard_tools=[end_conversation_function])
+    # Static instructions first, per-session data after, so every session
+    # shares the same cacheable prompt prefix
+    messages = build_context_messages(user_context)
 
     # Setup as a tools
     context = OpenAILLMContext(messages, tools=tools)
 
     context_aggregator = llm.create_context_aggregator(context)
 
+    # Keep the context within budget by summarizing older turns
+    context_compactor = ContextCompactor(services.summarizer)
+
+    # Optionally start LLM completions on stable interim transcripts
+    speculation_processors = []
+    if os.getenv(ENV_VARS["SPECULATIVE_LLM"]):
+        llm.speculation = SpeculationManager(llm, context)
+        speculation_processors.append(SpeculationTrigger(llm.speculation))
+
+    # Feed transcripts to the end-of-turn classifier, when the transport has one
+    turn_processors = []
+    turn_analyzer = getattr(transport.input(), "turn_analyzer", None)
+    if isinstance(turn_analyzer, SemanticTurnAnalyzer):
+        turn_processors.append(TurnTranscriptTap(turn_analyzer))
+
+    # Per-stage turn latency, exported when the session ends
+    if latency_tracker is None:
+        latency_tracker = TurnLatencyTracker(session_id)
+
+    # Stop generating as soon as the user interrupts, and keep only the
+    # played part of the interrupted response in the context
+    interruptions = InterruptionTracker(session_id)
+    llm.interruptions = interruptions
+
+    # Report provider TTFB and stalls so later sessions avoid slow providers
+    stt_probes = []
+    tts_probes = []
+    if services.registry:
+        registry = services.registry
+        stt_probes.append(ProviderHealthProbe(registry, services.providers["stt"], sst))
+        tts_probes.append(ProviderHealthProbe(registry, services.providers["tts"], tts))
+
     # Transcript Processor
     transcript = TranscriptProcessor()
 
     # Transcript Handler
-    transcript_handler = TranscriptHandler()
-
-    pipeline = Pipeline(
-        [
-            transport.input(),
-            sst,
-            transcript.user(),
-            context_aggregator.user(),
-            llm,
-            tts,
-            transport.output(),
-            transcript.assistant(),
-            context_aggregator.assistant(),
-        ]
+    transcript_handler = TranscriptHandler(
+        sinks=create_transcript_sinks(session_id), session_id=session_id
     )
 
+    processors = [
+        transport.input(),
+        LatencyProbe(latency_tracker, "vad_end"),
+        sst,
+        *stt_probes,
+        LatencyProbe(latency_tracker, "stt_final"),
+        *speculation_processors,
+        *turn_processors,
+        transcript.user(),
+        context_aggregator.user(),
+        context_compactor,
+        llm,
+        LatencyProbe(latency_tracker, "llm_first_token"),
+        TTSCacheProcessor(tts_cache, services.tts_voice),
+        tts,
+        *tts_probes,
+        InterruptionProbe(interruptions, "tts"),
+        LatencyProbe(latency_tracker, "tts_first_audio"),
+        CachedSpeechTextRelay(),
+        transport.output(),
+        InterruptionProbe(interruptions, "output"),
+        LatencyProbe(latency_tracker, "output"),
+        transcript.assistant(),
+        context_aggregator.assistant(),
+    ]
+    pipeline = Pipeline(processors)
+
+    # Profile a sample of sessions; written when the client disconnects
+    profiler = SessionProfiler(session_id, processors) if should_profile() else None
+
     task = PipelineTask(
         pipeline,
         params=PipelineParams(
@@ -161,8 +232,8 @@ async def main(transport: DailyTransport, user_context: str | None = None):
     recording_state = RecordingState()
 
     @transport.event_handler(EVENT_HANDLERS["on_client_connected"])
-    async def on_client_connected(transport: DailyTransport, client):
-        logger.info(LOG_MESSAGES["on_client_connected"], client["id"])
+    async def on_client_connected(transport: "DailyTransport", client):
+        log.info("on_client_connected", client["id"])
         await transport.start_recording()
         recording_state.start_recording()
         # Kick off the conversation.
@@ -177,8 +248,10 @@ async def main(transport: DailyTransport, user_context: str | None = None):
         await task.queue_frames([context_aggregator.user().get_context_frame()])
 
     @transport.event_handler(EVENT_HANDLERS["on_client_disconnected"])
-    async def on_client_disconnected(transport: DailyTransport, client):
-        logger.info(LOG_MESSAGES["on_client_disconnected"], client)
+    async def on_client_disconnected(transport: "DailyTransport", client):
+        log.info("on_client_disconnected", client)
+        if profiler:
+            await profiler.finish()
         if recording_state.isRecording:
             await transport.stop_recording()
             recording_state.stop_recording()
@@ -186,16 +259,16 @@ async def main(transport: DailyTransport, user_context: str | None = None):
 
     @transport.event_handler(EVENT_HANDLERS["on_recording_started"])
     async def on_recording_started(transport, status):
-        logger.info(LOG_MESSAGES["recording_started"], status)
+        log.info("recording_started", status)
 
     # https://reference-python.daily.co/api_reference.html#daily.EventHandler.on_recording_error
     @transport.event_handler(EVENT_HANDLERS["on_recording_error"])
     async def on_recording_error(transport, stream_id, message):
-        logger.error(LOG_MESSAGES["recording_error"], message)
+        log.error("recording_error", message)
 
     @transport.event_handler(EVENT_HANDLERS["on_recording_stopped"])
     async def on_recording_stopped(transport, status):
-        logger.info(LOG_MESSAGES["recording_stopped"], status)
+        log.info("recording_stopped", status)
 
     # Register event handler for transcript updates
     @transcript.event_handler("on_transcript_update")
@@ -204,10 +277,24 @@ async def main(transport: DailyTransport, user_context: str | None = None):
 
     runner = PipelineRunner()
 
-    await runner.run(task)
-
-
-async def bot(args: DailySessionArguments):
+    if profiler:
+        profiler.start()
+    try:
+        await runner.run(task)
+    finally:
+        if profiler:
+            await profiler.finish()
+        # The runner has returned, so the services have stopped reading from
+        # their connections and they can go back to the pool
+        if services.factory:
+            await services.factory.release(services)
+        await transcript_handler.close()
+        latency_tracker.export()
+        interruptions.export()
+        tool_executor.export()
+
+
+async def bot(args: "DailySessionArguments"):
     """Main bot entry point compatible with the FastAPI route handler.
 
     Args:
@@ -216,8 +303,15 @@ async def bot(args: DailySessionArguments):
         body: The configuration object from the request body
         session_id: The session ID for logging
     """
-    logger.info(LOG_MESSAGES["bot_initialized"], args.room_url, args.token)
+    from pipecat.transports.services.daily import DailyParams, DailyTransport
 
+    from vad_pool import get_vad_pool
+
+    bind_log_session(args.session_id)
+    log.info("bot_initialized", args.room_url)
+
+    vad_pool = get_vad_pool()
+    vad_analyzer, turn_analyzer = create_turn_analyzers(vad_pool)
     body = args.body
     validated_body = BodyRequest.model_validate(body or {})
     user_context = validated_body.user_context
@@ -230,16 +324,19 @@ async def bot(args: DailySessionArguments):
             audio_in_enabled=True,
             audio_out_enabled=True,
             transcription_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(),
+            vad_analyzer=vad_analyzer,
+            turn_analyzer=turn_analyzer,
         ),
     )
 
     try:
-        await main(transport, user_context)
-        logger.info(LOG_MESSAGES["bot_completed"])
+        await main(transport, user_context, args.session_id)
+        log.info("bot_completed")
     except Exception as e:
-        logger.exception(LOG_MESSAGES["bot_error"], str(e))
+        log.exception("bot_error", str(e))
         raise
+    finally:
+        log.info("vad_pool_stats", vad_pool.stats())
 
 
 # Local development
@@ -249,6 +346,23 @@ async def local_daily(data: str | None = None):
     Args:
         data: Optional data parameter to pass as user context
     """
+    import webbrowser
+
+    import aiohttp
+    from pipecat.transports.services.daily import DailyParams, DailyTransport
+
+    from vad_pool import get_vad_pool
+    from warmup import warm_connections
+
+    try:
+        # Required to run local_runner.py
+        import sys
+
+        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+        from local_runner import close_room_pool, configure
+    except ImportError:
+        log.error("import_error")
+        return
 
     try:
         # Validate data using BodyRequest
@@ -258,29 +372,49 @@ async def local_daily(data: str | None = None):
         user_context = validated_body.user_context
 
         async with aiohttp.ClientSession() as session:
-            (room_url, token) = await configure(session)
-            transport = DailyTransport(
-                room_url,
-                token,
-                BOT_NAMES["local"],
-                params=DailyParams(
-                    audio_in_enabled=True,
-                    audio_out_enabled=True,
-                    transcription_enabled=True,
-                    vad_analyzer=SileroVADAnalyzer(),
-                ),
-            )
-
-            logger.warning(LOG_MESSAGES["local_agent_url"], room_url)
-            webbrowser.open(room_url)
-
-            await main(transport, user_context)
+            try:
+                (room_url, token) = await configure(session)
+                vad_analyzer, turn_analyzer = create_turn_analyzers(get_vad_pool())
+                transport = DailyTransport(
+                    room_url,
+                    token,
+                    BOT_NAMES["local"],
+                    params=DailyParams(
+                        audio_in_enabled=True,
+                        audio_out_enabled=True,
+                        transcription_enabled=True,
+                        vad_analyzer=vad_analyzer,
+                        turn_analyzer=turn_analyzer,
+                    ),
+                )
+
+                log.warning("local_agent_url", room_url)
+                webbrowser.open(room_url)
+
+                await warm_connections()
+                await main(transport, user_context)
+            finally:
+                # The room pool tops itself up on this session; stop it and
+                # save the pool before the session closes
+                await close_room_pool()
     except Exception as e:
-        logger.exception(LOG_MESSAGES["local_dev_error"], e)
+        log.exception("local_dev_error", e)
 
 
 # Local development entry point
-if LOCAL_RUN and __name__ == "__main__":
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from dotenv import load_dotenv
+
+    # Load environment variables
+    load_dotenv(override=True)
+
+    # Only run when in local development mode
+    if not os.getenv(ENV_VARS["LOCAL_RUN"]):
+        raise SystemExit(LOG_MESSAGES["local_run_disabled"])
+
     try:
         parser = argparse.ArgumentParser(
             description="Local development for Pipecat agent"
@@ -290,4 +424,4 @@ if LOCAL_RUN and __name__ == "__main__":
 
         asyncio.run(local_daily(args.data))
     except Exception as e:
-        logger.exception(LOG_MESSAGES["local_run_failed"], e)
+        log.exception("local_run_failed", e)
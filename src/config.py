@@ -6,8 +6,23 @@ Configuration file containing all strings and constants used in the bot applicat
 ENV_VARS = {
     "LOCAL_RUN": "LOCAL_RUN",
     "CARTESIA_API_KEY": "CARTESIA_API_KEY",
+    "TTS_CACHE_DIR": "TTS_CACHE_DIR",
+    "SPECULATIVE_LLM": "SPECULATIVE_LLM",
+    "SEMANTIC_TURN": "SEMANTIC_TURN",
+    "LATENCY_METRICS_DIR": "LATENCY_METRICS_DIR",
+    "PROFILE_SAMPLE_RATE": "PROFILE_SAMPLE_RATE",
+    "PROFILE_DIR": "PROFILE_DIR",
     "DEEPGRAM_API_KEY": "DEEPGRAM_API_KEY",
     "OPENAI_API_KEY": "OPENAI_API_KEY",
+    "VAD_POOL_SIZE": "VAD_POOL_SIZE",
+    "TRANSCRIPT_DIR": "TRANSCRIPT_DIR",
+    "TRANSCRIPT_BUCKET": "TRANSCRIPT_BUCKET",
+    "TRANSCRIPT_COMPRESSION": "TRANSCRIPT_COMPRESSION",
+    "TRANSCRIPT_S3_ENDPOINT_URL": "TRANSCRIPT_S3_ENDPOINT_URL",
+    "SUPERVISOR_WORKERS": "SUPERVISOR_WORKERS",
+    "WARMUP_ON_IMPORT": "WARMUP_ON_IMPORT",
+    "STRUCTURED_LOGS": "STRUCTURED_LOGS",
+    "LLM_DOWNGRADE_FAILOVER": "LLM_DOWNGRADE_FAILOVER",
 }
 
 # TTS Configuration
@@ -15,11 +30,328 @@ TTS_CONFIG = {
     # My voice clone
     # "voice_id": "efe5d4cb-be7a-4aa6-9294-5ea6b762f837",
     "voice_id": "78ab82d5-25be-4f7d-82b3-7ad64e5b85b2",
+    "model": "sonic-2",
+}
+
+# TTS text chunking Configuration
+TTS_CHUNKING_CONFIG = {
+    # Flush the first chunk of each response early instead of waiting for a
+    # full sentence; later chunks are whole sentences for better prosody
+    "early_flush": True,
+    # The first chunk ends at a clause boundary once it has this many words...
+    "first_chunk_min_words": 3,
+    # ...or at a word boundary once it has this many words...
+    "first_chunk_max_words": 8,
+    # ...or this many seconds after the first token, whichever comes first
+    "first_chunk_timeout": 0.35,
+}
+
+# Barge-in handling
+INTERRUPTION_CONFIG = {
+    # Cut an interrupted assistant message in the LLM context back to the
+    # text that was actually played
+    "truncate_context": True,
+}
+
+# Audio frame handling
+AUDIO_CONFIG = {
+    # Slice audio into frames that are views of one buffer, and reuse NumPy
+    # scratch buffers, instead of copying every frame
+    "zero_copy": True,
+}
+
+# Tool calls
+TOOLS_CONFIG = {
+    # Seconds a tool may run before its call fails with an error result
+    "default_timeout": 5.0,
+    # Speak the "tool_filler" phrase once a call has run this many seconds
+    "filler_after": 1.0,
+    # Idempotent tool results kept per session, and for tools marked
+    # "shared", across sessions
+    "cache_max_entries": 256,
+}
+
+# Fixed phrases spoken by the bot
+TTS_PHRASES = {
+    "farewell": "Have a nice day!",
+    "tool_filler": "One moment, let me check.",
+}
+
+# Speculative LLM Configuration (enabled with SPECULATIVE_LLM=1)
+SPECULATION_CONFIG = {
+    # An interim transcript must repeat this many times to count as stable
+    "stable_interims": 2,
+    # Interim transcripts shorter than this are not worth speculating on
+    "min_words": 3,
+}
+
+# Semantic end-of-turn detection Configuration (enabled with SEMANTIC_TURN=1)
+TURN_CONFIG = {
+    # VAD silence after which the turn is first scored
+    "vad_stop_secs": 0.2,
+    # Further silence before a turn scored as clearly complete ends...
+    "min_stop_secs": 0.0,
+    # ...and before one scored as clearly unfinished does; scores in between
+    # interpolate
+    "max_stop_secs": 1.4,
+    # Seconds at the end of the user's speech used for prosody features
+    "prosody_window_secs": 0.6,
+    # Logistic model weights; positive features point to a finished turn
+    "weights": {
+        "bias": 0.0,
+        "terminal_punctuation": 2.0,
+        "trailing_continuation": -2.5,
+        "trailing_filler": -1.5,
+        "no_transcript": -0.5,
+        "energy_fall": 1.0,
+        "pitch_fall": 1.0,
+    },
+    # Last words that promise more to come, and hesitations (space separated)
+    "continuation_words": (
+        "and but or so because if then that which the a an to of for with my your "
+        "is like"
+    ),
+    "filler_words": "um uh er erm hmm mm",
+}
+
+# Turn latency metrics Configuration
+LATENCY_CONFIG = {
+    # Relative bucket width of the latency histograms (1% precision)
+    "histogram_precision": 0.01,
+    # Quantiles exported for every stage
+    "quantiles": [0.5, 0.9, 0.95, 0.99],
+}
+
+# Session profiler Configuration (enabled with PROFILE_SAMPLE_RATE > 0)
+PROFILER_CONFIG = {
+    # Seconds between stack samples of every thread
+    "interval": 0.01,
+    # Queue depths are read on every this many stack samples
+    "queue_every": 10,
+    # Seconds between event loop lag samples
+    "lag_interval": 0.1,
+    # Deeper stacks keep only their innermost frames
+    "max_stack_depth": 64,
+    # Directory profiles are written to, unless PROFILE_DIR is set
+    "directory": "profiles",
+}
+
+# Structured logging Configuration (enabled with STRUCTURED_LOGS)
+LOGGING_CONFIG = {
+    # Lowest level written
+    "level": "DEBUG",
+    # Write once this many records are waiting...
+    "batch_size": 256,
+    # ...or after this many seconds, whichever comes first
+    "flush_interval": 0.2,
+    # Records waiting to be written beyond which new ones are dropped
+    "max_queued": 20000,
+    # Of each kind of debug record, only one in this many is written
+    "debug_sample_every": 10,
+}
+
+# Offline stub provider Configuration (load tests and local runs)
+STUB_CONFIG = {
+    "stt_latency": 0.15,
+    "llm_ttfb": 0.35,
+    "llm_token_delay": 0.02,
+    "llm_response": (
+        "Why did the scarecrow win an award? Because he was outstanding in his field."
+    ),
+    "tts_ttfb": 0.2,
+    "tts_seconds_per_word": 0.3,
+    "utterances": [
+        "Tell me a joke about computers.",
+        "That was funny, tell me another one.",
+        "What is your favorite joke?",
+    ],
+}
+
+# Local providers for exercising routing and failover offline: one LLM
+# provider fails often, one stops answering, and one is slow but steady
+STUB_PROVIDERS_CONFIG = {
+    "stt": [{"name": "stub-stt", "kind": "stub"}],
+    "llm": [
+        {"name": "stub-flaky", "kind": "stub", "ttfb": 0.3, "error_rate": 0.3},
+        {"name": "stub-stalling", "kind": "stub", "stall": 5.0},
+        {"name": "stub-steady", "kind": "stub", "ttfb": 0.8},
+    ],
+    "tts": [{"name": "stub-tts", "kind": "stub"}],
+}
+
+# Loopback transport Configuration
+LOOPBACK_CONFIG = {
+    "sample_rate": 16000,
+    # Audio is streamed in chunks of this many milliseconds
+    "chunk_ms": 20,
+    # Silence inserted after each playback of the recording
+    "pause_seconds": 4.0,
+}
+
+# Multi-session worker Configuration
+WORKER_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 7860,
+    # Hard cap on concurrent sessions per process
+    "max_sessions": 50,
+    # New sessions are refused while smoothed event-loop lag exceeds this
+    "max_loop_lag_ms": 40.0,
+    # ...or while process CPU use exceeds this percentage of one core
+    "max_cpu_percent": 85.0,
+    # Seconds to wait for running sessions when draining
+    "drain_timeout": 600.0,
+}
+
+# Multi-process supervisor Configuration
+SUPERVISOR_CONFIG = {
+    # Worker processes to run; None means one per CPU core
+    "workers": None,
+    # Seconds between load reports from each worker
+    "load_report_interval": 0.5,
+    # Seconds to wait for a worker to accept or refuse a session
+    "start_timeout": 5.0,
+    # Seconds to wait before replacing a worker that exited unexpectedly
+    "restart_delay": 1.0,
+}
+
+# Warm-up Configuration
+WARMUP_CONFIG = {
+    # Modules imported during warm-up, before the first session needs them
+    "modules": [
+        "onnxruntime",
+        "soxr",
+        "daily",
+        "openai",
+        "websockets",
+        "pipecat.transports.services.daily",
+        "pipecat.services.deepgram.stt",
+        "pipecat.services.openai.llm",
+        "pipecat.services.cartesia.tts",
+    ],
+    # Silent frames run through each VAD session at each sample rate
+    "vad_prime_frames": 8,
+    # Sample rate pairs the resampler is primed with
+    "resample_rates": [(16000, 24000), (24000, 16000)],
+}
+
+# TTS audio cache Configuration
+TTS_CACHE_CONFIG = {
+    # Synthesized phrases kept in memory, least recently used evicted first
+    "max_entries": 64,
+    # Output sample rate the cache is pre-populated for
+    "sample_rate": 24000,
+    # Cached audio is pushed in chunks of this many seconds
+    "chunk_seconds": 0.5,
+    # Phrases synthesized at startup
+    "preload_phrases": list(TTS_PHRASES.values()),
 }
 
 # LLM Configuration
 LLM_CONFIG = {
     "model": "gpt-4o",
+    # Cheaper model used to summarize older turns off the critical path
+    "summary_model": "gpt-4o-mini",
+}
+
+# LLM context window Configuration
+CONTEXT_CONFIG = {
+    # Compact the context once its estimated size exceeds this many tokens
+    "max_tokens": 4000,
+    # Most recent messages always kept verbatim
+    "keep_recent_messages": 8,
+}
+
+# VAD Configuration
+VAD_CONFIG = {
+    # Number of Silero ONNX sessions shared by every call in the process
+    "pool_size": 2,
+    # Seconds between resets of a call's recurrent model state
+    "reset_states_time": 5.0,
+    # Pool waits longer than this (seconds) are logged as a warning
+    "slow_wait_threshold": 0.01,
+}
+
+# Service pool Configuration
+SERVICE_POOL_CONFIG = {
+    # Pre-opened TTS websockets kept idle between calls
+    "tts_idle_connections": 2,
+    # Idle websockets older than this (seconds) are closed instead of reused
+    "connection_ttl": 240.0,
+    # Keep-alive HTTP connections shared by every LLM service in the process
+    "llm_max_keepalive_connections": 100,
+    "llm_max_connections": 1000,
+}
+
+# Providers per pipeline stage. Each session uses the fastest healthy STT and
+# TTS provider. LLM requests go to the first LLM provider listed that is not
+# in its error cooldown, and fail over down the list. Providers marked
+# "downgrade" serve a smaller model and are only used with
+# LLM_DOWNGRADE_FAILOVER set. The "stub" kind runs locally, using the
+# STUB_CONFIG timings unless overridden.
+PROVIDERS_CONFIG = {
+    "stt": [
+        {"name": "deepgram", "kind": "deepgram"},
+    ],
+    "llm": [
+        {"name": "openai", "kind": "openai", "model": LLM_CONFIG["model"]},
+        {
+            "name": "openai-mini",
+            "kind": "openai",
+            "model": LLM_CONFIG["summary_model"],
+            "downgrade": True,
+        },
+    ],
+    "tts": [
+        {
+            "name": "cartesia",
+            "kind": "cartesia",
+            "voice_id": TTS_CONFIG["voice_id"],
+            "model": TTS_CONFIG["model"],
+        },
+    ],
+}
+
+# Provider routing Configuration
+ROUTING_CONFIG = {
+    # Recent requests per provider used for TTFB and error rate
+    "window": 50,
+    # STT and TTS providers are ranked by their configured "expected_ttfb"
+    # (seconds) until they have this many TTFB samples
+    "min_samples": 3,
+    "default_expected_ttfb": 0.5,
+    # A provider above this error rate is skipped for `cooldown` seconds
+    "max_error_rate": 0.3,
+    "cooldown": 30.0,
+    # Seconds to wait for an LLM provider to accept a request before trying
+    # the next one. The first token itself is not timed out, since a long
+    # context can take a while to prefill
+    "llm_stall_timeout": 5.0,
+    # Seconds from TTS start to first audio after which TTS counts as stalled
+    "tts_stall_timeout": 2.0,
+}
+
+# Transcript Configuration
+TRANSCRIPT_CONFIG = {
+    # Flush once this many records are buffered...
+    "flush_batch_size": 32,
+    # ...or after this many seconds, whichever comes first
+    "flush_interval": 1.0,
+    # Upper bound on records held in memory before backpressure applies
+    "max_buffered_records": 2048,
+    # "wait" blocks the producer until a flush frees space,
+    # "drop_oldest" discards the oldest buffered record
+    "overflow_policy": "wait",
+    # Compression for rolling transcript segments: "gzip" or "zstd", or
+    # "none" for one plain JSONL file per session (TRANSCRIPT_COMPRESSION)
+    "compression": "gzip",
+    # Uncompressed bytes written to a segment before rolling to a new one
+    "segment_max_bytes": 8 * 1024 * 1024,
+    # Key prefix for uploaded segments in the transcript bucket
+    "bucket_prefix": "transcripts",
+    # Most recent messages kept in memory; older ones are spilled to disk
+    "max_in_memory_messages": 200,
+    # Messages moved to the spill file at a time once the limit is exceeded
+    "spill_batch_size": 50,
 }
 
 # Bot Names
@@ -43,19 +375,87 @@ LOG_MESSAGES = {
     "import_error": "Could not import local_runner module. Local development mode may not work.",
     "on_client_connected": "First participant joined: {}",
     "on_client_disconnected": "Participant left: {}",
-    "bot_initialized": "Bot process initialized {} {}",
+    "bot_initialized": "Bot process initialized for room {}",
     "bot_completed": "Bot process completed",
     "bot_error": "Error in bot process: {}",
     "local_agent_url": "Talk to your voice agent here: {}",
     "local_dev_error": "Error in local development mode: {}",
     "local_run_failed": "Failed to run in local mode: {}",
+    "local_run_disabled": "Set LOCAL_RUN=1 to run the bot locally",
     "recording_started": "Recording started: {}",
     "recording_error": "Recording error: {}",
     "recording_stopped": "Recording stopped: {}",
+    "vad_pool_loaded": "Loaded {} Silero VAD sessions in {:.3f}s",
+    "vad_pool_slow_wait": "Waited {:.4f}s for a Silero VAD session",
+    "vad_pool_stats": "VAD pool stats: {}",
+    "vad_error": "Error analyzing audio with Silero VAD: {}",
+    "service_pool_warmed": "Warmed {} pool with {} connections",
+    "service_pool_connect_error": "Error opening pooled {} connection: {}",
+    "service_pool_release_error": "Error returning {} connection to pool: {}",
+    "service_llm_warm_error": "Error warming LLM HTTP connections: {}",
+    "service_pool_stats": "Service pool stats: {}",
+    "provider_selected": "Using {} provider {}",
+    "provider_failover": "LLM provider {} failed ({}), trying {}",
+    "provider_unhealthy": "Provider {} marked unhealthy: error rate {:.0%}",
+    "provider_stats": "Provider stats: {}",
+    "transcript_handler_initialized": "TranscriptHandler initialized with {} sinks",
+    "transcript_update": "Received transcript update with {} new messages",
+    "transcript_line": "Transcript: {}",
+    "transcript_dropped": "Transcript buffer full, dropped {} records so far",
+    "transcript_sink_error": "Error writing transcript batch to {}: {}",
+    "transcript_segment_uploaded": "Uploaded transcript segment {} to {}",
+    "transcript_upload_error": "Error uploading transcript segment {}: {}",
+    "context_compacted": "Context compacted: {} tokens saved this turn, {} sent",
+    "context_summary_error": "Error summarizing LLM context: {}",
+    "prompt_cache_usage": "Prompt cache: {} of {} prompt tokens cached",
+    "prompt_cache_stats": "Prompt cache stats: {}",
+    "tts_cache_hit": "TTS cache hit: {}",
+    "tts_cache_miss": "TTS cache miss: {}",
+    "tts_cache_synthesis_error": "Error synthesizing cached TTS phrase {}: {}",
+    "speculation_started": "Speculating on: {}",
+    "speculation_hit": "Reusing speculative completion for: {}",
+    "speculation_miss": "Discarding speculative completion for: {} ({} tokens)",
+    "speculation_error": "Error in speculative completion: {}",
+    "speculation_stats": "Speculation stats: {}",
+    "turn_end": "End of turn after {:.0f}ms of silence (score {:.2f})",
+    "turn_stats": "Turn detection stats: {}",
+    "turn_latency": "Turn latency (ms): {}",
+    "latency_summary": "Turn latency summary: {}",
+    "latency_export_error": "Error exporting turn latency metrics: {}",
+    "profile_written": "Session profile written to {}: {}",
+    "profile_export_error": "Error writing session profile: {}",
+    "profile_unavailable": "Not profiling: the profiler must start on the main thread",
+    "interruption": "Response interrupted: {} tokens generated, {} played",
+    "interruption_close_error": "Error closing interrupted LLM stream: {}",
+    "interruption_summary": "Interruption summary: {}",
+    "tool_called": "Tool {} finished in {:.0f}ms",
+    "tool_timeout": "Tool {} timed out after {}s",
+    "tool_error": "Tool {} failed: {}",
+    "tool_summary": "Tool summary: {}",
+    "worker_started": "Session worker listening on {}:{}",
+    "worker_admitted": "Admitted session {} ({} running)",
+    "worker_rejected": "Rejected session {}: {}",
+    "worker_draining": "Draining {} running sessions",
+    "worker_drain_timeout": "Drain timed out, cancelling {} sessions",
+    "worker_session_error": "Session {} failed: {}",
+    "supervisor_started": "Supervisor listening on {}:{} with {} workers",
+    "supervisor_worker_started": "Started worker {} (pid {})",
+    "supervisor_worker_exited": "Worker {} (pid {}) exited with code {}",
+    "supervisor_routed": "Routed session {} to worker {}",
+    "warmup_import_error": "Warm-up could not import {}: {}",
+    "warmup_completed": "Warm-up completed in {:.2f}s: {}",
+    "log_dropped": "Log queue full, dropped {} records so far",
+    "room_acquired": "Acquired Daily room in {:.0f}ms",
+    "room_pool_fill_error": "Error filling Daily room pool: {}",
+    "room_pool_file_ignored": "Ignoring Daily room pool file: {}",
+    "room_pool_save_error": "Error saving Daily room pool: {}",
 }
 
 # System Messages
 SYSTEM_MESSAGES = {
     "initial_system_prompt": """You are a helpful assistant who is good at dad jokes. End conversation when the user says goodbye.""",
+    "summarize_context": "Summarize the conversation below for the assistant that is continuing it. Keep names, facts, requests and open questions. Be concise. If a previous summary is given, fold it into the new one.",
+    "user_context": "User context: {}",
+    "context_summary": "Summary of the earlier conversation: {}",
     "start_conversation": "Introduce yourself to the user. If user's context is provided, use it to introduce yourself.",
 }
@@ -0,0 +1,221 @@
+import json
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING
+
+from pipecat.frames.frames import Frame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from config import CONTEXT_CONFIG, LLM_CONFIG, SYSTEM_MESSAGES
+from structured_logging import log
+
+# The OpenAI SDK is imported with the LLM service, when a session starts,
+# not when the bot is imported
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+Summarizer = Callable[[list[dict], str | None], Awaitable[str]]
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    return json.dumps(content if content is not None else message, default=str)
+
+
+class TokenCounter:
+    """Estimates token counts, using tiktoken when it is installed."""
+
+    def __init__(self, model: str = LLM_CONFIG["model"]):
+        try:
+            import tiktoken
+
+            self._encoding = tiktoken.encoding_for_model(model)
+        except Exception:
+            # Roughly four characters per token for English text
+            self._encoding = None
+
+    def count(self, message: dict) -> int:
+        # Per-message overhead for role and separators
+        return self.count_text(_message_text(message)) + 4
+
+    def count_text(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(text) // 4 + 1
+
+
+class OpenAIContextSummarizer:
+    """Summarizes older conversation turns with a small OpenAI model."""
+
+    def __init__(self, client: "AsyncOpenAI", model: str = LLM_CONFIG["summary_model"]):
+        self._client = client
+        self._model = model
+
+    async def __call__(self, messages: list[dict], previous: str | None) -> str:
+        transcript = "\n".join(f"{m['role']}: {_message_text(m)}" for m in messages)
+        if previous:
+            transcript = f"Previous summary: {previous}\n\n{transcript}"
+        response = await self._client.chat.completions.create(
+            model=self._model,
+            messages=[
+                {"role": "system", "content": SYSTEM_MESSAGES["summarize_context"]},
+                {"role": "user", "content": transcript},
+            ],
+        )
+        return response.choices[0].message.content or ""
+
+
+class ContextCompactor(FrameProcessor):
+    """Keeps the LLM context within a token budget.
+
+    Sits between the user context aggregator and the LLM. Token counts are
+    tracked incrementally as messages are appended. When the context grows
+    past `max_tokens`, older turns are summarized in a background task while
+    the current turn goes out unchanged; on a later turn the summarized
+    messages are replaced by a single summary message. The leading system
+    messages and the last `keep_recent_messages` messages are always kept
+    verbatim.
+
+    Attributes:
+        tokens_saved: Estimated tokens removed from the most recent request
+    """
+
+    def __init__(
+        self,
+        summarize: Summarizer,
+        *,
+        max_tokens: int = CONTEXT_CONFIG["max_tokens"],
+        keep_recent_messages: int = CONTEXT_CONFIG["keep_recent_messages"],
+        token_counter: TokenCounter | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.tokens_saved = 0
+        self._summarize = summarize
+        self._max_tokens = max_tokens
+        self._keep_recent = keep_recent_messages
+        self._counter = token_counter or TokenCounter()
+        self._counted: list[tuple[dict, int]] = []
+        self._total_tokens = 0
+        self._summary_message: dict | None = None
+        self._summary_text: str | None = None
+        self._removed_tokens = 0
+        self._summary_task = None
+        self._pending: tuple[str, list[dict]] | None = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        from pipecat.processors.aggregators.openai_llm_context import (
+            OpenAILLMContextFrame,
+        )
+
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame):
+            self._compact(frame.context)
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        if self._summary_task:
+            await self.cancel_task(self._summary_task)
+            self._summary_task = None
+
+    def _compact(self, context: "OpenAILLMContext"):
+        self._apply_pending_summary(context)
+
+        messages = context.get_messages()
+        total = self._count(messages)
+        if total > self._max_tokens and not self._summary_running():
+            start = self._body_start(messages)
+            split = self._split_index(messages, start)
+            if split > start:
+                older = messages[start:split]
+                self._summary_task = self.create_task(self._run_summary(older))
+
+        if self._summary_message is not None:
+            self.tokens_saved = self._removed_tokens - self._counter.count(
+                self._summary_message
+            )
+            log.debug("context_compacted", self.tokens_saved, total)
+
+    def _summary_running(self) -> bool:
+        return self._summary_task is not None and not self._summary_task.done()
+
+    async def _run_summary(self, older: list[dict]):
+        try:
+            text = await self._summarize(older, self._summary_text)
+        except Exception as e:
+            log.error("context_summary_error", e)
+            return
+        self._pending = (text, older)
+
+    def _apply_pending_summary(self, context: "OpenAILLMContext"):
+        if self._pending is None:
+            return
+        text, older = self._pending
+        self._pending = None
+
+        messages = context.get_messages()
+        start = self._body_start(messages)
+        end = start + len(older)
+        # The context may have been reset or edited since the summary started
+        if end > len(messages) or any(
+            a is not b for a, b in zip(messages[start:end], older, strict=True)
+        ):
+            return
+
+        summary_message = {
+            "role": "system",
+            "content": SYSTEM_MESSAGES["context_summary"].format(text),
+        }
+        prefix = messages[: self._prefix_len(messages)]
+        context.set_messages(prefix + [summary_message] + messages[end:])
+
+        self._removed_tokens += sum(self._counter.count(m) for m in older)
+        self._summary_message = summary_message
+        self._summary_text = text
+
+    def _prefix_len(self, messages: list[dict]) -> int:
+        # Leading system messages (instructions, user context) are never
+        # summarized so the cacheable prompt prefix stays intact
+        length = 0
+        for message in messages:
+            if message["role"] != "system" or message is self._summary_message:
+                break
+            length += 1
+        return length
+
+    def _body_start(self, messages: list[dict]) -> int:
+        start = self._prefix_len(messages)
+        if (
+            self._summary_message is not None
+            and len(messages) > start
+            and messages[start] is self._summary_message
+        ):
+            start += 1
+        return start
+
+    def _split_index(self, messages: list[dict], start: int) -> int:
+        # Only cut in front of a user message so tool calls stay paired with
+        # their results
+        for i in range(len(messages) - self._keep_recent, start, -1):
+            if messages[i]["role"] == "user":
+                return i
+        return start
+
+    def _count(self, messages: list[dict]) -> int:
+        counted = len(self._counted)
+        if counted and (
+            counted > len(messages) or messages[counted - 1] is not self._counted[-1][0]
+        ):
+            self._counted = []
+            self._total_tokens = 0
+            counted = 0
+        for message in messages[counted:]:
+            tokens = self._counter.count(message)
+            self._counted.append((message, tokens))
+            self._total_tokens += tokens
+        return self._total_tokens
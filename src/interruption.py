@@ -0,0 +1,219 @@
+import time
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    Frame,
+    StartInterruptionFrame,
+    TTSTextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from config import INTERRUPTION_CONFIG, LLM_CONFIG
+from context_compactor import TokenCounter
+from latency_metrics import LatencyHistogram
+from structured_logging import log
+
+# Points an interruption is timed to, from when it reaches the LLM service
+STOP_STAGES = ("llm", "tts", "output", "audio")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class TrackedStream:
+    """Wraps a completion stream so an interruption can close it.
+
+    Pipecat cancels the task reading the stream, but leaves the HTTP
+    response open until it is garbage collected, so the provider keeps
+    generating. Closing it drops the connection right away.
+    """
+
+    def __init__(self, stream, tracker: "InterruptionTracker"):
+        self._stream = stream
+        self._iterator = None
+        self._tracker = tracker
+
+    def __aiter__(self):
+        self._iterator = self._stream.__aiter__()
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self._tracker._streams.discard(self)
+            raise
+        for choice in getattr(chunk, "choices", None) or []:
+            if choice.delta and choice.delta.content:
+                self._tracker._generated.append(choice.delta.content)
+        return chunk
+
+    async def close(self):
+        self._tracker._streams.discard(self)
+        await self._stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class InterruptionTracker:
+    """Stops a session's in-flight response when the user interrupts it.
+
+    The LLM service calls `on_interruption()` when a `StartInterruptionFrame`
+    reaches it and `close_streams()` once pipecat has cancelled the response,
+    which closes the completion streams registered with `track()`. Cartesia
+    cancels its websocket context on the same frame. `InterruptionProbe`s
+    after the TTS service and the output transport time how long each stage
+    took to stop, and collect the text that was actually played.
+
+    Tokens generated but never played are counted as wasted, and with
+    `truncate_context` the interrupted assistant message is cut back to the
+    played text before the next request, so the LLM does not believe it said
+    something the user never heard.
+
+    Attributes:
+        session_id: Session the metrics belong to
+        interruptions: Number of responses interrupted
+        generated_tokens: Tokens generated by interrupted responses
+        wasted_tokens: Tokens of those responses that were never played
+        truncated: Assistant messages cut back to the played text
+        histograms: Stop latency in ms per stage of `STOP_STAGES`
+    """
+
+    def __init__(
+        self,
+        session_id: str | None = None,
+        *,
+        truncate_context: bool = INTERRUPTION_CONFIG["truncate_context"],
+    ):
+        self.session_id = session_id
+        self.interruptions = 0
+        self.generated_tokens = 0
+        self.wasted_tokens = 0
+        self.truncated = 0
+        self.histograms = {stage: LatencyHistogram() for stage in STOP_STAGES}
+        self._truncate_context = truncate_context
+        self._counter = TokenCounter(LLM_CONFIG["model"])
+        self._streams: set[TrackedStream] = set()
+        self._generated: list[str] = []
+        self._spoken: list[str] = []
+        self._speaking = False
+        self._started: float | None = None
+        self._stopped: set[str] = set()
+        self._played: str | None = None
+
+    def track(self, stream) -> TrackedStream:
+        """Register a completion stream for a new response."""
+        self._finish()
+        self._generated = []
+        self._spoken = []
+        tracked = TrackedStream(stream, self)
+        self._streams.add(tracked)
+        return tracked
+
+    def on_interruption(self):
+        """Start timing an interruption, if a response is in progress."""
+        if self._started is None and (self._streams or self._speaking):
+            self._started = time.perf_counter()
+            self._stopped = set()
+
+    async def close_streams(self):
+        """Close every completion stream still being generated."""
+        streams, self._streams = self._streams, set()
+        for stream in streams:
+            try:
+                await stream.close()
+            except Exception as e:
+                log.warning("interruption_close_error", e)
+        self.on_stopped("llm")
+
+    def on_stopped(self, stage: str):
+        """Record that `stage` has stopped working on the interrupted response."""
+        if self._started is None or stage in self._stopped:
+            return
+        self._stopped.add(stage)
+        self.histograms[stage].record((time.perf_counter() - self._started) * 1000)
+
+    def on_output_frame(self, frame: Frame):
+        if isinstance(frame, TTSTextFrame):
+            self._spoken.append(frame.text)
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self._speaking = True
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            self._speaking = False
+            self.on_stopped("audio")
+            self._finish()
+
+    def truncate(self, messages: list[dict]):
+        """Cut the interrupted assistant message back to what was played."""
+        self._finish()
+        played, self._played = self._played, None
+        if not played or not self._truncate_context:
+            return
+        for message in reversed(messages):
+            if message.get("role") != "assistant":
+                continue
+            content = message.get("content")
+            if isinstance(content, str):
+                content = _normalize(content)
+                if len(content) > len(played) and content.startswith(played):
+                    message["content"] = played
+                    self.truncated += 1
+            return
+
+    def _finish(self):
+        """Account for the interrupted response once its audio has stopped."""
+        if self._started is None:
+            return
+        generated = self._counter.count_text("".join(self._generated))
+        played = _normalize(" ".join(self._spoken))
+        spoken = self._counter.count_text(played) if played else 0
+        self.interruptions += 1
+        self.generated_tokens += generated
+        self.wasted_tokens += max(0, generated - spoken)
+        self._played = played
+        self._started = None
+        self._generated = []
+        self._spoken = []
+        log.debug("interruption", generated, spoken)
+
+    def as_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "interruptions": self.interruptions,
+            "generated_tokens": self.generated_tokens,
+            "wasted_tokens": self.wasted_tokens,
+            "truncated": self.truncated,
+            "stop_ms": {name: h.as_dict() for name, h in self.histograms.items()},
+        }
+
+    def export(self):
+        self._finish()
+        log.info("interruption_summary", self.as_dict())
+
+
+class InterruptionProbe(FrameProcessor):
+    """Reports when an interruption gets past one stage of the pipeline.
+
+    Place one after the TTS service (stage "tts") and one after the output
+    transport (stage "output"); the latter also reports played text and
+    when the bot stops speaking.
+    """
+
+    def __init__(self, tracker: InterruptionTracker, stage: str, **kwargs):
+        super().__init__(**kwargs)
+        self._tracker = tracker
+        self._stage = stage
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if direction == FrameDirection.DOWNSTREAM:
+            if isinstance(frame, StartInterruptionFrame):
+                self._tracker.on_stopped(self._stage)
+            elif self._stage == "output":
+                self._tracker.on_output_frame(frame)
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,217 @@
+import json
+import math
+import os
+import time
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    Frame,
+    LLMTextFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from config import ENV_VARS, LATENCY_CONFIG
+from structured_logging import log
+
+# Pipeline checkpoints, in the order they happen during a turn
+STAGES = ("vad_end", "stt_final", "llm_first_token", "tts_first_audio", "output")
+
+# Frame that marks each checkpoint
+STAGE_FRAMES = {
+    "vad_end": UserStoppedSpeakingFrame,
+    "stt_final": TranscriptionFrame,
+    "llm_first_token": LLMTextFrame,
+    "tts_first_audio": TTSAudioRawFrame,
+    "output": BotStartedSpeakingFrame,
+}
+
+# Smallest latency (ms) the histograms distinguish
+MIN_TRACKABLE_MS = 0.01
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram in the spirit of HdrHistogram.
+
+    Values are stored in buckets whose width grows with the value, so every
+    recorded latency is reproduced within `precision` relative error using a
+    small, fixed amount of memory.
+    """
+
+    def __init__(self, precision: float = LATENCY_CONFIG["histogram_precision"]):
+        self._log_base = math.log1p(precision)
+        self._base = 1 + precision
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        value_ms = max(value_ms, MIN_TRACKABLE_MS)
+        index = math.floor(math.log(value_ms) / self._log_base)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.min = min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the values recorded by `other`, which must share the precision."""
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, quantile: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._base ** (index + 1), self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        summary = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+        for q in LATENCY_CONFIG["quantiles"]:
+            summary[f"p{round(q * 100)}"] = self.percentile(q)
+        return summary
+
+
+class TurnLatencyTracker:
+    """Collects per-stage latency for every turn of one session.
+
+    `LatencyProbe`s report when frames pass their checkpoint. A turn starts
+    when the user stops speaking and ends when the bot starts speaking; at
+    that point the time spent in each stage, and the total, is recorded into
+    per-stage histograms.
+
+    Attributes:
+        session_id: Session the metrics belong to
+        histograms: Histogram per stage, plus "total" for the whole turn
+    """
+
+    def __init__(self, session_id: str | None = None):
+        self.session_id = session_id
+        self.histograms: dict[str, LatencyHistogram] = {
+            name: LatencyHistogram() for name in (*STAGES[1:], "total")
+        }
+        self._marks: dict[str, float] = {}
+        self._last_final: float | None = None
+
+    def on_frame(self, stage: str, frame: Frame):
+        if not isinstance(frame, (STAGE_FRAMES[stage], UserStartedSpeakingFrame)):
+            return
+        now = time.perf_counter()
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            if stage == "vad_end":
+                self._marks = {}
+                self._last_final = None
+        elif stage == "stt_final":
+            # Finals often arrive before VAD end; keep the latest one
+            self._last_final = now
+        elif stage == "vad_end":
+            self._marks = {"vad_end": now}
+        elif "vad_end" in self._marks and stage not in self._marks:
+            self._marks[stage] = now
+            if stage == "output":
+                self._finish_turn()
+
+    def _finish_turn(self):
+        marks = self._marks
+        self._marks = {}
+        if self._last_final is not None:
+            marks["stt_final"] = self._last_final
+        self._last_final = None
+
+        turn = {}
+        previous = marks["vad_end"]
+        for stage in STAGES[1:]:
+            if stage not in marks:
+                continue
+            at = max(marks[stage], previous)
+            turn[stage] = (at - previous) * 1000
+            previous = at
+        turn["total"] = (marks["output"] - marks["vad_end"]) * 1000
+
+        for stage, value in turn.items():
+            self.histograms[stage].record(value)
+        log.debug("turn_latency", turn)
+
+    def as_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "unit": "ms",
+            "stages": {name: h.as_dict() for name, h in self.histograms.items()},
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the histograms as Prometheus summaries, in seconds."""
+        session = self.session_id or ""
+        lines = [
+            "# HELP voice_turn_stage_latency_seconds Time spent per stage of a turn",
+            "# TYPE voice_turn_stage_latency_seconds summary",
+        ]
+        for stage, h in self.histograms.items():
+            labels = f'session_id="{session}",stage="{stage}"'
+            for q in LATENCY_CONFIG["quantiles"]:
+                lines.append(
+                    f'voice_turn_stage_latency_seconds{{{labels},quantile="{q}"}} '
+                    f"{h.percentile(q) / 1000:.6f}"
+                )
+            lines.append(
+                f"voice_turn_stage_latency_seconds_sum{{{labels}}} {h.total / 1000:.6f}"
+            )
+            lines.append(
+                f"voice_turn_stage_latency_seconds_count{{{labels}}} {h.count}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """Log the summary and, if LATENCY_METRICS_DIR is set, write files."""
+        summary = self.as_dict()
+        log.info("latency_summary", summary)
+
+        directory = os.getenv(ENV_VARS["LATENCY_METRICS_DIR"])
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            name = self.session_id or time.strftime("%Y%m%dT%H%M%S")
+            with open(os.path.join(directory, f"{name}.json"), "w") as f:
+                json.dump(summary, f)
+            with open(os.path.join(directory, f"{name}.prom"), "w") as f:
+                f.write(self.to_prometheus())
+        except Exception as e:
+            log.error("latency_export_error", e)
+
+
+class LatencyProbe(FrameProcessor):
+    """Reports frames passing one checkpoint of the pipeline to a tracker."""
+
+    def __init__(self, tracker: TurnLatencyTracker, stage: str, **kwargs):
+        super().__init__(**kwargs)
+        self._tracker = tracker
+        self._stage = stage
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if direction == FrameDirection.DOWNSTREAM:
+            self._tracker.on_frame(self._stage, frame)
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import resource
+import time
+
+from latency_metrics import LatencyHistogram
+
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping task.
+
+    A background task sleeps for `interval` seconds at a time; anything past
+    that is lag caused by other work hogging the loop. Lag samples go into a
+    histogram, and `recent_lag` tracks an exponentially weighted average for
+    cheap admission decisions. Process CPU use is sampled on the same tick.
+
+    Attributes:
+        histogram: Lag samples in milliseconds
+        recent_lag: Smoothed recent lag in milliseconds
+        recent_cpu: Smoothed process CPU use, in percent of one core
+    """
+
+    def __init__(self, interval: float = 0.05, smoothing: float = 0.2):
+        self.histogram = LatencyHistogram()
+        self.recent_lag = 0.0
+        self.recent_cpu = 0.0
+        self._interval = interval
+        self._smoothing = smoothing
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+            await asyncio.sleep(self._interval)
+            elapsed = time.perf_counter() - start
+            lag = max(0.0, (elapsed - self._interval) * 1000)
+            cpu = 100 * (time.process_time() - cpu_start) / elapsed
+            self.histogram.record(lag)
+            self.recent_lag += self._smoothing * (lag - self.recent_lag)
+            self.recent_cpu += self._smoothing * (cpu - self.recent_cpu)
+
+
+def process_uptime() -> float | None:
+    """Return seconds since this process started, or None if unknown."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; starttime is 22nd
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            boot_uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return boot_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def rss_bytes() -> int:
+    """Return the current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Without /proc, fall back to peak RSS (reported in kilobytes)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,184 @@
+import asyncio
+import itertools
+import time
+import wave
+from collections.abc import Iterator
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+)
+from pipecat.transports.base_input import BaseInputTransport
+from pipecat.transports.base_output import BaseOutputTransport
+from pipecat.transports.base_transport import BaseTransport, TransportParams
+
+from audio_buffers import frame_views
+from config import AUDIO_CONFIG, EVENT_HANDLERS, LOOPBACK_CONFIG
+
+
+def load_wav(path: str, sample_rate: int = LOOPBACK_CONFIG["sample_rate"]) -> bytes:
+    """Read a 16-bit mono WAV file recorded at `sample_rate`."""
+    with wave.open(path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path} must be 16-bit mono PCM")
+        if f.getframerate() != sample_rate:
+            raise ValueError(
+                f"{path} is {f.getframerate()} Hz, expected {sample_rate} Hz"
+            )
+        return f.readframes(f.getnframes())
+
+
+def loopback_chunks(
+    audio: bytes, silence: bytes, chunk_bytes: int, *, zero_copy: bool
+) -> Iterator[bytes | memoryview]:
+    """Frames of one playback: the recording, then the silence after it."""
+    if zero_copy:
+        return itertools.chain(
+            frame_views(audio, chunk_bytes), frame_views(silence, chunk_bytes)
+        )
+    audio = audio + silence
+    return (audio[i : i + chunk_bytes] for i in range(0, len(audio), chunk_bytes))
+
+
+class LoopbackInputTransport(BaseInputTransport):
+    """Streams a recording into the pipeline in real time, `turns` times.
+
+    Each playback is followed by `pause_seconds` of silence so the bot can
+    answer. After the last turn the client disconnects. With `zero_copy`,
+    frames are views of the recording and of one shared silence buffer.
+    """
+
+    def __init__(
+        self,
+        transport: "LoopbackTransport",
+        audio: bytes,
+        params: TransportParams,
+        *,
+        turns: int,
+        zero_copy: bool | None = None,
+        **kwargs,
+    ):
+        super().__init__(params, **kwargs)
+        self._transport = transport
+        self._audio = audio
+        self._turns = turns
+        self._zero_copy = AUDIO_CONFIG["zero_copy"] if zero_copy is None else zero_copy
+        self._stream_task = None
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+        self._stream_task = self.create_task(self._stream())
+
+    async def stop(self, frame: EndFrame):
+        await super().stop(frame)
+        await self._stop_streaming()
+
+    async def cancel(self, frame: CancelFrame):
+        await super().cancel(frame)
+        await self._stop_streaming()
+
+    async def _stop_streaming(self):
+        if self._stream_task:
+            await self.cancel_task(self._stream_task)
+            self._stream_task = None
+
+    async def _stream(self):
+        sample_rate = self.sample_rate
+        chunk_bytes = sample_rate * LOOPBACK_CONFIG["chunk_ms"] // 1000 * 2
+        silence = b"\x00" * int(sample_rate * LOOPBACK_CONFIG["pause_seconds"]) * 2
+
+        self._transport.notify_client_connected()
+        next_send = time.monotonic()
+        for _ in range(self._turns):
+            chunks = loopback_chunks(
+                self._audio, silence, chunk_bytes, zero_copy=self._zero_copy
+            )
+            for chunk in chunks:
+                await self.push_audio_frame(
+                    InputAudioRawFrame(
+                        audio=chunk, sample_rate=sample_rate, num_channels=1
+                    )
+                )
+                # Pace against a fixed schedule so delays don't accumulate
+                next_send += len(chunk) / (2 * sample_rate)
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        self._transport.notify_client_disconnected()
+
+
+class LoopbackOutputTransport(BaseOutputTransport):
+    """Discards bot audio, taking as long as real playback would."""
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame):
+        bytes_per_second = 2 * frame.sample_rate * frame.num_channels
+        await asyncio.sleep(len(frame.audio) / bytes_per_second)
+
+
+class LoopbackTransport(BaseTransport):
+    """In-process transport that stands in for `DailyTransport` offline.
+
+    Supports the same event handlers and recording methods that `main()`
+    uses, so the production pipeline can run unchanged against recorded
+    audio.
+    """
+
+    def __init__(
+        self,
+        audio: bytes,
+        params: TransportParams,
+        *,
+        turns: int = 1,
+        client_id: str = "loopback",
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._audio = audio
+        self._params = params
+        self._turns = turns
+        self._client = {"id": client_id}
+        self._input: LoopbackInputTransport | None = None
+        self._output: LoopbackOutputTransport | None = None
+        self._event_tasks: set[asyncio.Task] = set()
+        for event_name in EVENT_HANDLERS.values():
+            self._register_event_handler(event_name)
+
+    def input(self) -> LoopbackInputTransport:
+        if not self._input:
+            self._input = LoopbackInputTransport(
+                self, self._audio, self._params, turns=self._turns
+            )
+        return self._input
+
+    def output(self) -> LoopbackOutputTransport:
+        if not self._output:
+            self._output = LoopbackOutputTransport(self._params)
+        return self._output
+
+    async def start_recording(self):
+        await self._call_event_handler(
+            EVENT_HANDLERS["on_recording_started"], {"streamId": "loopback"}
+        )
+
+    async def stop_recording(self):
+        await self._call_event_handler(
+            EVENT_HANDLERS["on_recording_stopped"], {"streamId": "loopback"}
+        )
+
+    def notify_client_connected(self):
+        self._fire(EVENT_HANDLERS["on_client_connected"], self._client)
+
+    def notify_client_disconnected(self):
+        self._fire(EVENT_HANDLERS["on_client_disconnected"], self._client)
+
+    def _fire(self, event_name: str, *args):
+        # Run handlers outside the input task, since disconnect cancels it
+        task = asyncio.create_task(self._call_event_handler(event_name, *args))
+        self._event_tasks.add(task)
+        task.add_done_callback(self._event_tasks.discard)
@@ -0,0 +1,337 @@
+import asyncio
+import gc
+import json
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from types import CodeType
+
+from pipecat.processors.frame_processor import FrameProcessor
+
+from config import ENV_VARS, PROFILER_CONFIG
+from loop_monitor import EventLoopLagMonitor, rss_bytes
+from structured_logging import log
+
+# Objects processors hand work to, profiled as part of the processor; the
+# VAD runs in a thread pool, outside the processor's own frames
+DELEGATE_ATTRIBUTES = ("vad_analyzer", "turn_analyzer")
+
+# Queues of frames waiting for a processor, and the suffix of their name:
+# every processor's input queue, and the input transport's audio queue
+QUEUE_ATTRIBUTES = {
+    "_FrameProcessor__input_queue": "",
+    "_audio_in_queue": ".audio_in",
+}
+
+
+def should_profile() -> bool:
+    """Pick a new session for profiling with probability PROFILE_SAMPLE_RATE."""
+    try:
+        rate = float(os.getenv(ENV_VARS["PROFILE_SAMPLE_RATE"]) or 0)
+    except ValueError:
+        return False
+    return random.random() < rate
+
+
+def method_codes(cls: type) -> set[CodeType]:
+    """Code objects of the functions defined by `cls` and its bases."""
+    codes = set()
+    for klass in cls.__mro__:
+        for value in vars(klass).values():
+            code = getattr(value, "__code__", None)
+            if isinstance(code, CodeType):
+                codes.add(code)
+    return codes
+
+
+def frame_label(code: CodeType, owner: str | None) -> str:
+    location = f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+    label = f"{code.co_name} ({location})"
+    return f"[{owner}] {label}" if owner else label
+
+
+def allocation_counters() -> dict:
+    return {
+        "allocated_blocks": sys.getallocatedblocks(),
+        "gc_collections": [stats["collections"] for stats in gc.get_stats()],
+    }
+
+
+class StackSampler:
+    """Samples stacks for all profiled sessions, on a process CPU time timer.
+
+    A SIGPROF timer fires after every `interval` seconds of CPU time used by
+    the process, so idle time costs nothing. A sampling thread would only see
+    the event loop where it releases the GIL, mostly in `select()`; the
+    signal handler instead runs on the main thread, where the event loop
+    runs, and sees the code the timer interrupted. It also walks the stacks
+    of the other threads, such as the thread pool running VAD. Each stack
+    goes to the session owning its innermost frame that runs a method of a
+    registered object; only frames whose code belongs to a registered class
+    are checked for `self`, so most frames cost a set lookup.
+
+    The timer must be started from the main thread. Everything, including the
+    handler, runs on that thread, so no locks are needed.
+
+    Attributes:
+        interval: Seconds of CPU time between samples
+        cpu_seconds: Time spent in the signal handler
+    """
+
+    def __init__(
+        self,
+        interval: float = PROFILER_CONFIG["interval"],
+        *,
+        queue_every: int = PROFILER_CONFIG["queue_every"],
+        max_depth: int = PROFILER_CONFIG["max_stack_depth"],
+    ):
+        self.interval = interval
+        self.cpu_seconds = 0.0
+        self._queue_every = queue_every
+        self._max_depth = max_depth
+        self._profilers: set[SessionProfiler] = set()
+        self._owners: dict[int, tuple[SessionProfiler, str]] = {}
+        self._classes: set[type] = set()
+        self._codes: set[CodeType] = set()
+        self._previous_handler = None
+        self._running = False
+        self._ticks = 0
+
+    def add(self, profiler: "SessionProfiler") -> bool:
+        """Start sampling for `profiler`; False if the timer cannot be started."""
+        if not self._running:
+            if threading.current_thread() is not threading.main_thread():
+                return False
+            self._previous_handler = signal.signal(signal.SIGPROF, self._handle)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            self._running = True
+        self._profilers.add(profiler)
+        for obj, name in profiler.owned():
+            self._owners[id(obj)] = (profiler, name)
+            if type(obj) not in self._classes:
+                self._classes.add(type(obj))
+                self._codes |= method_codes(type(obj))
+        return True
+
+    def remove(self, profiler: "SessionProfiler"):
+        self._profilers.discard(profiler)
+        self._owners = {
+            key: owner
+            for key, owner in self._owners.items()
+            if owner[0] is not profiler
+        }
+        if not self._profilers and self._running:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+            self._running = False
+
+    def _handle(self, signum, frame):
+        start = time.perf_counter()
+        elapsed_ms = self.interval * 1000
+        # `frame` is the main thread code the timer interrupted
+        self._sample(frame, elapsed_ms)
+        main = threading.main_thread().ident
+        for thread_id, thread_frame in sys._current_frames().items():
+            if thread_id != main:
+                self._sample(thread_frame, elapsed_ms)
+        self._ticks += 1
+        if self._ticks % self._queue_every == 0:
+            for profiler in list(self._profilers):
+                profiler.sample_queues()
+        self.cpu_seconds += time.perf_counter() - start
+
+    def _sample(self, frame, elapsed_ms: float):
+        codes = self._codes
+        owners = self._owners
+        stack = []
+        owner = None
+        while frame is not None and len(stack) < self._max_depth:
+            code = frame.f_code
+            name = None
+            if code in codes:
+                found = owners.get(id(frame.f_locals.get("self")))
+                if found is not None:
+                    name = found[1]
+                    owner = owner or found
+            stack.append((code, name))
+            frame = frame.f_back
+        if owner is not None:
+            stack.reverse()
+            owner[0].add_sample(tuple(stack), owner[1], elapsed_ms)
+
+
+class SessionProfiler:
+    """Samples where one session's pipeline spends CPU time and memory.
+
+    While running, the shared `StackSampler` attributes stack samples to the
+    session's processors, including work they hand to the thread pool, and
+    reads how many frames wait in each processor's queue. Event loop lag is
+    sampled by an `EventLoopLagMonitor`, and allocation counters are read at
+    the start and the end. `finish()` writes the stacks in the collapsed
+    format read by flamegraph.pl and speedscope, with a JSON summary.
+
+    Allocation counters and loop lag are the process's, so they include other
+    sessions running in it.
+
+    Attributes:
+        session_id: Session being profiled
+        samples: Stack samples attributed to the session
+        cpu_ms: Sampled time per processor, in ms
+    """
+
+    def __init__(
+        self,
+        session_id: str | None,
+        processors: list[FrameProcessor],
+        *,
+        sampler: StackSampler | None = None,
+        directory: str | None = None,
+    ):
+        self.session_id = session_id
+        self.samples = 0
+        self.cpu_ms: dict[str, float] = {}
+        self._processors = processors
+        self._sampler = sampler or get_stack_sampler()
+        self._directory = directory or os.getenv(
+            ENV_VARS["PROFILE_DIR"], PROFILER_CONFIG["directory"]
+        )
+        self._stacks: dict[tuple, int] = {}
+        # Per queue: samples, total depth and maximum depth
+        self._queues: dict[str, list[int]] = {}
+        self._lag = EventLoopLagMonitor(interval=PROFILER_CONFIG["lag_interval"])
+        self._started: float | None = None
+        self._duration = 0.0
+        self._sampler_cpu = 0.0
+        self._counters: dict = {}
+        self._finished = False
+
+    def owned(self) -> list[tuple[object, str]]:
+        """Objects whose frames belong to this session, with processor names."""
+        owned = []
+        for processor in self._processors:
+            owned.append((processor, processor.name))
+            for attribute in DELEGATE_ATTRIBUTES:
+                delegate = getattr(processor, attribute, None)
+                if delegate is not None:
+                    owned.append((delegate, processor.name))
+        return owned
+
+    def start(self):
+        """Start profiling; the first profiler must start on the main thread."""
+        if not self._sampler.add(self):
+            log.warning("profile_unavailable")
+            return
+        self._started = time.perf_counter()
+        self._sampler_cpu = self._sampler.cpu_seconds
+        self._counters = allocation_counters()
+        self._lag.start()
+
+    async def finish(self):
+        """Stop sampling and write the profile; later calls do nothing."""
+        if self._started is None or self._finished:
+            return
+        self._finished = True
+        self._sampler.remove(self)
+        await self._lag.stop()
+        self._duration = time.perf_counter() - self._started
+        self._sampler_cpu = self._sampler.cpu_seconds - self._sampler_cpu
+        start = self._counters
+        end = allocation_counters()
+        self._counters = {
+            "allocated_blocks_growth": (
+                end["allocated_blocks"] - start["allocated_blocks"]
+            ),
+            "gc_collections": [
+                after - before
+                for before, after in zip(
+                    start["gc_collections"], end["gc_collections"], strict=True
+                )
+            ],
+            "rss_mb": rss_bytes() / 2**20,
+        }
+        await self.export()
+
+    def add_sample(self, stack: tuple, name: str, elapsed_ms: float):
+        self.samples += 1
+        self._stacks[stack] = self._stacks.get(stack, 0) + 1
+        self.cpu_ms[name] = self.cpu_ms.get(name, 0.0) + elapsed_ms
+
+    def sample_queues(self):
+        for processor in self._processors:
+            for attribute, suffix in QUEUE_ATTRIBUTES.items():
+                queue = getattr(processor, attribute, None)
+                if queue is None:
+                    continue
+                depth = queue.qsize()
+                stats = self._queues.setdefault(processor.name + suffix, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += depth
+                stats[2] = max(stats[2], depth)
+
+    def folded(self) -> str:
+        """Sampled stacks in collapsed format, one `frame;frame;... count` each."""
+        lines = [
+            ";".join(frame_label(code, owner) for code, owner in stack) + f" {count}"
+            for stack, count in self._stacks.items()
+        ]
+        return "\n".join(sorted(lines)) + "\n"
+
+    def as_dict(self) -> dict:
+        cpu_ms = sorted(self.cpu_ms.items(), key=lambda item: -item[1])
+        duration = self._duration or 1e-9
+        return {
+            "session_id": self.session_id,
+            "duration_seconds": self._duration,
+            "interval_ms": self._sampler.interval * 1000,
+            "samples": self.samples,
+            "sampler_cpu_percent": 100 * self._sampler_cpu / duration,
+            "cpu_ms": dict(cpu_ms),
+            "queue_depth": {
+                name: {"mean": total / count, "max": peak}
+                for name, (count, total, peak) in self._queues.items()
+            },
+            "event_loop_lag_ms": self._lag.histogram.as_dict(),
+            "allocations": self._counters,
+        }
+
+    async def export(self):
+        """Write `<session>.folded` and `<session>.json` to the profile directory.
+
+        The files are formatted and written in a worker thread, off the loop
+        the session's neighbours are still running on.
+        """
+        summary = self.as_dict()
+        try:
+            path = await asyncio.to_thread(self._write, summary)
+        except Exception as e:
+            log.error("profile_export_error", e)
+            return
+        log.info(
+            "profile_written",
+            path,
+            {"samples": self.samples, "cpu_ms": summary["cpu_ms"]},
+        )
+
+    def _write(self, summary: dict) -> str:
+        os.makedirs(self._directory, exist_ok=True)
+        name = self.session_id or time.strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(self._directory, name)
+        with open(f"{path}.folded", "w") as f:
+            f.write(self.folded())
+        with open(f"{path}.json", "w") as f:
+            json.dump(summary, f)
+        return path
+
+
+_stack_sampler: StackSampler | None = None
+
+
+def get_stack_sampler() -> StackSampler:
+    """Return the process-wide stack sampler, creating it on first use."""
+    global _stack_sampler
+    if _stack_sampler is None:
+        _stack_sampler = StackSampler()
+    return _stack_sampler
@@ -0,0 +1,89 @@
+from typing import Any
+
+from config import SYSTEM_MESSAGES
+from structured_logging import log
+
+
+def build_context_messages(user_context: str | None = None) -> list[dict]:
+    """Build the initial LLM messages with a cache-friendly layout.
+
+    Provider prompt caching matches on an exact prefix, so the static system
+    prompt is sent byte-identical for every session and any per-session data
+    follows it in its own message. Together with the fixed tool schema this
+    forms a prefix shared by all calls.
+    """
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_MESSAGES["initial_system_prompt"],
+        },
+    ]
+    if user_context:
+        messages.append(
+            {
+                "role": "system",
+                "content": SYSTEM_MESSAGES["user_context"].format(user_context),
+            }
+        )
+    return messages
+
+
+class PromptCacheStats:
+    """Accumulates prompt-cache usage reported by the provider for a session.
+
+    Attributes:
+        requests: Number of completions with usage reported
+        cache_hits: Completions that read at least one cached prompt token
+        prompt_tokens: Total prompt tokens
+        cached_tokens: Total prompt tokens served from the provider cache
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage: Any):
+        """Record the `usage` block of an OpenAI chat completion."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        prompt = usage.prompt_tokens or 0
+
+        self.requests += 1
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        if cached:
+            self.cache_hits += 1
+        log.debug("prompt_cache_usage", cached, prompt)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "hit_rate": self.cache_hits / self.requests if self.requests else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+        }
+
+
+class UsageTapStream:
+    """Wraps a chat completion stream to record usage from its final chunk."""
+
+    def __init__(self, stream, stats: PromptCacheStats):
+        self._stream = stream
+        self._iterator = None
+        self._stats = stats
+
+    def __aiter__(self):
+        self._iterator = self._stream.__aiter__()
+        return self
+
+    async def __anext__(self):
+        chunk = await self._iterator.__anext__()
+        if getattr(chunk, "usage", None):
+            self._stats.record(chunk.usage)
+        return chunk
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import statistics
+import time
+from collections import deque
+
+from pipecat.frames.frames import (
+    ErrorFrame,
+    Frame,
+    MetricsFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.metrics.metrics import TTFBMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from config import ENV_VARS, PROVIDERS_CONFIG, ROUTING_CONFIG
+from structured_logging import log
+
+STAGES = ("stt", "llm", "tts")
+
+
+class ProviderHealth:
+    """Rolling TTFB and error rate of one provider.
+
+    Attributes:
+        name: Provider name from `PROVIDERS_CONFIG`
+        expected_ttfb: TTFB assumed until enough samples are recorded
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        expected_ttfb: float = ROUTING_CONFIG["default_expected_ttfb"],
+        window: int = ROUTING_CONFIG["window"],
+    ):
+        self.name = name
+        self.expected_ttfb = expected_ttfb
+        self._ttfbs: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._unhealthy_until = 0.0
+
+    @property
+    def ttfb(self) -> float:
+        """Median recent TTFB in seconds."""
+        if len(self._ttfbs) < ROUTING_CONFIG["min_samples"]:
+            return self.expected_ttfb
+        return statistics.median(self._ttfbs)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self._unhealthy_until
+
+    def record_success(self, ttfb: float):
+        self._ttfbs.append(ttfb)
+        self._outcomes.append(True)
+
+    def record_error(self):
+        self._outcomes.append(False)
+        if (
+            len(self._outcomes) >= ROUTING_CONFIG["min_samples"]
+            and self.error_rate > ROUTING_CONFIG["max_error_rate"]
+            and self.healthy
+        ):
+            log.warning("provider_unhealthy", self.name, self.error_rate)
+            self._unhealthy_until = time.monotonic() + ROUTING_CONFIG["cooldown"]
+            # Start over after the cooldown so old errors don't keep it out
+            self._outcomes.clear()
+
+    def as_dict(self) -> dict:
+        return {
+            "ttfb": self.ttfb,
+            "samples": len(self._ttfbs),
+            "error_rate": self.error_rate,
+            "healthy": self.healthy,
+        }
+
+
+class ProviderRegistry:
+    """Providers configured for each stage, with their recent health.
+
+    Providers in their error cooldown always come last, so a stage with
+    every provider failing still gets one to try. Providers marked
+    "downgrade" are left out unless `downgrade` is set, which defaults to
+    LLM_DOWNGRADE_FAILOVER.
+    """
+
+    def __init__(
+        self,
+        providers: dict[str, list[dict]] = PROVIDERS_CONFIG,
+        *,
+        downgrade: bool | None = None,
+    ):
+        if downgrade is None:
+            downgrade = bool(os.getenv(ENV_VARS["LLM_DOWNGRADE_FAILOVER"]))
+        self._providers = {
+            stage: [
+                spec
+                for spec in providers.get(stage, [])
+                if downgrade or not spec.get("downgrade")
+            ]
+            for stage in STAGES
+        }
+        self._health = {
+            spec["name"]: ProviderHealth(
+                spec["name"],
+                expected_ttfb=spec.get(
+                    "expected_ttfb", ROUTING_CONFIG["default_expected_ttfb"]
+                ),
+            )
+            for specs in self._providers.values()
+            for spec in specs
+        }
+
+    def providers(self, stage: str) -> list[dict]:
+        return self._providers[stage]
+
+    def health(self, name: str) -> ProviderHealth:
+        return self._health[name]
+
+    def ranked(self, stage: str) -> list[dict]:
+        """Return the stage's providers, healthy ones by median TTFB."""
+
+        def key(spec: dict):
+            health = self._health[spec["name"]]
+            return (not health.healthy, health.ttfb)
+
+        return sorted(self._providers[stage], key=key)
+
+    def in_order(self, stage: str) -> list[dict]:
+        """Return the stage's providers as configured, cooling-down ones last.
+
+        For providers that are not interchangeable, such as LLMs serving
+        different models, whose TTFBs should not decide between them.
+        """
+        return sorted(
+            self._providers[stage],
+            key=lambda spec: not self.health(spec["name"]).healthy,
+        )
+
+    def choose(self, stage: str) -> dict:
+        """Return the best provider for a new session."""
+        providers = self.ranked(stage)
+        if not providers:
+            raise ValueError(f"No {stage} providers configured")
+        log.debug("provider_selected", stage, providers[0]["name"])
+        return providers[0]
+
+    def record_success(self, name: str, ttfb: float):
+        self._health[name].record_success(ttfb)
+
+    def record_error(self, name: str):
+        self._health[name].record_error()
+
+    def stats(self) -> dict:
+        return {
+            stage: {
+                spec["name"]: self._health[spec["name"]].as_dict() for spec in specs
+            }
+            for stage, specs in self._providers.items()
+        }
+
+
+class ProviderHealthProbe(FrameProcessor):
+    """Feeds one STT or TTS service's TTFB, stalls and errors to the registry.
+
+    Place directly after the service. TTFB comes from the service's own
+    metrics frames. Errors are the ones the service reports with
+    `push_error()`: those go upstream, away from the probe, and `ErrorFrame`s
+    that do pass through it may come from any processor, so the probe wraps
+    the service's `push_error()` instead. A TTS response with no audio
+    within `tts_stall_timeout` of `TTSStartedFrame` counts as an error.
+    """
+
+    def __init__(self, registry: ProviderRegistry, provider: str, service, **kwargs):
+        super().__init__(**kwargs)
+        self._registry = registry
+        self._provider = provider
+        self._service = service
+        self._stall_task: asyncio.Task | None = None
+        self._push_error = service.push_error
+        service.push_error = self._record_service_error
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, MetricsFrame):
+            for data in frame.data:
+                if (
+                    isinstance(data, TTFBMetricsData)
+                    and data.processor == self._service.name
+                    and data.value > 0
+                ):
+                    self._registry.record_success(self._provider, data.value)
+        elif isinstance(frame, TTSStartedFrame):
+            await self._cancel_stall_timer()
+            self._stall_task = self.create_task(self._stall_timer())
+        elif isinstance(frame, (TTSAudioRawFrame, TTSStoppedFrame)):
+            await self._cancel_stall_timer()
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        await self._cancel_stall_timer()
+
+    async def _record_service_error(self, error: ErrorFrame):
+        self._registry.record_error(self._provider)
+        await self._push_error(error)
+
+    async def _stall_timer(self):
+        await asyncio.sleep(ROUTING_CONFIG["tts_stall_timeout"])
+        self._stall_task = None
+        self._registry.record_error(self._provider)
+
+    async def _cancel_stall_timer(self):
+        if self._stall_task:
+            await self.cancel_task(self._stall_task)
+            self._stall_task = None
+
+
+_provider_registry: ProviderRegistry | None = None
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Return the process-wide provider registry, creating it on first use."""
+    global _provider_registry
+    if _provider_registry is None:
+        _provider_registry = ProviderRegistry()
+    return _provider_registry
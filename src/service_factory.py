@@ -0,0 +1,672 @@
+import asyncio
+import json
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pipecat.frames.frames import StartInterruptionFrame
+from pipecat.services.cartesia.tts import CartesiaTTSService
+from pipecat.services.deepgram.stt import DeepgramSTTService
+from pipecat.services.openai.llm import OpenAILLMService
+from websockets.asyncio.client import connect as websocket_connect
+from websockets.protocol import State
+
+from config import (
+    ENV_VARS,
+    ROUTING_CONFIG,
+    SERVICE_POOL_CONFIG,
+)
+from context_compactor import OpenAIContextSummarizer
+from prompt_cache import PromptCacheStats, UsageTapStream
+from provider_registry import ProviderRegistry, get_provider_registry
+from structured_logging import log
+from tts_chunking import create_text_aggregator
+
+CARTESIA_WS_URL = "wss://api.cartesia.ai/tts/websocket"
+CARTESIA_VERSION = "2024-11-13"
+
+
+class ConnectionPool:
+    """Keeps pre-opened connections for one provider between sessions.
+
+    Connections are handed out newest first and returned after a session ends.
+    Anything closed by the provider or older than `ttl` is dropped rather than
+    reused, and the pool is topped back up in the background after each
+    acquire so the next session does not pay the handshake.
+
+    Attributes:
+        name: Provider name used in logs and stats
+        max_idle: Maximum number of idle connections kept open
+        ttl: Maximum age in seconds of an idle connection
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Awaitable[Any]],
+        *,
+        is_open: Callable[[Any], bool],
+        close: Callable[[Any], Awaitable[None]],
+        max_idle: int,
+        ttl: float,
+    ):
+        self.name = name
+        self.max_idle = max_idle
+        self.ttl = ttl
+        self._connect = connect
+        self._is_open = is_open
+        self._close = close
+        self._idle: list[tuple[float, Any]] = []
+        self._refill_task: asyncio.Task | None = None
+        self._close_tasks: set[asyncio.Task] = set()
+        self._hits = 0
+        self._misses = 0
+
+    async def warm(self):
+        """Open connections until `max_idle` are available."""
+        self._drop_stale()
+        missing = self.max_idle - len(self._idle)
+        if missing <= 0:
+            return
+        results = await asyncio.gather(
+            *(self._connect() for _ in range(missing)), return_exceptions=True
+        )
+        now = time.monotonic()
+        for result in results:
+            if isinstance(result, Exception):
+                log.warning("service_pool_connect_error", self.name, result)
+            else:
+                self._idle.append((now, result))
+        log.debug("service_pool_warmed", self.name, len(self._idle))
+
+    async def acquire(self) -> Any:
+        """Return an open connection, opening a new one if none are idle."""
+        self._drop_stale()
+        if self._idle:
+            _, conn = self._idle.pop()
+            self._hits += 1
+        else:
+            conn = await self._connect()
+            self._misses += 1
+        self._schedule_refill()
+        return conn
+
+    async def release(self, conn: Any):
+        """Return a connection to the pool, closing it if the pool is full."""
+        if self._is_open(conn) and len(self._idle) < self.max_idle:
+            self._idle.append((time.monotonic(), conn))
+            return
+        try:
+            await self._close(conn)
+        except Exception as e:
+            log.warning("service_pool_release_error", self.name, e)
+
+    async def close(self):
+        """Close every idle connection and stop background refills."""
+        if self._refill_task:
+            self._refill_task.cancel()
+            self._refill_task = None
+        idle, self._idle = self._idle, []
+        for _, conn in idle:
+            try:
+                await self._close(conn)
+            except Exception as e:
+                log.warning("service_pool_release_error", self.name, e)
+
+    def stats(self) -> dict:
+        return {"idle": len(self._idle), "hits": self._hits, "misses": self._misses}
+
+    def _drop_stale(self):
+        now = time.monotonic()
+        fresh = []
+        for opened, conn in self._idle:
+            if self._is_open(conn) and now - opened < self.ttl:
+                fresh.append((opened, conn))
+            else:
+                task = asyncio.create_task(self._close(conn))
+                self._close_tasks.add(task)
+                task.add_done_callback(self._close_tasks.discard)
+        self._idle = fresh
+
+    def _schedule_refill(self):
+        if self._refill_task and not self._refill_task.done():
+            return
+        self._refill_task = asyncio.create_task(self.warm())
+
+
+class LocalConnection:
+    """In-process stand-in for a provider websocket, used to run offline."""
+
+    def __init__(self):
+        self.state = State.OPEN
+        self.sent: list[Any] = []
+
+    async def send(self, message: Any):
+        self.sent.append(message)
+
+    async def close(self):
+        self.state = State.CLOSED
+
+
+def _websocket_is_open(conn: Any) -> bool:
+    return conn.state is State.OPEN
+
+
+async def _close_websocket(conn: Any):
+    await conn.close()
+
+
+def create_local_pool(name: str = "local", *, max_idle: int = 2) -> ConnectionPool:
+    """Create a pool of `LocalConnection`s that never touches the network."""
+
+    async def connect():
+        return LocalConnection()
+
+    return ConnectionPool(
+        name,
+        connect,
+        is_open=_websocket_is_open,
+        close=_close_websocket,
+        max_idle=max_idle,
+        ttl=SERVICE_POOL_CONFIG["connection_ttl"],
+    )
+
+
+def create_cartesia_pool(api_key: str | None) -> ConnectionPool:
+    """Create a pool of Cartesia TTS websockets."""
+
+    async def connect():
+        return await websocket_connect(
+            f"{CARTESIA_WS_URL}?api_key={api_key}&cartesia_version={CARTESIA_VERSION}"
+        )
+
+    return ConnectionPool(
+        "cartesia",
+        connect,
+        is_open=_websocket_is_open,
+        close=_close_websocket,
+        max_idle=SERVICE_POOL_CONFIG["tts_idle_connections"],
+        ttl=SERVICE_POOL_CONFIG["connection_ttl"],
+    )
+
+
+class PooledCartesiaTTSService(CartesiaTTSService):
+    """Cartesia TTS that takes its websocket from a `ConnectionPool`.
+
+    Instead of closing the websocket when the pipeline stops, any in-flight
+    context is cancelled and the connection goes back to the pool. Responses
+    for the cancelled context are ignored by the next session because they
+    carry a context id it never created.
+    """
+
+    def __init__(self, *, pool: ConnectionPool, **kwargs):
+        super().__init__(
+            url=CARTESIA_WS_URL, cartesia_version=CARTESIA_VERSION, **kwargs
+        )
+        self._pool = pool
+
+    async def _connect_websocket(self):
+        if self._websocket and self._websocket.state is State.OPEN:
+            return
+        try:
+            self._websocket = await self._pool.acquire()
+        except Exception as e:
+            log.warning("service_pool_connect_error", "cartesia", e)
+            await super()._connect_websocket()
+
+    async def release_connection(self):
+        """Return the websocket to the pool, if the service still holds it.
+
+        `stop()` and `cancel()` already do this once the task reading from the
+        websocket has been cancelled; this covers a pipeline that ended
+        without either, such as one that failed before starting. Call it only
+        after the pipeline has finished.
+        """
+        await self._disconnect()
+
+    async def _disconnect_websocket(self):
+        websocket = self._websocket
+        try:
+            await self.stop_all_metrics()
+            if websocket and websocket.state is State.OPEN and self._context_id:
+                await websocket.send(
+                    json.dumps({"context_id": self._context_id, "cancel": True})
+                )
+            if websocket:
+                await self._pool.release(websocket)
+        except Exception as e:
+            log.warning("service_pool_release_error", "cartesia", e)
+        finally:
+            self._context_id = None
+            self._websocket = None
+
+
+class LLMRoute:
+    """One OpenAI-compatible provider an LLM request can be sent to.
+
+    Attributes:
+        name: Provider name in the registry, or None to skip health tracking
+        client: Client for the provider's API
+        model: Model to request
+        options: Remaining provider settings from `PROVIDERS_CONFIG`
+    """
+
+    def __init__(
+        self,
+        name: str | None,
+        client: AsyncOpenAI | None,
+        model: str,
+        options: dict | None = None,
+    ):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.options = options or {}
+
+
+class PrimedStream:
+    """A completion stream whose first chunk has already been read."""
+
+    def __init__(self, stream, iterator, first):
+        self._stream = stream
+        self._iterator = iterator
+        self._first = first
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._first is not None:
+            chunk, self._first = self._first, None
+            return chunk
+        return await self._iterator.__anext__()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class PooledOpenAILLMService(OpenAILLMService):
+    """OpenAI LLM service that reuses a process-wide `AsyncOpenAI` client.
+
+    Sharing the client shares its httpx connection pool, so new sessions
+    reuse keep-alive TLS connections instead of opening their own. Usage from
+    each streamed completion is recorded in `cache_stats`. When `speculation`
+    is set, a matching speculative completion is used instead of a new
+    request. When `interruptions` is set, an interruption closes the
+    completion stream instead of leaving the provider generating.
+
+    With several `routes`, each request goes to the first one not in its
+    error cooldown in `registry`, so the configured primary keeps its traffic
+    while it is healthy. If that provider fails before its first token, or
+    does not accept the request within `llm_stall_timeout`, the request is
+    retried on the next one.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: AsyncOpenAI,
+        routes: list[LLMRoute] | None = None,
+        registry: ProviderRegistry | None = None,
+        **kwargs,
+    ):
+        self._shared_client = client
+        self.cache_stats = PromptCacheStats()
+        self.speculation = None
+        self.interruptions = None
+        super().__init__(**kwargs)
+        self._routes = routes or [LLMRoute(None, client, self.model_name)]
+        self._registry = registry
+
+    def create_client(self, api_key=None, base_url=None, **kwargs):
+        return self._shared_client
+
+    async def open_chat_completions(self, context, messages):
+        """Open a completion stream without consulting the speculation."""
+        routes = self._ordered_routes()
+        for i, route in enumerate(routes):
+            is_last = i == len(routes) - 1
+            start = time.monotonic()
+            try:
+                # The last provider gets as long as it needs
+                stream = await self._open_primed(
+                    route,
+                    context,
+                    messages,
+                    None if is_last else ROUTING_CONFIG["llm_stall_timeout"],
+                )
+            except Exception as e:
+                self._record_error(route)
+                if is_last:
+                    raise
+                error = "stalled" if isinstance(e, asyncio.TimeoutError) else e
+                log.warning(
+                    "provider_failover",
+                    route.name,
+                    error,
+                    routes[i + 1].name,
+                )
+                continue
+            if self._registry and route.name:
+                self._registry.record_success(route.name, time.monotonic() - start)
+            return stream
+
+    async def open_speculation(self, context, messages):
+        """Open a speculative completion on the first provider in order.
+
+        Unlike `open_chat_completions()`, this neither fails over nor records
+        provider health. Speculations are cancelled whenever the user ends up
+        saying something else, which says nothing about the provider.
+        """
+        return await self.open_route(self._ordered_routes()[0], context, messages)
+
+    async def open_route(self, route: LLMRoute, context, messages):
+        """Open a completion stream on one provider.
+
+        Builds the same request as pipecat's `get_chat_completions()`, but
+        with the route's client and model, so the service's own are left
+        alone for concurrent and speculative requests.
+        """
+        settings = self._settings
+        params = {
+            "model": route.model,
+            "stream": True,
+            "messages": messages,
+            "tools": context.tools,
+            "tool_choice": context.tool_choice,
+            "stream_options": {"include_usage": True},
+            "frequency_penalty": settings["frequency_penalty"],
+            "presence_penalty": settings["presence_penalty"],
+            "seed": settings["seed"],
+            "temperature": settings["temperature"],
+            "top_p": settings["top_p"],
+            "max_tokens": settings["max_tokens"],
+            "max_completion_tokens": settings["max_completion_tokens"],
+            **settings["extra"],
+        }
+        return await route.client.chat.completions.create(**params)
+
+    async def _open_primed(
+        self, route: LLMRoute, context, messages, timeout: float | None
+    ):
+        stream = await asyncio.wait_for(
+            self.open_route(route, context, messages), timeout
+        )
+        iterator = stream.__aiter__()
+        try:
+            first = await iterator.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await stream.close()
+            raise
+        return PrimedStream(stream, iterator, first)
+
+    def _ordered_routes(self) -> list[LLMRoute]:
+        if not self._registry or len(self._routes) == 1:
+            return self._routes
+        order = [spec["name"] for spec in self._registry.in_order("llm")]
+        return sorted(
+            self._routes,
+            key=lambda r: order.index(r.name) if r.name in order else len(order),
+        )
+
+    def _record_error(self, route: LLMRoute):
+        if self._registry and route.name:
+            self._registry.record_error(route.name)
+
+    async def get_chat_completions(self, context, messages):
+        if self.interruptions:
+            self.interruptions.truncate(messages)
+        stream = None
+        if self.speculation:
+            stream = await self.speculation.take(messages)
+        if stream is None:
+            stream = await self.open_chat_completions(context, messages)
+        if self.interruptions:
+            stream = self.interruptions.track(stream)
+        return UsageTapStream(stream, self.cache_stats)
+
+    async def process_frame(self, frame, direction):
+        interrupted = self.interruptions and isinstance(frame, StartInterruptionFrame)
+        if interrupted:
+            self.interruptions.on_interruption()
+        # Cancels the task reading the response and pushes the frame on
+        await super().process_frame(frame, direction)
+        if interrupted:
+            await self.interruptions.close_streams()
+
+
+class SessionServices:
+    """STT, LLM and TTS services handed to a single session.
+
+    Attributes:
+        summarizer: Summarizes older turns for the context compactor
+        factory: Factory owning the services' pooled connections, if any;
+            they must be released to it once the session's pipeline ends
+        providers: Registry provider name used for each stage, if any
+        registry: Registry that tracks those providers' health
+        tts_voice: Cartesia (model, voice_id) of the TTS, for cached phrases;
+            None when the TTS is not Cartesia
+    """
+
+    def __init__(
+        self,
+        stt,
+        llm,
+        tts,
+        *,
+        summarizer=None,
+        factory: "ServiceFactory | None" = None,
+        providers: dict[str, str] | None = None,
+        registry: ProviderRegistry | None = None,
+        tts_voice: tuple[str, str] | None = None,
+    ):
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.summarizer = summarizer
+        self.factory = factory
+        self.providers = providers or {}
+        self.registry = registry
+        self.tts_voice = tts_voice
+
+
+class ServiceFactory:
+    """Builds per-session services on top of warm, process-wide connections.
+
+    Providers come from a `ProviderRegistry`: each session gets the fastest
+    healthy STT and TTS provider, and an LLM service that can fail over
+    between every LLM provider. The OpenAI HTTP clients and the Cartesia
+    websocket pool outlive sessions. Deepgram's live-transcription socket is
+    negotiated with per-stream options, so STT services are still created
+    fresh for each session.
+    """
+
+    def __init__(
+        self,
+        *,
+        tts_pool: ConnectionPool | None = None,
+        registry: ProviderRegistry | None = None,
+    ):
+        self.registry = registry or get_provider_registry()
+        self._tts_pool = tts_pool
+        self._llm_clients: dict[tuple[str | None, str], AsyncOpenAI] = {}
+        self._warmed = False
+        self._active_sessions = 0
+
+    @property
+    def tts_pool(self) -> ConnectionPool:
+        if self._tts_pool is None:
+            self._tts_pool = create_cartesia_pool(
+                os.getenv(ENV_VARS["CARTESIA_API_KEY"])
+            )
+        return self._tts_pool
+
+    @property
+    def llm_client(self) -> AsyncOpenAI:
+        """Client for the default OpenAI endpoint."""
+        return self._llm_client_for({})
+
+    def _llm_client_for(self, spec: dict) -> AsyncOpenAI:
+        key = (
+            spec.get("base_url"),
+            spec.get("api_key_env", ENV_VARS["OPENAI_API_KEY"]),
+        )
+        if key not in self._llm_clients:
+            base_url, api_key_env = key
+            self._llm_clients[key] = AsyncOpenAI(
+                api_key=os.getenv(api_key_env),
+                base_url=base_url,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=SERVICE_POOL_CONFIG[
+                            "llm_max_keepalive_connections"
+                        ],
+                        max_connections=SERVICE_POOL_CONFIG["llm_max_connections"],
+                        keepalive_expiry=None,
+                    )
+                ),
+            )
+        return self._llm_clients[key]
+
+    async def warm(self):
+        """Open TTS websockets and LLM HTTP connections ahead of a session."""
+        if self._warmed:
+            return
+        self._warmed = True
+        warmups = [self._warm_llm(spec) for spec in self._specs("llm", "openai")]
+        if self._specs("tts", "cartesia"):
+            warmups.append(self.tts_pool.warm())
+        await asyncio.gather(*warmups)
+
+    async def _warm_llm(self, spec: dict):
+        try:
+            await self._llm_client_for(spec).models.list()
+        except Exception as e:
+            log.warning("service_llm_warm_error", e)
+
+    def _specs(self, stage: str, kind: str) -> list[dict]:
+        return [s for s in self.registry.providers(stage) if s["kind"] == kind]
+
+    def create_session_services(self) -> SessionServices:
+        """Create the services for one session."""
+        self._active_sessions += 1
+
+        stt_spec = self.registry.choose("stt")
+        tts_spec = self.registry.choose("tts")
+        llm = self._create_llm(self.registry.providers("llm"))
+        if self._specs("llm", "openai"):
+            summarizer = OpenAIContextSummarizer(self.llm_client)
+        else:
+            from stub_services import stub_summarizer as summarizer
+        return SessionServices(
+            self._create_stt(stt_spec),
+            llm,
+            self._create_tts(tts_spec),
+            summarizer=summarizer,
+            factory=self,
+            providers={
+                "stt": stt_spec["name"],
+                "llm": self.registry.in_order("llm")[0]["name"],
+                "tts": tts_spec["name"],
+            },
+            registry=self.registry,
+            tts_voice=_cartesia_voice(tts_spec),
+        )
+
+    def tts_voices(self) -> list[tuple[str, str]]:
+        """Cartesia (model, voice_id) of every TTS provider, for cached phrases."""
+        return [_cartesia_voice(spec) for spec in self._specs("tts", "cartesia")]
+
+    def _create_stt(self, spec: dict):
+        if spec["kind"] == "stub":
+            from stub_services import StubSTTService
+
+            return StubSTTService(**_stub_options(spec))
+        return DeepgramSTTService(
+            api_key=os.getenv(spec.get("api_key_env", ENV_VARS["DEEPGRAM_API_KEY"])),
+        )
+
+    def _create_tts(self, spec: dict):
+        if spec["kind"] == "stub":
+            from stub_services import StubTTSService
+
+            return StubTTSService(
+                text_aggregator=create_text_aggregator(), **_stub_options(spec)
+            )
+        return PooledCartesiaTTSService(
+            pool=self.tts_pool,
+            api_key=os.getenv(ENV_VARS["CARTESIA_API_KEY"]),
+            voice_id=spec["voice_id"],
+            model=spec["model"],
+            text_aggregator=create_text_aggregator(),
+        )
+
+    def _create_llm(self, specs: list[dict]) -> PooledOpenAILLMService:
+        # Routes are all OpenAI-compatible or all stubs
+        if all(spec["kind"] == "stub" for spec in specs):
+            from stub_services import StubOpenAILLMService
+
+            routes = [
+                LLMRoute(spec["name"], None, "stub", _stub_options(spec))
+                for spec in specs
+            ]
+            return StubOpenAILLMService(routes=routes, registry=self.registry)
+
+        routes = [
+            LLMRoute(spec["name"], self._llm_client_for(spec), spec["model"])
+            for spec in specs
+        ]
+        return PooledOpenAILLMService(
+            client=routes[0].client,
+            routes=routes,
+            registry=self.registry,
+            api_key=os.getenv(ENV_VARS["OPENAI_API_KEY"]),
+            model=routes[0].model,
+        )
+
+    async def release(self, services: SessionServices):
+        """Reclaim pooled connections once a session's pipeline has finished.
+
+        Must run after the pipeline runner has returned, so the services'
+        own stop or cancel has already stopped reading from the connections.
+        """
+        self._active_sessions = max(0, self._active_sessions - 1)
+        if isinstance(services.tts, PooledCartesiaTTSService):
+            await services.tts.release_connection()
+        log.info("prompt_cache_stats", services.llm.cache_stats.as_dict())
+        log.debug("service_pool_stats", self.stats())
+        log.debug("provider_stats", self.registry.stats())
+
+    def stats(self) -> dict:
+        stats = {"active_sessions": self._active_sessions}
+        if self._tts_pool is not None:
+            stats["tts"] = self._tts_pool.stats()
+        return stats
+
+
+def _cartesia_voice(spec: dict) -> tuple[str, str] | None:
+    if spec["kind"] != "cartesia":
+        return None
+    return (spec["model"], spec["voice_id"])
+
+
+def _stub_options(spec: dict) -> dict:
+    """Timing overrides for a stub provider, e.g. `ttfb`."""
+    routing_keys = ("name", "kind", "model", "expected_ttfb")
+    return {k: v for k, v in spec.items() if k not in routing_keys}
+
+
+_service_factory: ServiceFactory | None = None
+
+
+def get_service_factory() -> ServiceFactory:
+    """Return the process-wide service factory, creating it on first use."""
+    global _service_factory
+    if _service_factory is None:
+        _service_factory = ServiceFactory()
+    return _service_factory
@@ -0,0 +1,328 @@
+"""Supervisor mode: shard bot sessions across one worker process per core.
+
+Run with `python src/session_supervisor.py`. It serves the same HTTP API as
+`session_worker.py` and forwards each session to the least-loaded worker.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+from multiprocessing.connection import Connection
+
+from pipecatcloud.agent import DailySessionArguments
+
+from config import ENV_VARS, SUPERVISOR_CONFIG, WORKER_CONFIG
+from session_worker import SessionWorker, serve
+from structured_logging import log
+
+# Workers fork from a server that has already imported the bot and, with
+# WARMUP_ON_IMPORT set, loaded the Silero sessions, so every worker shares
+# those pages copy-on-write instead of importing and loading them again. The
+# server itself never runs an event loop or opens provider connections, so
+# children start from a clean state.
+_mp = multiprocessing.get_context("forkserver")
+_mp.set_forkserver_preload(["bot"])
+
+
+class WorkerHandle:
+    """Supervisor-side view of one worker process.
+
+    Attributes:
+        index: Slot number, kept when the worker is replaced
+        process: The worker process
+        conn: Supervisor end of the pipe to the worker
+        load: Latest stats reported by the worker
+        accepting: Whether the worker's last report allowed new sessions
+    """
+
+    def __init__(self, index: int, process, conn: Connection):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.load: dict = {}
+        self.accepting = False
+        self.pending: dict[str, asyncio.Future] = {}
+        self.assigned = 0
+
+    @property
+    def running(self) -> int:
+        # Sessions routed since the last report are counted so a burst of
+        # requests is spread out instead of all landing on one worker
+        return self.load.get("running", 0) + self.assigned
+
+
+class SessionSupervisor:
+    """Routes sessions to worker processes and replaces ones that crash.
+
+    Each worker runs a `SessionWorker` on its own event loop, so VAD inference
+    and audio processing in one worker never hold the GIL for another. A
+    crashed worker loses only its own calls and is restarted after
+    `restart_delay`.
+
+    Attributes:
+        draining: Whether the supervisor has stopped admitting sessions
+    """
+
+    def __init__(self, workers: int | None = None):
+        if workers is None:
+            workers = int(
+                os.getenv(ENV_VARS["SUPERVISOR_WORKERS"], 0)
+                or SUPERVISOR_CONFIG["workers"]
+                or os.cpu_count()
+                or 1
+            )
+        self.draining = False
+        self._size = workers
+        self._workers: dict[int, WorkerHandle] = {}
+        self._exited: dict[int, asyncio.Event] = {}
+        self._restarts = 0
+        self._restart_tasks: set[asyncio.Task] = set()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def start(self):
+        for index in range(self._size):
+            self._spawn(index)
+
+    def admission_error(self) -> str | None:
+        """Return why a new session would be refused, or None."""
+        if self.draining:
+            return "draining"
+        if not any(w.accepting for w in self._workers.values()):
+            return "no worker is accepting sessions"
+        return None
+
+    async def submit(self, args: DailySessionArguments) -> str | None:
+        """Start a session on the least-loaded worker.
+
+        Workers are tried in order of load until one accepts. Returns the
+        last refusal reason if none did.
+        """
+        error = self.admission_error()
+        if error is not None:
+            return error
+        candidates = sorted(
+            (w for w in self._workers.values() if w.accepting),
+            key=lambda w: (w.running, w.load.get("loop_lag_ms", 0.0)),
+        )
+        for handle in candidates:
+            error = await self._start_on(handle, args)
+            if error is None:
+                log.info("supervisor_routed", args.session_id, handle.index)
+                return None
+        return error
+
+    async def drain(self, timeout: float = WORKER_CONFIG["drain_timeout"]):
+        """Drain every worker, then stop them."""
+        self.draining = True
+        for task in self._restart_tasks:
+            task.cancel()
+        for handle in self._workers.values():
+            self._send(handle, ("drain",))
+
+        exits = [event.wait() for event in self._exited.values()]
+        try:
+            # Workers cancel their own sessions at `timeout`; allow time to
+            # clean up before killing them
+            await asyncio.wait_for(asyncio.gather(*exits), timeout + 10)
+        except asyncio.TimeoutError:
+            for handle in list(self._workers.values()):
+                handle.process.kill()
+            await asyncio.gather(*exits)
+
+    def stats(self) -> dict:
+        return {
+            "workers": {
+                handle.index: {
+                    "pid": handle.process.pid,
+                    "accepting": handle.accepting,
+                    **handle.load,
+                }
+                for handle in self._workers.values()
+            },
+            "running": sum(w.load.get("running", 0) for w in self._workers.values()),
+            "restarts": self._restarts,
+            "draining": self.draining,
+        }
+
+    def _spawn(self, index: int):
+        conn, child_conn = _mp.Pipe()
+        process = _mp.Process(
+            target=_worker_process,
+            args=(child_conn,),
+            name=f"session-worker-{index}",
+        )
+        process.start()
+        child_conn.close()
+
+        handle = WorkerHandle(index, process, conn)
+        self._workers[index] = handle
+        self._exited[index] = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_reader(conn.fileno(), self._on_message, handle)
+        loop.add_reader(process.sentinel, self._on_exit, handle)
+        log.info("supervisor_worker_started", index, process.pid)
+
+    async def _start_on(
+        self, handle: WorkerHandle, args: DailySessionArguments
+    ) -> str | None:
+        future = asyncio.get_running_loop().create_future()
+        handle.pending[args.session_id] = future
+        handle.assigned += 1
+        payload = {
+            "session_id": args.session_id,
+            "room_url": args.room_url,
+            "token": args.token,
+            "body": args.body,
+        }
+        try:
+            if not self._send(handle, ("start", payload)):
+                return "worker unavailable"
+            return await asyncio.wait_for(future, SUPERVISOR_CONFIG["start_timeout"])
+        except asyncio.TimeoutError:
+            return "worker did not respond"
+        finally:
+            handle.pending.pop(args.session_id, None)
+
+    def _send(self, handle: WorkerHandle, message: tuple) -> bool:
+        try:
+            handle.conn.send(message)
+            return True
+        except OSError:
+            return False
+
+    def _on_message(self, handle: WorkerHandle):
+        try:
+            message = handle.conn.recv()
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(handle.conn.fileno())
+            return
+
+        kind = message[0]
+        if kind == "load":
+            _, handle.load, handle.accepting = message
+            handle.assigned = 0
+        elif kind == "started":
+            _, session_id, error = message
+            future = handle.pending.get(session_id)
+            if future and not future.done():
+                future.set_result(error)
+
+    def _on_exit(self, handle: WorkerHandle):
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(handle.process.sentinel)
+        loop.remove_reader(handle.conn.fileno())
+        handle.process.join()
+        handle.conn.close()
+        log.log(
+            "INFO" if self.draining else "ERROR",
+            "supervisor_worker_exited",
+            handle.index,
+            handle.process.pid,
+            handle.process.exitcode,
+        )
+
+        for future in handle.pending.values():
+            if not future.done():
+                future.set_result("worker exited")
+        del self._workers[handle.index]
+        self._exited[handle.index].set()
+
+        if not self.draining:
+            task = asyncio.create_task(self._restart(handle.index))
+            self._restart_tasks.add(task)
+            task.add_done_callback(self._restart_tasks.discard)
+
+    async def _restart(self, index: int):
+        await asyncio.sleep(SUPERVISOR_CONFIG["restart_delay"])
+        if not self.draining:
+            self._restarts += 1
+            self._spawn(index)
+
+
+def _worker_process(conn: Connection):
+    # Shutdown is driven by the supervisor, which sends "drain" on SIGTERM
+    # or SIGINT; ignore the terminal's Ctrl-C sent to the whole group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_serve_supervised(conn))
+    finally:
+        # Worker processes exit without running atexit handlers, so write
+        # the records still queued here
+        if log.sink is not None:
+            log.sink.close()
+
+
+async def _serve_supervised(conn: Connection):
+    from warmup import warm_connections
+
+    # Connections cannot be shared across processes, so every worker opens
+    # its own before reporting that it accepts sessions
+    await warm_connections()
+    worker = SessionWorker()
+    worker.start()
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    def on_readable():
+        try:
+            inbox.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            # The supervisor is gone; finish running calls and exit
+            loop.remove_reader(conn.fileno())
+            inbox.put_nowait(("drain",))
+
+    def send(message: tuple):
+        try:
+            conn.send(message)
+        except OSError:
+            pass
+
+    def report():
+        send(("load", worker.stats(), worker.admission_error() is None))
+
+    async def report_load():
+        while True:
+            report()
+            await asyncio.sleep(SUPERVISOR_CONFIG["load_report_interval"])
+
+    loop.add_reader(conn.fileno(), on_readable)
+    loop.add_signal_handler(signal.SIGTERM, inbox.put_nowait, ("drain",))
+    reporter = asyncio.create_task(report_load())
+
+    while True:
+        message = await inbox.get()
+        if message[0] == "start":
+            args = DailySessionArguments(**message[1])
+            error = await worker.submit(args)
+            send(("started", args.session_id, error))
+            report()
+        elif message[0] == "drain":
+            break
+
+    loop.remove_reader(conn.fileno())
+    reporter.cancel()
+    # Report once more so the supervisor stops routing here
+    worker.draining = True
+    report()
+    await worker.drain()
+
+
+async def run_supervisor(
+    host: str = WORKER_CONFIG["host"], port: int = WORKER_CONFIG["port"]
+):
+    # Inherited by the fork server, which starts with the first worker
+    os.environ.setdefault(ENV_VARS["WARMUP_ON_IMPORT"], "1")
+    supervisor = SessionSupervisor()
+    log.info("supervisor_started", host, port, supervisor.size)
+    await serve(supervisor, host, port)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    asyncio.run(run_supervisor())
@@ -0,0 +1,198 @@
+"""Worker mode: host many bot sessions on one event loop.
+
+Run with `python src/session_worker.py`, then start sessions with
+`POST /sessions` and a JSON body of `room_url`, `token`, `body` and
+`session_id`. The worker answers 400 when `room_url` or `token` is missing
+and 503 when it is at capacity or draining.
+"""
+
+import asyncio
+import signal
+import uuid
+
+from aiohttp import web
+from pipecatcloud.agent import DailySessionArguments
+
+from bot import bot
+from config import WORKER_CONFIG
+from loop_monitor import EventLoopLagMonitor
+from structured_logging import bind_log_session, log
+
+
+class SessionWorker:
+    """Runs concurrent `bot()` sessions with admission control and draining.
+
+    Each session runs in its own task; everything per-call (recording state,
+    transcript handler, LLM context) is created inside `main()`, so sessions
+    share only the process-wide pools. A session is admitted only while the
+    worker is under `max_sessions` and the smoothed event-loop lag and CPU
+    use are under their limits.
+
+    Attributes:
+        draining: Whether the worker has stopped admitting sessions
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = WORKER_CONFIG["max_sessions"],
+        max_loop_lag_ms: float = WORKER_CONFIG["max_loop_lag_ms"],
+        max_cpu_percent: float = WORKER_CONFIG["max_cpu_percent"],
+        monitor: EventLoopLagMonitor | None = None,
+    ):
+        self.draining = False
+        self._max_sessions = max_sessions
+        self._max_loop_lag_ms = max_loop_lag_ms
+        self._max_cpu_percent = max_cpu_percent
+        self._monitor = monitor or EventLoopLagMonitor()
+        self._sessions: dict[str, asyncio.Task] = {}
+        self._admitted = 0
+        self._rejected = 0
+        self._failed = 0
+
+    def start(self):
+        self._monitor.start()
+
+    def admission_error(self) -> str | None:
+        """Return why a new session would be refused, or None."""
+        if self.draining:
+            return "draining"
+        if len(self._sessions) >= self._max_sessions:
+            return "at session limit"
+        if self._monitor.recent_lag > self._max_loop_lag_ms:
+            return f"event loop lag {self._monitor.recent_lag:.1f}ms"
+        if self._monitor.recent_cpu > self._max_cpu_percent:
+            return f"cpu {self._monitor.recent_cpu:.0f}%"
+        return None
+
+    async def submit(self, args: DailySessionArguments) -> str | None:
+        """Start a session. Returns the refusal reason if it was not admitted."""
+        session_id = args.session_id
+        error = self.admission_error()
+        if error is None and session_id in self._sessions:
+            error = "session already running"
+        if error is not None:
+            self._rejected += 1
+            log.warning("worker_rejected", session_id, error)
+            return error
+
+        self._admitted += 1
+        task = asyncio.create_task(self._run(args))
+        self._sessions[session_id] = task
+        log.info("worker_admitted", session_id, len(self._sessions))
+        return None
+
+    async def drain(self, timeout: float = WORKER_CONFIG["drain_timeout"]):
+        """Stop admitting sessions and wait for running ones to finish."""
+        self.draining = True
+        tasks = list(self._sessions.values())
+        log.info("worker_draining", len(tasks))
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            if pending:
+                log.warning("worker_drain_timeout", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        await self._monitor.stop()
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._sessions),
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "failed": self._failed,
+            "draining": self.draining,
+            "loop_lag_ms": self._monitor.recent_lag,
+            "cpu_percent": self._monitor.recent_cpu,
+        }
+
+    async def _run(self, args: DailySessionArguments):
+        # Each session runs in its own task, so the label stays with it
+        bind_log_session(args.session_id)
+        try:
+            await bot(args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed += 1
+            log.error("worker_session_error", args.session_id, e)
+        finally:
+            self._sessions.pop(args.session_id, None)
+
+
+def create_app(worker: SessionWorker) -> web.Application:
+    """Build the HTTP API for a worker, or anything with the same interface."""
+
+    async def start_session(request: web.Request) -> web.Response:
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.json_response({"error": "body is not JSON"}, status=400)
+        if not isinstance(data, dict):
+            return web.json_response({"error": "body is not an object"}, status=400)
+        missing = [key for key in ("room_url", "token") if not data.get(key)]
+        if missing:
+            error = f"missing {', '.join(missing)}"
+            return web.json_response({"error": error}, status=400)
+        args = DailySessionArguments(
+            session_id=data.get("session_id") or str(uuid.uuid4()),
+            room_url=data["room_url"],
+            token=data["token"],
+            body=data.get("body"),
+        )
+        error = await worker.submit(args)
+        if error is not None:
+            return web.json_response({"error": error}, status=503)
+        return web.json_response({"session_id": args.session_id}, status=202)
+
+    async def health(request: web.Request) -> web.Response:
+        status = 503 if worker.admission_error() else 200
+        return web.json_response(worker.stats(), status=status)
+
+    app = web.Application()
+    app.router.add_post("/sessions", start_session)
+    app.router.add_get("/health", health)
+    return app
+
+
+async def serve(
+    worker: SessionWorker,
+    host: str = WORKER_CONFIG["host"],
+    port: int = WORKER_CONFIG["port"],
+):
+    """Serve the worker until SIGTERM or SIGINT, then drain and exit."""
+    worker.start()
+
+    runner = web.AppRunner(create_app(worker))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    # Keep answering health checks (as unavailable) while draining
+    await worker.drain()
+    await runner.cleanup()
+
+
+async def run_worker(
+    host: str = WORKER_CONFIG["host"], port: int = WORKER_CONFIG["port"]
+):
+    from vad_pool import get_vad_pool
+    from warmup import warm_connections, warm_up
+
+    warm_up(get_vad_pool())
+    await warm_connections()
+    log.info("worker_started", host, port)
+    await serve(SessionWorker(), host, port)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    asyncio.run(run_worker())
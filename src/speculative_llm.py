@@ -0,0 +1,253 @@
+import asyncio
+import re
+from typing import TYPE_CHECKING
+
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from config import SPECULATION_CONFIG
+from structured_logging import log
+
+if TYPE_CHECKING:
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercase and strip punctuation so interim and final text compare."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+class Speculation:
+    """A completion started ahead of the final transcript.
+
+    The provider stream is consumed in a background task into a buffer, so
+    nothing is spoken until the completion is claimed by `SpeculationManager`.
+
+    Attributes:
+        tokens: Completion tokens generated so far; one per streamed chunk
+            until the provider reports usage
+    """
+
+    def __init__(self, text: str, base_messages: list[dict], stream_factory):
+        self.text = text
+        self.normalized = normalize_transcript(text)
+        self.base_messages = base_messages
+        self.tokens = 0
+        self._chunks: list = []
+        self._done = False
+        self._error: BaseException | None = None
+        self._updated = asyncio.Event()
+        self._task = asyncio.create_task(self._consume(stream_factory))
+
+    def cancel(self):
+        self._task.cancel()
+
+    def replay(self) -> "SpeculationStream":
+        return SpeculationStream(self)
+
+    async def _consume(self, stream_factory):
+        stream = None
+        try:
+            stream = await stream_factory()
+            async for chunk in stream:
+                self._chunks.append(chunk)
+                if chunk.usage is not None:
+                    self.tokens = chunk.usage.completion_tokens
+                elif chunk.choices:
+                    self.tokens += 1
+                self._updated.set()
+        except asyncio.CancelledError:
+            if stream is not None:
+                await stream.close()
+            raise
+        except Exception as e:
+            log.warning("speculation_error", e)
+            self._error = e
+        finally:
+            self._done = True
+            self._updated.set()
+
+
+class SpeculationStream:
+    """Replays a speculation's buffered chunks, then follows the live stream."""
+
+    def __init__(self, speculation: Speculation):
+        self._speculation = speculation
+        self._index = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        spec = self._speculation
+        while self._index >= len(spec._chunks):
+            if spec._done:
+                if spec._error is not None:
+                    raise spec._error
+                raise StopAsyncIteration
+            spec._updated.clear()
+            await spec._updated.wait()
+        chunk = spec._chunks[self._index]
+        self._index += 1
+        return chunk
+
+    async def close(self):
+        self._speculation.cancel()
+
+
+class SpeculationManager:
+    """Starts LLM completions on likely user transcripts and hands them over.
+
+    `SpeculationTrigger` calls `observe_interim()` and `observe_final()` as
+    transcripts arrive. Once the text is stable, a completion is started for
+    the current context plus that text. When the LLM service later asks for a
+    completion, `take()` returns the speculative stream if the user message
+    matches the speculated text and the rest of the context is unchanged;
+    otherwise the speculation is cancelled and the service makes a normal
+    request.
+
+    Attributes:
+        started: Number of speculative completions started
+        hits: Speculations reused for the real turn
+        misses: Speculations discarded
+        wasted_tokens: Completion tokens generated by discarded speculations
+    """
+
+    def __init__(
+        self,
+        llm,
+        context: "OpenAILLMContext",
+        *,
+        stable_interims: int = SPECULATION_CONFIG["stable_interims"],
+        min_words: int = SPECULATION_CONFIG["min_words"],
+    ):
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted_tokens = 0
+        self._llm = llm
+        self._context = context
+        self._stable_interims = stable_interims
+        self._min_words = min_words
+        self._finals: list[str] = []
+        self._last_interim: str | None = None
+        self._interim_repeats = 0
+        self._current: Speculation | None = None
+
+    def observe_interim(self, text: str):
+        normalized = normalize_transcript(text)
+        if normalized == self._last_interim:
+            self._interim_repeats += 1
+        else:
+            self._last_interim = normalized
+            self._interim_repeats = 1
+        if self._interim_repeats >= self._stable_interims:
+            self._speculate(" ".join([*self._finals, text]))
+
+    def observe_final(self, text: str):
+        self._finals.append(text)
+        self._last_interim = None
+        self._interim_repeats = 0
+        self._speculate(" ".join(self._finals))
+
+    async def take(self, messages: list[dict]):
+        """Return the speculative stream for `messages`, or None."""
+        spec = self._current
+        self._current = None
+        self._finals = []
+        self._last_interim = None
+        self._interim_repeats = 0
+        if spec is None:
+            return None
+
+        last = messages[-1] if messages else None
+        if (
+            last is not None
+            and last.get("role") == "user"
+            and isinstance(last.get("content"), str)
+            and normalize_transcript(last["content"]) == spec.normalized
+            and messages[:-1] == spec.base_messages
+        ):
+            self.hits += 1
+            log.debug("speculation_hit", spec.text)
+            return spec.replay()
+
+        self._discard(spec)
+        return None
+
+    def cancel(self):
+        if self._current:
+            self._discard(self._current)
+            self._current = None
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / self.started if self.started else 0.0,
+            "wasted_tokens": self.wasted_tokens,
+        }
+
+    def _speculate(self, text: str):
+        from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+        normalized = normalize_transcript(text)
+        if len(normalized.split()) < self._min_words:
+            return
+        if self._current and self._current.normalized == normalized:
+            return
+        if self._current:
+            self._discard(self._current)
+
+        base_messages = [dict(m) for m in self._context.get_messages()]
+        spec_context = OpenAILLMContext(
+            base_messages + [{"role": "user", "content": text}],
+            tools=self._context.tools,
+            tool_choice=self._context.tool_choice,
+        )
+
+        async def stream_factory():
+            return await self._llm.open_speculation(
+                spec_context, spec_context.get_messages()
+            )
+
+        self.started += 1
+        log.debug("speculation_started", text)
+        self._current = Speculation(text, base_messages, stream_factory)
+
+    def _discard(self, spec: Speculation):
+        self.misses += 1
+        self.wasted_tokens += spec.tokens
+        log.debug("speculation_miss", spec.text, spec.tokens)
+        spec.cancel()
+
+
+class SpeculationTrigger(FrameProcessor):
+    """Feeds STT transcripts to a `SpeculationManager`.
+
+    Placed right after the STT service; frames pass through unchanged.
+    """
+
+    def __init__(self, manager: SpeculationManager, **kwargs):
+        super().__init__(**kwargs)
+        self._manager = manager
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InterimTranscriptionFrame):
+            self._manager.observe_interim(frame.text)
+        elif isinstance(frame, TranscriptionFrame):
+            self._manager.observe_final(frame.text)
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        self._manager.cancel()
+        log.info("speculation_stats", self._manager.stats())
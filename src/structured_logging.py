@@ -0,0 +1,280 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from typing import TextIO
+
+from loguru import logger
+
+from config import LOG_MESSAGES, LOGGING_CONFIG
+
+# Session the current task, and tasks started from it, are logging for
+_session_id: ContextVar[str | None] = ContextVar("log_session_id", default=None)
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+
+def bind_log_session(session_id: str | None):
+    """Label records from the current task and the tasks it starts."""
+    _session_id.set(session_id)
+
+
+def format_message(template: str, args: tuple) -> str:
+    if not args:
+        return template
+    try:
+        return template.format(*args)
+    except (IndexError, KeyError, ValueError):
+        return " ".join([template, *map(str, args)])
+
+
+class StructuredLogSink:
+    """Writes log records as JSON lines from a background thread, in batches.
+
+    Callers only append a tuple to a queue: formatting, JSON encoding and the
+    write happen on the sink thread, once `batch_size` records are waiting or
+    every `flush_interval` seconds. Each record carries its `LOG_MESSAGES` key
+    as `event`, its arguments and the session it was logged for.
+
+    Debug records are sampled: of each kind, only one in `debug_sample_every`
+    is written, with that rate as `sample_rate` so counts can be scaled back
+    up. With `max_queued` records waiting, new ones are dropped rather than
+    held in memory, and the number dropped is logged.
+
+    Attributes:
+        written: Records written
+        dropped: Records dropped because the queue was full
+        sampled_out: Debug records skipped by sampling
+    """
+
+    def __init__(
+        self,
+        stream: TextIO | None = None,
+        *,
+        level: str = LOGGING_CONFIG["level"],
+        batch_size: int = LOGGING_CONFIG["batch_size"],
+        flush_interval: float = LOGGING_CONFIG["flush_interval"],
+        max_queued: int = LOGGING_CONFIG["max_queued"],
+        debug_sample_every: int = LOGGING_CONFIG["debug_sample_every"],
+    ):
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.level = LEVELS[level]
+        self._stream = stream or sys.stderr
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_queued = max_queued
+        self._sample_every = max(1, debug_sample_every)
+        self._seen: dict[str, int] = {}
+        self._queue: deque[tuple] = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._reported_dropped = 0
+        self._start_thread()
+
+    def emit(
+        self,
+        level: str,
+        event: str,
+        template: str,
+        args: tuple = (),
+        exception: tuple | None = None,
+        logger_name: str | None = None,
+    ):
+        """Queue a record; `template` is formatted with `args` on the sink thread."""
+        sample_rate = 1
+        if level == "DEBUG" and self._sample_every > 1:
+            seen = self._seen.get(event, 0)
+            self._seen[event] = seen + 1
+            if seen % self._sample_every:
+                self.sampled_out += 1
+                return
+            sample_rate = self._sample_every
+        if len(self._queue) >= self._max_queued:
+            self.dropped += 1
+            return
+        self._queue.append(
+            (
+                time.time(),
+                level,
+                event,
+                template,
+                args,
+                _session_id.get(),
+                exception,
+                logger_name,
+                sample_rate,
+            )
+        )
+        if len(self._queue) >= self._batch_size:
+            self._wake.set()
+
+    def write_loguru(self, message):
+        """Loguru sink queueing records logged directly through loguru."""
+        record = message.record
+        exception = record["exception"]
+        self.emit(
+            record["level"].name,
+            f"{record['name']}:{record['line']}",
+            record["message"],
+            exception=tuple(exception) if exception else None,
+            logger_name=record["name"],
+        )
+
+    def close(self, timeout: float = 2.0):
+        """Write the records still waiting and stop the sink thread."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def restart_after_fork(self):
+        """Start a new sink thread in a forked child.
+
+        Only the forking thread survives a fork, so the child inherits the
+        sink without the thread that writes it. Records the parent had queued
+        are left for the parent to write.
+        """
+        self._queue.clear()
+        self._wake = threading.Event()
+        self._closed = False
+        self._start_thread()
+
+    def _start_thread(self):
+        self._thread = threading.Thread(
+            target=self._run, name="structured-log-sink", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            while self._queue:
+                self._write_batch()
+            if self._closed:
+                return
+
+    def _write_batch(self):
+        lines = []
+        while self._queue and len(lines) < self._batch_size:
+            lines.append(self._encode(*self._queue.popleft()))
+        if self.dropped != self._reported_dropped:
+            self._reported_dropped = self.dropped
+            lines.append(
+                self._encode(
+                    time.time(),
+                    "WARNING",
+                    "log_dropped",
+                    LOG_MESSAGES["log_dropped"],
+                    (self.dropped,),
+                    None,
+                    None,
+                    None,
+                    1,
+                )
+            )
+        try:
+            self._stream.write("".join(lines))
+            self._stream.flush()
+        except (OSError, ValueError):
+            # Nowhere left to report it; the records are lost
+            return
+        self.written += len(lines)
+
+    @staticmethod
+    def _encode(
+        timestamp, level, event, template, args, session_id, exception, name, rate
+    ) -> str:
+        entry = {
+            "time": timestamp,
+            "level": level,
+            "event": event,
+            "message": format_message(template, args),
+            "session_id": session_id,
+        }
+        if args:
+            entry["args"] = args
+        if name:
+            entry["logger"] = name
+        if exception:
+            entry["exception"] = "".join(traceback.format_exception(*exception))
+        if rate > 1:
+            entry["sample_rate"] = rate
+        return json.dumps(entry, default=str) + "\n"
+
+
+class EventLogger:
+    """Logs `LOG_MESSAGES` entries by key.
+
+    Until `configure_structured_logging()` runs, calls go straight to loguru
+    and are formatted and written as before. After it, they are queued on a
+    `StructuredLogSink` unformatted, so the caller only pays for a tuple.
+
+    Attributes:
+        sink: Structured sink records are queued on, if configured
+    """
+
+    def __init__(self):
+        self.sink: StructuredLogSink | None = None
+
+    def debug(self, key: str, *args):
+        self._log("DEBUG", key, args)
+
+    def info(self, key: str, *args):
+        self._log("INFO", key, args)
+
+    def warning(self, key: str, *args):
+        self._log("WARNING", key, args)
+
+    def error(self, key: str, *args):
+        self._log("ERROR", key, args)
+
+    def exception(self, key: str, *args):
+        """Log at error level with the exception being handled."""
+        self._log("ERROR", key, args, sys.exc_info())
+
+    def log(self, level: str, key: str, *args):
+        self._log(level, key, args)
+
+    def _log(self, level: str, key: str, args: tuple, exception=None):
+        sink = self.sink
+        if sink is None:
+            # Depth 2 reports the caller of debug(), info() etc. to loguru
+            logger.opt(depth=2, exception=exception).log(
+                level, LOG_MESSAGES[key], *args
+            )
+        elif LEVELS[level] >= sink.level:
+            sink.emit(level, key, LOG_MESSAGES[key], args, exception)
+
+
+log = EventLogger()
+
+
+def _restart_sink_in_child():
+    if log.sink is not None:
+        log.sink.restart_after_fork()
+
+
+# Session workers fork from a server that configured logging when it
+# imported the bot
+os.register_at_fork(after_in_child=_restart_sink_in_child)
+
+
+def configure_structured_logging(stream: TextIO | None = None) -> StructuredLogSink:
+    """Send our log events and loguru's records through a `StructuredLogSink`.
+
+    Replaces loguru's handlers, so records logged by pipecat are queued and
+    written as JSON lines too. Records still waiting are written at exit.
+    """
+    sink = StructuredLogSink(stream)
+    logger.remove()
+    logger.add(sink.write_loguru, level=LOGGING_CONFIG["level"], format="{message}")
+    log.sink = sink
+    atexit.register(sink.close)
+    return sink
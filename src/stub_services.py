@@ -0,0 +1,227 @@
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import AsyncGenerator
+
+import numpy as np
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+from openai.types.completion_usage import CompletionUsage
+from pipecat.frames.frames import (
+    Frame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.services.stt_service import SegmentedSTTService
+from pipecat.services.tts_service import TTSService
+from pipecat.utils.time import time_now_iso8601
+
+from audio_buffers import frame_views
+from config import AUDIO_CONFIG, LLM_CONFIG, STUB_CONFIG, TTS_CHUNKING_CONFIG
+from service_factory import PooledOpenAILLMService, SessionServices
+from tts_chunking import create_text_aggregator
+
+
+class StubSTTService(SegmentedSTTService):
+    """STT stand-in that returns scripted utterances after a fixed delay.
+
+    Audio is still buffered per VAD segment by `SegmentedSTTService`, so the
+    CPU cost of the audio path matches a real segmented STT service.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = STUB_CONFIG["stt_latency"],
+        utterances: list[str] = STUB_CONFIG["utterances"],
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._latency = latency
+        self._utterances = itertools.cycle(utterances)
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    async def run_stt(self, audio: bytes) -> AsyncGenerator[Frame, None]:
+        await self.start_processing_metrics()
+        await asyncio.sleep(self._latency)
+        await self.stop_processing_metrics()
+        yield TranscriptionFrame(next(self._utterances), "", time_now_iso8601())
+
+
+class StubCompletionStream:
+    """Streams a canned chat completion with configurable timing."""
+
+    def __init__(self, model: str, response: str, ttfb: float, token_delay: float):
+        self._model = model
+        self._tokens = response.split(" ")
+        self._ttfb = ttfb
+        self._token_delay = token_delay
+        self._created = int(time.time())
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def close(self):
+        pass
+
+    async def _chunks(self):
+        await asyncio.sleep(self._ttfb)
+        for i, token in enumerate(self._tokens):
+            if i:
+                await asyncio.sleep(self._token_delay)
+            yield self._chunk(token if i == 0 else f" {token}")
+        yield self._chunk(None, finish_reason="stop")
+        yield ChatCompletionChunk(
+            id="stub",
+            choices=[],
+            created=self._created,
+            model=self._model,
+            object="chat.completion.chunk",
+            usage=CompletionUsage(
+                prompt_tokens=0,
+                completion_tokens=len(self._tokens),
+                total_tokens=len(self._tokens),
+            ),
+        )
+
+    def _chunk(self, content: str | None, finish_reason: str | None = None):
+        return ChatCompletionChunk(
+            id="stub",
+            choices=[
+                Choice(
+                    index=0,
+                    delta=ChoiceDelta(content=content),
+                    finish_reason=finish_reason,
+                )
+            ],
+            created=self._created,
+            model=self._model,
+            object="chat.completion.chunk",
+        )
+
+
+class StubOpenAILLMService(PooledOpenAILLMService):
+    """OpenAI LLM service whose completions never leave the process.
+
+    Everything except the HTTP request runs as usual, including context
+    aggregation, usage tracking, speculation and provider failover. Routes
+    may override `ttfb`, `token_delay` and `response`, set `error_rate` to
+    fail that share of requests, and set `stall` to take that many seconds
+    to accept each one.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttfb: float = STUB_CONFIG["llm_ttfb"],
+        token_delay: float = STUB_CONFIG["llm_token_delay"],
+        response: str = STUB_CONFIG["llm_response"],
+        **kwargs,
+    ):
+        super().__init__(
+            client=AsyncOpenAI(api_key="stub"),
+            api_key="stub",
+            model=LLM_CONFIG["model"],
+            **kwargs,
+        )
+        self._ttfb = ttfb
+        self._token_delay = token_delay
+        self._response = response
+
+    async def open_route(self, route, context, messages):
+        options = route.options
+        if options.get("stall"):
+            await asyncio.sleep(options["stall"])
+        if random.random() < options.get("error_rate", 0.0):
+            raise ConnectionError(f"Stub provider {route.name} failed")
+        return StubCompletionStream(
+            self.model_name,
+            options.get("response", self._response),
+            options.get("ttfb", self._ttfb),
+            options.get("token_delay", self._token_delay),
+        )
+
+
+class StubTTSService(TTSService):
+    """TTS stand-in that returns a quiet tone sized to the text.
+
+    With `zero_copy`, the tone is synthesized once and every response is
+    pushed as views of it.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttfb: float = STUB_CONFIG["tts_ttfb"],
+        seconds_per_word: float = STUB_CONFIG["tts_seconds_per_word"],
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._ttfb = ttfb
+        self._seconds_per_word = seconds_per_word
+        self._tone = b""
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        await self.start_ttfb_metrics()
+        await asyncio.sleep(self._ttfb)
+        await self.stop_ttfb_metrics()
+        yield TTSStartedFrame()
+
+        duration = max(1, len(text.split())) * self._seconds_per_word
+        num_samples = int(self.sample_rate * duration)
+        chunk_size = self.sample_rate // 10 * 2
+        if AUDIO_CONFIG["zero_copy"]:
+            if len(self._tone) < num_samples * 2:
+                self._tone = self._synthesize(num_samples)
+            audio = memoryview(self._tone)[: num_samples * 2]
+            for chunk in frame_views(audio, chunk_size):
+                yield TTSAudioRawFrame(chunk, self.sample_rate, 1)
+        else:
+            audio = self._synthesize(num_samples)
+            for i in range(0, len(audio), chunk_size):
+                yield TTSAudioRawFrame(audio[i : i + chunk_size], self.sample_rate, 1)
+
+        yield TTSStoppedFrame()
+
+    def _synthesize(self, num_samples: int) -> bytes:
+        samples = np.arange(num_samples)
+        tone = 1000 * np.sin(2 * np.pi * 220 * samples / self.sample_rate)
+        return tone.astype(np.int16).tobytes()
+
+
+async def stub_summarizer(messages: list[dict], previous: str | None) -> str:
+    return f"{len(messages)} earlier messages"
+
+
+def create_stub_services(
+    *, early_flush: bool = TTS_CHUNKING_CONFIG["early_flush"], **latencies
+) -> SessionServices:
+    """Create offline STT, LLM and TTS services for one session.
+
+    Keyword arguments override the `STUB_CONFIG` timings, e.g. `llm_ttfb`.
+    With `early_flush` off, TTS text is chunked by whole sentences.
+    """
+    config = {**STUB_CONFIG, **latencies}
+    return SessionServices(
+        StubSTTService(latency=config["stt_latency"]),
+        StubOpenAILLMService(
+            ttfb=config["llm_ttfb"],
+            token_delay=config["llm_token_delay"],
+            response=config["llm_response"],
+        ),
+        StubTTSService(
+            ttfb=config["tts_ttfb"],
+            seconds_per_word=config["tts_seconds_per_word"],
+            text_aggregator=create_text_aggregator(early_flush),
+        ),
+        summarizer=stub_summarizer,
+    )
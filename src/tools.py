@@ -0,0 +1,233 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+from pipecat.adapters.schemas.function_schema import FunctionSchema
+from pipecat.adapters.schemas.tools_schema import ToolsSchema
+from pipecat.frames.frames import TTSSpeakFrame
+
+from config import TOOLS_CONFIG, TTS_PHRASES
+from latency_metrics import LatencyHistogram
+from structured_logging import log
+
+if TYPE_CHECKING:
+    from pipecat.services.llm_service import FunctionCallParams
+
+ToolHandler = Callable[["FunctionCallParams"], Awaitable[Any]]
+
+
+class Tool:
+    """A function the LLM can call, with how it should be run.
+
+    The handler returns the result for the LLM; the framework reports it.
+    Tools that act instead of answering, like ending the call, set
+    `has_result` to False and push their own frames.
+
+    Attributes:
+        schema: Schema the LLM sees
+        handler: Coroutine called with pipecat's `FunctionCallParams`
+        timeout: Seconds the handler may run before the call fails
+        cache_ttl: Seconds a result is reused for the same arguments, for
+            idempotent tools; None to never cache
+        shared: Whether cached results are reused by other sessions too, for
+            tools whose result does not depend on who is calling
+        has_result: Whether the handler's return value is sent to the LLM
+        cancel_on_interruption: Whether an interruption cancels the call
+    """
+
+    def __init__(
+        self,
+        schema: FunctionSchema,
+        handler: ToolHandler,
+        *,
+        timeout: float | None = TOOLS_CONFIG["default_timeout"],
+        cache_ttl: float | None = None,
+        shared: bool = False,
+        has_result: bool = True,
+        cancel_on_interruption: bool = True,
+    ):
+        self.schema = schema
+        self.handler = handler
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.shared = shared
+        self.has_result = has_result
+        self.cancel_on_interruption = cancel_on_interruption
+
+    @property
+    def name(self) -> str:
+        return self.schema.name
+
+
+def tools_schema(tools: list[Tool]) -> ToolsSchema:
+    return ToolsSchema(standard_tools=[tool.schema for tool in tools])
+
+
+class ToolResultCache:
+    """LRU cache of idempotent tool results.
+
+    Entries are keyed by tool name and arguments and expire after the tool's
+    `cache_ttl`. Each session has its own; results of tools marked `shared`
+    go in the process-wide one from `get_tool_cache()` instead.
+
+    Attributes:
+        hits: Number of calls answered from the cache
+        misses: Number of calls that had to run the tool
+    """
+
+    def __init__(self, max_entries: int = TOOLS_CONFIG["cache_max_entries"]):
+        self.hits = 0
+        self.misses = 0
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+
+    @staticmethod
+    def key(name: str, arguments) -> tuple[str, str]:
+        return (name, json.dumps(dict(arguments), sort_keys=True, default=str))
+
+    def get(self, key: tuple[str, str]) -> tuple[bool, Any]:
+        """Return (found, result) for `key`."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def put(self, key: tuple[str, str], result: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class ToolExecutor:
+    """Runs one session's tool calls without stalling the voice turn.
+
+    Pipecat already starts each call of a parallel batch in its own task;
+    this adds a timeout per call, cached results for idempotent tools, kept
+    for this session unless the tool is `shared`, and a
+    filler phrase once any call of a batch has run longer than
+    `filler_after`, so the user is not left in silence. A failed or timed
+    out call still reports an error result, so the LLM can answer.
+
+    Attributes:
+        session_id: Session the metrics belong to
+        histograms: Latency in ms per tool, including cache hits
+    """
+
+    def __init__(
+        self,
+        tools: list[Tool],
+        session_id: str | None = None,
+        *,
+        shared_cache: ToolResultCache | None = None,
+        filler_after: float | None = TOOLS_CONFIG["filler_after"],
+    ):
+        self.session_id = session_id
+        self.histograms = {tool.name: LatencyHistogram() for tool in tools}
+        self._tools = tools
+        self._cache = ToolResultCache()
+        self._shared_cache = shared_cache or get_tool_cache()
+        self._filler_after = filler_after
+        self._running = 0
+        self._filler_spoken = False
+        self._errors = {tool.name: 0 for tool in tools}
+
+    def register(self, llm):
+        for tool in self._tools:
+            llm.register_function(
+                tool.name,
+                self._handler(tool),
+                cancel_on_interruption=tool.cancel_on_interruption,
+            )
+
+    def _handler(self, tool: Tool) -> ToolHandler:
+        async def handler(params: "FunctionCallParams"):
+            await self._run(tool, params)
+
+        return handler
+
+    async def _run(self, tool: Tool, params: "FunctionCallParams"):
+        if self._running == 0:
+            # First call of a new batch
+            self._filler_spoken = False
+        self._running += 1
+        start = time.perf_counter()
+        filler = None
+        if self._filler_after is not None:
+            filler = params.llm.create_task(self._speak_filler(params))
+        try:
+            result = await self._call(tool, params)
+        finally:
+            self._running -= 1
+            if filler:
+                await params.llm.cancel_task(filler)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.histograms[tool.name].record(elapsed)
+            log.debug("tool_called", tool.name, elapsed)
+        if tool.has_result:
+            await params.result_callback(result)
+
+    async def _call(self, tool: Tool, params: "FunctionCallParams") -> Any:
+        key = None
+        cache = self._shared_cache if tool.shared else self._cache
+        if tool.cache_ttl:
+            key = cache.key(tool.name, params.arguments)
+            found, result = cache.get(key)
+            if found:
+                return result
+        try:
+            result = await asyncio.wait_for(tool.handler(params), tool.timeout)
+        except asyncio.TimeoutError:
+            self._errors[tool.name] += 1
+            log.warning("tool_timeout", tool.name, tool.timeout)
+            return {"error": f"{tool.name} timed out"}
+        except Exception as e:
+            self._errors[tool.name] += 1
+            log.warning("tool_error", tool.name, e)
+            return {"error": f"{tool.name} failed"}
+        if key is not None:
+            cache.put(key, result, tool.cache_ttl)
+        return result
+
+    async def _speak_filler(self, params: "FunctionCallParams"):
+        await asyncio.sleep(self._filler_after)
+        if not self._filler_spoken:
+            self._filler_spoken = True
+            await params.llm.push_frame(TTSSpeakFrame(TTS_PHRASES["tool_filler"]))
+
+    def as_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "unit": "ms",
+            "tools": {
+                name: {**h.as_dict(), "errors": self._errors[name]}
+                for name, h in self.histograms.items()
+                if h.count
+            },
+            "cache": self._cache.stats(),
+            "shared_cache": self._shared_cache.stats(),
+        }
+
+    def export(self):
+        log.info("tool_summary", self.as_dict())
+
+
+_tool_cache: ToolResultCache | None = None
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Return the process-wide tool result cache, creating it on first use."""
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolResultCache()
+    return _tool_cache
@@ -1,52 +1,85 @@
-from loguru import logger
 from pipecat.frames.frames import TranscriptionMessage, TranscriptionUpdateFrame
 from pipecat.processors.transcript_processor import TranscriptProcessor
 
+from structured_logging import log
+from transcript_sinks import (
+    TextSink,
+    TranscriptRecord,
+    TranscriptSink,
+    format_text_line,
+)
+from transcript_store import TranscriptStore
+from transcript_writer import TranscriptWriter
+
 
 class TranscriptHandler:
     """Handles real-time transcript processing and output.
 
-    Maintains a list of conversation messages and outputs them either to a log
-    or to a file as they are received. Each message includes its timestamp and role.
+    Maintains a bounded-memory store of conversation messages and outputs them
+    to a log and to any configured sinks as they are received. Each message
+    includes its timestamp and role. Sink output is buffered and written in
+    batches by a `TranscriptWriter`, so `close()` must be awaited when the
+    pipeline ends to flush the last records.
 
     Attributes:
-        messages: List of all processed transcript messages
-        output_file: Optional path to file where transcript is saved. If None, outputs to log only.
+        messages: Store of all processed transcript messages; older messages
+            are spilled to disk and read back lazily when iterated
+        output_file: Optional path to a text file where the transcript is saved
+        session_id: Optional session ID included in every record
     """
 
-    def __init__(self, output_file: str | None = None):
-        """Initialize handler with optional file output.
+    def __init__(
+        self,
+        output_file: str | None = None,
+        sinks: list[TranscriptSink] | None = None,
+        session_id: str | None = None,
+    ):
+        """Initialize handler with optional file and sink output.
 
         Args:
-            output_file: Path to output file. If None, outputs to log only.
+            output_file: Path to a text output file, written with `TextSink`.
+            sinks: Additional sinks, e.g. JSONL or compressed rolling files.
+            session_id: Session ID included in every record.
+
+        If neither `output_file` nor `sinks` is given, outputs to log only.
         """
-        self.messages: list[TranscriptionMessage] = []
+        self.messages: TranscriptStore = TranscriptStore()
         self.output_file: str | None = output_file
-        logger.debug(
-            f"TranscriptHandler initialized {'with output_file=' + output_file if output_file else 'with log output only'}"
+        self.session_id: str | None = session_id
+
+        sinks = list(sinks or [])
+        if output_file:
+            sinks.insert(0, TextSink(output_file))
+        self._writer: TranscriptWriter | None = (
+            TranscriptWriter(sinks) if sinks else None
         )
+        log.debug("transcript_handler_initialized", len(sinks))
+
+    def to_record(self, message: TranscriptionMessage) -> TranscriptRecord:
+        """Convert a message into the structured record written to sinks."""
+        return {
+            "session_id": self.session_id,
+            "timestamp": message.timestamp,
+            "role": message.role,
+            "content": message.content,
+        }
 
     async def save_message(self, message: TranscriptionMessage):
         """Save a single transcript message.
 
-        Outputs the message to the log and optionally to a file.
+        Outputs the message to the log and queues it for the sinks.
 
         Args:
             message: The message to save
         """
-        timestamp = f"[{message.timestamp}] " if message.timestamp else ""
-        line = f"{timestamp}{message.role}: {message.content}"
+        record = self.to_record(message)
 
         # Always log the message
-        logger.info(f"Transcript: {line}")
+        log.info("transcript_line", format_text_line(record))
 
-        # Optionally write to file
-        if self.output_file:
-            try:
-                with open(self.output_file, "a", encoding="utf-8") as f:
-                    f.write(line + "\n")
-            except Exception as e:
-                logger.error(f"Error saving transcript message to file: {e}")
+        # Optionally queue for the batched sink writer
+        if self._writer:
+            await self._writer.write(record)
 
     async def on_transcript_update(
         self, processor: TranscriptProcessor, frame: TranscriptionUpdateFrame
@@ -57,16 +90,23 @@ class TranscriptHandler:
             processor: The TranscriptProcessor that emitted the update
             frame: TranscriptionUpdateFrame containing new messages
         """
-        logger.debug(
-            f"Received transcript update with {len(frame.messages)} new messages"
-        )
+        log.debug("transcript_update", len(frame.messages))
 
         for msg in frame.messages:
-            self.messages.append(msg)
+            await self.messages.append(msg)
             await self.save_message(msg)
 
     async def store_transcript(self):
-        """Store the transcript in a file."""
-        with open(self.output_file, "w", encoding="utf-8") as f:
-            for msg in self.messages:
-                f.write(f"{msg.timestamp} {msg.role}: {msg.content}\n")
+        """Store the transcript.
+
+        Messages are streamed to the sinks as they arrive, so this only flushes
+        whatever is still buffered instead of rewriting the whole file.
+        """
+        if self._writer:
+            await self._writer.flush()
+
+    async def close(self):
+        """Flush any buffered records, close the sinks and release the store."""
+        if self._writer:
+            await self._writer.close()
+        self.messages.close()
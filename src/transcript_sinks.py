@@ -0,0 +1,248 @@
+import gzip
+import json
+import os
+import shutil
+import time
+from collections.abc import Callable
+from typing import Any
+
+from config import ENV_VARS, TRANSCRIPT_CONFIG
+from structured_logging import log
+
+TranscriptRecord = dict[str, Any]
+
+
+def format_text_line(record: TranscriptRecord) -> str:
+    """Format a record as the legacy "[timestamp] role: content" line."""
+    timestamp = f"[{record['timestamp']}] " if record.get("timestamp") else ""
+    return f"{timestamp}{record['role']}: {record['content']}"
+
+
+class TranscriptSink:
+    """Destination for batches of transcript records.
+
+    Sinks are called from the `TranscriptWriter` worker thread, so they may
+    block on I/O but must not touch the event loop.
+    """
+
+    def write_batch(self, records: list[TranscriptRecord]):
+        raise NotImplementedError
+
+    def close(self):
+        """Flush and release any resources held by the sink."""
+
+
+class TextSink(TranscriptSink):
+    """Appends records to a plain text file, one formatted line each."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write_batch(self, records: list[TranscriptRecord]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(format_text_line(r) + "\n" for r in records))
+
+
+class JSONLSink(TranscriptSink):
+    """Appends records to a file as JSON Lines.
+
+    The finished file is passed to `on_closed`, e.g. an uploader, when the
+    sink is closed.
+    """
+
+    def __init__(self, path: str, *, on_closed: Callable[[str], None] | None = None):
+        self.path = path
+        self._on_closed = on_closed
+
+    def write_batch(self, records: list[TranscriptRecord]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+
+    def close(self):
+        if self._on_closed and os.path.exists(self.path):
+            self._on_closed(self.path)
+
+
+def _open_compressed(path: str, compression: str):
+    if compression == "gzip":
+        return gzip.open(path, "wb")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise Exception(
+                "zstandard is required for zstd transcript compression. "
+                "Install it with `pip install zstandard`."
+            ) from e
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    raise ValueError(f"Unknown transcript compression: {compression}")
+
+
+class RollingCompressedSink(TranscriptSink):
+    """Writes JSONL records into compressed segment files that roll by size.
+
+    Each segment is named `<prefix>-<start time>-<index>.jsonl.<ext>` and is
+    closed once `max_bytes` of uncompressed data have been written to it.
+    Completed segments are passed to `on_segment_closed`, e.g. an uploader.
+
+    Attributes:
+        directory: Directory the segments are written to
+        segments: Paths of all segments closed so far
+    """
+
+    EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str,
+        *,
+        compression: str = TRANSCRIPT_CONFIG["compression"],
+        max_bytes: int = TRANSCRIPT_CONFIG["segment_max_bytes"],
+        on_segment_closed: Callable[[str], None] | None = None,
+    ):
+        if compression not in self.EXTENSIONS:
+            raise ValueError(f"Unknown transcript compression: {compression}")
+        self.directory = directory
+        self.segments: list[str] = []
+        self._prefix = prefix
+        self._compression = compression
+        self._max_bytes = max_bytes
+        self._on_segment_closed = on_segment_closed
+        self._started = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        self._index = 0
+        self._file = None
+        self._path: str | None = None
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write_batch(self, records: list[TranscriptRecord]):
+        for record in records:
+            if self._file is None:
+                self._open_segment()
+            data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            self._file.write(data)
+            self._bytes += len(data)
+            if self._bytes >= self._max_bytes:
+                self._close_segment()
+
+    def close(self):
+        self._close_segment()
+
+    def _open_segment(self):
+        ext = self.EXTENSIONS[self._compression]
+        name = f"{self._prefix}-{self._started}-{self._index:05d}.jsonl.{ext}"
+        self._path = os.path.join(self.directory, name)
+        self._file = _open_compressed(self._path, self._compression)
+        self._bytes = 0
+        self._index += 1
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        path = self._path
+        self._file = None
+        self._path = None
+        self.segments.append(path)
+        if self._on_segment_closed:
+            self._on_segment_closed(path)
+
+
+class LocalObjectStore:
+    """Filesystem stand-in for an S3-compatible bucket, for offline runs.
+
+    Implements the subset of the boto3 S3 client used by `S3Uploader`.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def upload_file(self, filename: str, bucket: str, key: str):
+        dest = os.path.join(self.root, bucket, key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(filename, dest)
+
+
+class S3Uploader:
+    """Uploads closed transcript segments to an S3-compatible bucket.
+
+    Pass `endpoint_url` to target MinIO or another S3-compatible service, or
+    a `client` such as `LocalObjectStore` to run without network access.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        prefix: str = TRANSCRIPT_CONFIG["bucket_prefix"],
+        endpoint_url: str | None = None,
+        client=None,
+        delete_after_upload: bool = True,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._delete_after_upload = delete_after_upload
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise Exception(
+                    "boto3 is required to upload transcripts to S3. "
+                    "Install it with `pip install boto3`."
+                ) from e
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self._client = client
+
+    def __call__(self, path: str):
+        self.upload(path)
+
+    def upload(self, path: str):
+        key = os.path.basename(path)
+        if self.prefix:
+            key = f"{self.prefix}/{key}"
+        try:
+            self._client.upload_file(path, self.bucket, key)
+            log.debug("transcript_segment_uploaded", path, key)
+        except Exception as e:
+            # Keep the local segment so it can be re-uploaded later
+            log.error("transcript_upload_error", path, e)
+            return
+        if self._delete_after_upload:
+            os.remove(path)
+
+
+def create_transcript_sinks(session_id: str | None) -> list[TranscriptSink]:
+    """Build the sinks configured through the environment for one session.
+
+    `TRANSCRIPT_DIR` enables compressed rolling JSONL segments, or a plain
+    JSONL file with `TRANSCRIPT_COMPRESSION=none`. `TRANSCRIPT_BUCKET`
+    additionally uploads each closed segment or file.
+    """
+    directory = os.getenv(ENV_VARS["TRANSCRIPT_DIR"])
+    if not directory:
+        return []
+    compression = os.getenv(
+        ENV_VARS["TRANSCRIPT_COMPRESSION"], TRANSCRIPT_CONFIG["compression"]
+    )
+
+    uploader = None
+    bucket = os.getenv(ENV_VARS["TRANSCRIPT_BUCKET"])
+    if bucket:
+        uploader = S3Uploader(
+            bucket, endpoint_url=os.getenv(ENV_VARS["TRANSCRIPT_S3_ENDPOINT_URL"])
+        )
+
+    prefix = session_id or "session"
+    if compression == "none":
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{prefix}.jsonl")
+        return [JSONLSink(path, on_closed=uploader)]
+    return [
+        RollingCompressedSink(
+            directory,
+            prefix,
+            compression=compression,
+            on_segment_closed=uploader,
+        )
+    ]
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import tempfile
+from collections import deque
+from collections.abc import Iterator
+
+from pipecat.frames.frames import TranscriptionMessage
+
+from config import TRANSCRIPT_CONFIG
+
+
+class StoredMessage:
+    """Compact transcript message kept by `TranscriptStore`."""
+
+    __slots__ = ("role", "content", "timestamp")
+
+    def __init__(self, role: str, content: str, timestamp: str | None = None):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_message(cls, message: TranscriptionMessage) -> "StoredMessage":
+        return cls(message.role, message.content, message.timestamp)
+
+    def to_dict(self) -> dict:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp,
+        }
+
+    def __repr__(self) -> str:
+        return f"StoredMessage(role={self.role!r}, timestamp={self.timestamp!r})"
+
+
+class TranscriptStore:
+    """Transcript message store with bounded memory use.
+
+    Keeps the most recent `max_in_memory` messages in memory. Once that limit
+    is exceeded, the oldest `spill_batch_size` messages are appended to a JSONL
+    spill file in a worker thread. `iter_all()` lazily reads the spilled
+    messages back before yielding the in-memory ones, so the full transcript
+    is available without holding it in memory.
+
+    Attributes:
+        spill_path: Path of the spill file, created on first spill
+        spilled: Number of messages written to the spill file
+    """
+
+    def __init__(
+        self,
+        *,
+        max_in_memory: int = TRANSCRIPT_CONFIG["max_in_memory_messages"],
+        spill_batch_size: int = TRANSCRIPT_CONFIG["spill_batch_size"],
+        spill_path: str | None = None,
+    ):
+        self.spill_path: str | None = spill_path
+        self.spilled = 0
+        self._max_in_memory = max_in_memory
+        self._spill_batch_size = max(1, min(spill_batch_size, max_in_memory))
+        self._recent: deque[StoredMessage] = deque()
+        self._owns_spill_file = spill_path is None
+        self._spill_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._recent)
+
+    def __iter__(self) -> Iterator[StoredMessage]:
+        return self.iter_all()
+
+    async def append(self, message: TranscriptionMessage | StoredMessage):
+        """Add a message, spilling the oldest ones if over the memory limit."""
+        if not isinstance(message, StoredMessage):
+            message = StoredMessage.from_message(message)
+        self._recent.append(message)
+        if len(self._recent) > self._max_in_memory:
+            # Serialize spills so batches land in the file in order
+            async with self._spill_lock:
+                if len(self._recent) <= self._max_in_memory:
+                    return
+                batch = [self._recent.popleft() for _ in range(self._spill_batch_size)]
+                await asyncio.to_thread(self._spill, batch)
+
+    def recent(self) -> list[StoredMessage]:
+        """Return the messages currently held in memory, oldest first."""
+        return list(self._recent)
+
+    def iter_all(self) -> Iterator[StoredMessage]:
+        """Iterate over the full transcript, reading spilled messages lazily."""
+        if self.spilled and self.spill_path:
+            with open(self.spill_path, encoding="utf-8") as f:
+                for line in f:
+                    yield StoredMessage(**json.loads(line))
+        yield from list(self._recent)
+
+    def close(self):
+        """Remove the spill file if the store created it."""
+        if self._owns_spill_file and self.spill_path:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            self.spill_path = None
+        self.spilled = 0
+        self._recent.clear()
+
+    def _spill(self, batch: list[StoredMessage]):
+        if self.spill_path is None:
+            fd, self.spill_path = tempfile.mkstemp(
+                prefix="transcript-", suffix=".jsonl"
+            )
+            os.close(fd)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write(
+                "".join(
+                    json.dumps(m.to_dict(), ensure_ascii=False) + "\n" for m in batch
+                )
+            )
+        self.spilled += len(batch)
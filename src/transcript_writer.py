@@ -0,0 +1,119 @@
+import asyncio
+from collections import deque
+
+from config import TRANSCRIPT_CONFIG
+from structured_logging import log
+from transcript_sinks import TranscriptRecord, TranscriptSink
+
+
+class TranscriptWriter:
+    """Buffers transcript records in memory and hands them to sinks in batches.
+
+    A background task flushes the buffer once `batch_size` records are queued
+    or every `flush_interval` seconds, running the sinks in a worker thread so
+    the event loop never blocks on disk or network I/O. The buffer holds at
+    most `max_buffered` records; when it is full the `overflow_policy` either
+    makes producers wait for the next flush ("wait") or discards the oldest
+    record ("drop_oldest").
+
+    Attributes:
+        sinks: Sinks every batch is written to
+        dropped: Number of records discarded by the "drop_oldest" policy
+    """
+
+    def __init__(
+        self,
+        sinks: list[TranscriptSink],
+        *,
+        batch_size: int = TRANSCRIPT_CONFIG["flush_batch_size"],
+        flush_interval: float = TRANSCRIPT_CONFIG["flush_interval"],
+        max_buffered: int = TRANSCRIPT_CONFIG["max_buffered_records"],
+        overflow_policy: str = TRANSCRIPT_CONFIG["overflow_policy"],
+    ):
+        if overflow_policy not in ("wait", "drop_oldest"):
+            raise ValueError(f"Unknown transcript overflow policy: {overflow_policy}")
+        self.sinks = sinks
+        self.dropped = 0
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_buffered = max_buffered
+        self._overflow_policy = overflow_policy
+        self._buffer: deque[TranscriptRecord] = deque()
+        self._batch_ready = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    async def write(self, record: TranscriptRecord):
+        """Queue a record for the next batch."""
+        if self._closed:
+            raise RuntimeError("TranscriptWriter is closed")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+        while len(self._buffer) >= self._max_buffered:
+            if self._overflow_policy == "drop_oldest":
+                self._buffer.popleft()
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % self._max_buffered == 0:
+                    log.warning("transcript_dropped", self.dropped)
+                break
+            self._space_available.clear()
+            self._batch_ready.set()
+            await self._space_available.wait()
+
+        self._buffer.append(record)
+        if len(self._buffer) >= self._batch_size:
+            self._batch_ready.set()
+
+    async def flush(self):
+        """Write out everything currently buffered."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            records = list(self._buffer)
+            self._buffer.clear()
+            self._space_available.set()
+            await asyncio.to_thread(self._write_batch, records)
+
+    async def close(self):
+        """Stop the background task, flush remaining records and close sinks."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task:
+            # Let the writer finish its current batch and exit on its own
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        await asyncio.to_thread(self._close_sinks)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._batch_ready.wait(), timeout=self._flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+            if self._closed:
+                return
+
+    def _write_batch(self, records: list[TranscriptRecord]):
+        for sink in self.sinks:
+            try:
+                sink.write_batch(records)
+            except Exception as e:
+                log.error("transcript_sink_error", sink, e)
+
+    def _close_sinks(self):
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                log.error("transcript_sink_error", sink, e)
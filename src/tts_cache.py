@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import aiohttp
+from pipecat.frames.frames import (
+    DataFrame,
+    Frame,
+    StartFrame,
+    TTSAudioRawFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TTSTextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from audio_buffers import frame_views
+from config import ENV_VARS, TTS_CACHE_CONFIG
+from service_factory import CARTESIA_VERSION
+from structured_logging import log
+
+CARTESIA_BYTES_URL = "https://api.cartesia.ai/tts/bytes"
+
+# Cartesia (model, voice_id) a phrase is spoken with
+Voice = tuple[str, str]
+CacheKey = tuple[str, str, str, int]
+
+
+class TTSAudioCache:
+    """LRU cache of synthesized PCM audio for fixed phrases.
+
+    Entries are keyed by the Cartesia model and voice, the text and the
+    sample rate, so each session only gets audio in its own TTS's voice.
+    Lookups only read memory. When `cache_dir` is set, audio is also
+    persisted there so it survives restarts; the files are read and written
+    in a thread, when preloading or filling the cache. Missing phrases are
+    synthesized through Cartesia's HTTP endpoint, outside of any pipeline, so
+    filling the cache never delays a live call.
+
+    Attributes:
+        hits: Number of lookups served from the cache
+        misses: Number of lookups that were not cached
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = TTS_CACHE_CONFIG["max_entries"],
+        cache_dir: str | None = None,
+        api_key: str | None = None,
+    ):
+        self.hits = 0
+        self.misses = 0
+        self._max_entries = max_entries
+        self._cache_dir = cache_dir
+        self._api_key = api_key
+        self._entries: OrderedDict[CacheKey, bytes] = OrderedDict()
+        self._inflight: dict[CacheKey, asyncio.Task] = {}
+        self._session: aiohttp.ClientSession | None = None
+        self._preloaded: set[Voice] = set()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, voice: Voice, text: str, sample_rate: int) -> CacheKey:
+        return (*voice, text, sample_rate)
+
+    def get(self, voice: Voice, text: str, sample_rate: int) -> bytes | None:
+        """Return cached audio for `text` in `voice`, or None."""
+        key = self.key(voice, text, sample_rate)
+        audio = self._entries.get(key)
+        if audio is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return audio
+
+    def fill_in_background(self, voice: Voice, text: str, sample_rate: int):
+        """Load or synthesize `text` in the background so later lookups hit."""
+        key = self.key(voice, text, sample_rate)
+        if key in self._inflight:
+            return
+        task = asyncio.create_task(self._load_or_synthesize(key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def preload(
+        self,
+        voices: list[Voice],
+        phrases: list[str] = TTS_CACHE_CONFIG["preload_phrases"],
+        sample_rate: int = TTS_CACHE_CONFIG["sample_rate"],
+    ):
+        """Make sure every phrase is cached in every voice, once per voice."""
+        keys = [
+            self.key(voice, phrase, sample_rate)
+            for voice in voices
+            if voice not in self._preloaded
+            for phrase in phrases
+        ]
+        self._preloaded.update(voices)
+        await asyncio.gather(
+            *(self._load_or_synthesize(key) for key in keys if key not in self._entries)
+        )
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _load_or_synthesize(self, key: CacheKey):
+        audio = await asyncio.to_thread(self._read_from_disk, key)
+        if audio is None:
+            try:
+                audio = await self._synthesize(key)
+            except Exception as e:
+                log.warning("tts_cache_synthesis_error", key[2], e)
+                return
+            await asyncio.to_thread(self._write_to_disk, key, audio)
+        self._store(key, audio)
+
+    async def _synthesize(self, key: CacheKey) -> bytes:
+        model, voice_id, text, sample_rate = key
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        payload = {
+            "model_id": model,
+            "transcript": text,
+            "voice": {"mode": "id", "id": voice_id},
+            "output_format": {
+                "container": "raw",
+                "encoding": "pcm_s16le",
+                "sample_rate": sample_rate,
+            },
+        }
+        headers = {
+            "Cartesia-Version": CARTESIA_VERSION,
+            "X-API-Key": self._api_key or "",
+        }
+        async with self._session.post(
+            CARTESIA_BYTES_URL, json=payload, headers=headers
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    def _store(self, key: CacheKey, audio: bytes):
+        self._entries[key] = audio
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: CacheKey) -> str | None:
+        if not self._cache_dir:
+            return None
+        model, voice_id, text, sample_rate = key
+        digest = hashlib.sha256(
+            f"{model}|{voice_id}|{sample_rate}|{text}".encode()
+        ).hexdigest()
+        return os.path.join(self._cache_dir, f"{digest}.pcm")
+
+    def _read_from_disk(self, key: CacheKey) -> bytes | None:
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _write_to_disk(self, key: CacheKey, audio: bytes):
+        path = self._disk_path(key)
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class CachedSpeechTextFrame(DataFrame):
+    """Carries the text of cached speech past the TTS service.
+
+    A `TTSTextFrame` pushed in front of the TTS service would be synthesized
+    again, so `TTSCacheProcessor` sends this instead and
+    `CachedSpeechTextRelay` turns it back into a `TTSTextFrame` after the TTS.
+    """
+
+    text: str
+
+
+class TTSCacheProcessor(FrameProcessor):
+    """Serves `TTSSpeakFrame`s from a `TTSAudioCache` in front of the TTS.
+
+    Phrases are looked up in `voice`, the model and voice of the session's
+    Cartesia TTS. On a hit the cached audio is pushed directly and the TTS
+    service is skipped. On a miss the frame goes to the TTS as usual and the
+    phrase is synthesized in the background for next time. Without a voice,
+    as with a TTS other than Cartesia, every frame goes to the TTS.
+    """
+
+    def __init__(self, cache: TTSAudioCache, voice: Voice | None, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+        self._voice = voice
+        self._sample_rate = TTS_CACHE_CONFIG["sample_rate"]
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, StartFrame):
+            self._sample_rate = frame.audio_out_sample_rate or self._sample_rate
+        elif isinstance(frame, TTSSpeakFrame) and self._voice:
+            audio = self._cache.get(self._voice, frame.text, self._sample_rate)
+            if audio is not None:
+                log.debug("tts_cache_hit", frame.text)
+                await self._push_cached_audio(frame.text, audio)
+                return
+            log.debug("tts_cache_miss", frame.text)
+            self._cache.fill_in_background(self._voice, frame.text, self._sample_rate)
+
+        await self.push_frame(frame, direction)
+
+    async def _push_cached_audio(self, text: str, audio: bytes):
+        # 16-bit mono PCM
+        chunk_size = int(self._sample_rate * TTS_CACHE_CONFIG["chunk_seconds"]) * 2
+        await self.push_frame(TTSStartedFrame())
+        for chunk in frame_views(audio, chunk_size):
+            await self.push_frame(
+                TTSAudioRawFrame(
+                    audio=chunk,
+                    sample_rate=self._sample_rate,
+                    num_channels=1,
+                )
+            )
+        await self.push_frame(TTSStoppedFrame())
+        await self.push_frame(CachedSpeechTextFrame(text))
+
+
+class CachedSpeechTextRelay(FrameProcessor):
+    """Turns `CachedSpeechTextFrame`s back into `TTSTextFrame`s after the TTS.
+
+    This way cached speech still reaches the transcript and the context.
+    """
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, CachedSpeechTextFrame):
+            await self.push_frame(TTSTextFrame(frame.text), direction)
+        else:
+            await self.push_frame(frame, direction)
+
+
+_tts_cache: TTSAudioCache | None = None
+
+
+def get_tts_cache() -> TTSAudioCache:
+    """Return the process-wide TTS audio cache, creating it on first use."""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSAudioCache(
+            cache_dir=os.getenv(ENV_VARS["TTS_CACHE_DIR"]),
+            api_key=os.getenv(ENV_VARS["CARTESIA_API_KEY"]),
+        )
+    return _tts_cache
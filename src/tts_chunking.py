@@ -0,0 +1,105 @@
+import re
+import time
+
+from pipecat.utils.string import match_endofsentence
+from pipecat.utils.text.base_text_aggregator import BaseTextAggregator
+
+from config import TTS_CHUNKING_CONFIG
+
+# A clause mark followed by whitespace, so "1,000" is not split
+CLAUSE_BOUNDARY = re.compile(r"[,;:–—](?=\s)")
+
+
+class EarlyFlushTextAggregator(BaseTextAggregator):
+    """Splits streamed LLM text into TTS chunks, flushing the first one early.
+
+    Pipecat's default aggregator waits for a full sentence, so a long first
+    sentence delays the first audio of every response. Here the first chunk
+    of a response is flushed at the first clause boundary after
+    `min_words`, at a word boundary after `max_words`, or once `timeout`
+    seconds have passed since its first token. After that, chunks are whole
+    sentences, which synthesize with better prosody.
+
+    The timeout is checked as tokens arrive, which for a streaming LLM is
+    every few tens of milliseconds.
+
+    Attributes:
+        flushes: Number of first chunks flushed for each reason
+    """
+
+    def __init__(
+        self,
+        *,
+        min_words: int = TTS_CHUNKING_CONFIG["first_chunk_min_words"],
+        max_words: int = TTS_CHUNKING_CONFIG["first_chunk_max_words"],
+        timeout: float = TTS_CHUNKING_CONFIG["first_chunk_timeout"],
+    ):
+        self.flushes = {"sentence": 0, "clause": 0, "words": 0, "timeout": 0}
+        self._min_words = min_words
+        self._max_words = max_words
+        self._timeout = timeout
+        self._text = ""
+        self._first = True
+        self._started: float | None = None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    async def aggregate(self, text: str) -> str | None:
+        self._text += text
+        if self._first:
+            return self._first_chunk(time.monotonic())
+
+        eos = match_endofsentence(self._text)
+        if eos:
+            return self._take(eos)
+        return None
+
+    async def handle_interruption(self):
+        await self.reset()
+
+    async def reset(self):
+        """Start over; the next chunk is the first of a new response."""
+        self._text = ""
+        self._first = True
+        self._started = None
+
+    def _first_chunk(self, now: float) -> str | None:
+        if self._started is None:
+            self._started = now
+
+        eos = match_endofsentence(self._text)
+        if eos:
+            return self._take_first(eos, "sentence")
+
+        for match in reversed(list(CLAUSE_BOUNDARY.finditer(self._text))):
+            end = match.end()
+            if len(self._text[:end].split()) >= self._min_words:
+                return self._take_first(end, "clause")
+
+        # Only complete words; the last one may still be streaming
+        end = self._text.rstrip().rfind(" ")
+        if end <= 0 or not self._text[:end].strip():
+            return None
+        if len(self._text[:end].split()) >= self._max_words:
+            return self._take_first(end, "words")
+        if now - self._started >= self._timeout:
+            return self._take_first(end, "timeout")
+        return None
+
+    def _take_first(self, end: int, reason: str) -> str:
+        self._first = False
+        self.flushes[reason] += 1
+        return self._take(end)
+
+    def _take(self, end: int) -> str:
+        chunk, self._text = self._text[:end], self._text[end:]
+        return chunk
+
+
+def create_text_aggregator(
+    early_flush: bool = TTS_CHUNKING_CONFIG["early_flush"],
+) -> BaseTextAggregator | None:
+    """Return the aggregator for a TTS service, or None for pipecat's default."""
+    return EarlyFlushTextAggregator() if early_flush else None
@@ -0,0 +1,312 @@
+import math
+import os
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+import numpy as np
+from pipecat.audio.turn.base_turn_analyzer import BaseTurnAnalyzer, EndOfTurnState
+from pipecat.audio.turn.smart_turn.base_smart_turn import SmartTurnParams
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+)
+from pipecat.metrics.metrics import SmartTurnMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from config import ENV_VARS, TURN_CONFIG
+from latency_metrics import LatencyHistogram
+from speculative_llm import normalize_transcript
+from structured_logging import log
+
+if TYPE_CHECKING:
+    from vad_pool import VADModelPool
+
+CONTINUATION_WORDS = frozenset(TURN_CONFIG["continuation_words"].split())
+FILLER_WORDS = frozenset(TURN_CONFIG["filler_words"].split())
+
+# Prosody is measured over frames of this length
+PROSODY_FRAME_MS = 40
+# Pitch range searched for, in Hz
+MIN_PITCH = 60
+MAX_PITCH = 400
+# Frames quieter than this share of the loudest one count as silence
+SILENCE_RATIO = 0.1
+# A pitch change of this many octaves maps to a feature value of 1
+PITCH_FALL_OCTAVES = 0.5
+
+
+def text_features(text: str) -> dict[str, float]:
+    """Features of the transcript so far; punctuation is Deepgram's."""
+    words = normalize_transcript(text).split()
+    if not words:
+        return {"no_transcript": 1.0}
+    text = text.rstrip()
+    trailing_pause = text.endswith((",", "...", "-"))
+    return {
+        "terminal_punctuation": float(
+            text.endswith((".", "?", "!")) and not trailing_pause
+        ),
+        "trailing_continuation": float(words[-1] in CONTINUATION_WORDS),
+        "trailing_filler": float(words[-1] in FILLER_WORDS or trailing_pause),
+    }
+
+
+def prosody_features(
+    audio: np.ndarray, sample_rate: int, window_secs: float
+) -> dict[str, float]:
+    """Energy and pitch fall over the last `window_secs` of voiced audio.
+
+    Both are in [-1, 1]; a falling level and a falling pitch, as at the end
+    of a statement, are positive. Trailing silence is skipped.
+    """
+    frame = sample_rate * PROSODY_FRAME_MS // 1000
+    count = len(audio) // frame
+    if count < 4:
+        return {}
+    frames = audio[len(audio) - count * frame :].reshape(count, frame)
+    frames = frames.astype(np.float32) / 32768
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    loud = np.flatnonzero(rms >= rms.max() * SILENCE_RATIO)
+    if not len(loud):
+        return {}
+    last = loud[-1] + 1
+    first = max(0, last - round(window_secs * 1000 / PROSODY_FRAME_MS))
+    frames, rms = frames[first:last], rms[first:last]
+    count = len(rms)
+    if count < 4:
+        return {}
+
+    tail = rms[-max(1, count // 4) :].mean()
+    energy_fall = float(np.clip(1 - tail / (rms.mean() + 1e-9), -1, 1))
+
+    # Autocorrelation pitch estimate for every frame at once
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(frames, 2 * frame, axis=1)
+    autocorr = np.fft.irfft(spectrum.real**2 + spectrum.imag**2, axis=1)
+    low, high = sample_rate // MAX_PITCH, min(sample_rate // MIN_PITCH, frame - 1)
+    lags = np.argmax(autocorr[:, low:high], axis=1) + low
+    strength = autocorr[np.arange(count), lags] / (autocorr[:, 0] + 1e-9)
+    voiced = np.flatnonzero(strength > 0.4)
+    pitch_fall = 0.0
+    if len(voiced) >= 3:
+        octaves = np.log2(sample_rate / lags[voiced])
+        slope = np.polyfit(voiced, octaves, 1)[0]
+        change = slope * (voiced[-1] - voiced[0])
+        pitch_fall = float(np.clip(-change / PITCH_FALL_OCTAVES, -1, 1))
+    return {"energy_fall": energy_fall, "pitch_fall": pitch_fall}
+
+
+class SemanticTurnParams(SmartTurnParams):
+    """Parameters of `SemanticTurnAnalyzer`.
+
+    `stop_secs` is the longest silence waited for after the VAD stop, for a
+    turn that sounds unfinished; `min_stop_secs` the shortest, for one that
+    is clearly complete.
+    """
+
+    stop_secs: float = TURN_CONFIG["max_stop_secs"]
+    min_stop_secs: float = TURN_CONFIG["min_stop_secs"]
+    prosody_window_secs: float = TURN_CONFIG["prosody_window_secs"]
+
+
+class SemanticTurnAnalyzer(BaseTurnAnalyzer):
+    """Ends the user's turn on whether it sounds finished, not just on silence.
+
+    A small logistic model scores the transcript so far and the prosody of
+    the last speech. Once the VAD reports silence, the turn ends after a
+    further silence between `min_stop_secs` and `stop_secs`: the likelier the
+    turn is complete, the shorter the wait. The score is recomputed when a new
+    transcript arrives, so a final transcript ending in a full stop can end a
+    turn that was waiting. Transcripts come from `TurnTranscriptTap`; without
+    them the turn is scored on prosody alone.
+
+    Runs on the CPU in about a millisecond per score, and scores only when
+    the transcript or speech has changed.
+
+    Attributes:
+        turns: Number of turns ended
+        silence: Silence waited after the VAD stop per turn, in ms
+        score_time: Time to compute a score, in ms
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int | None = None,
+        params: SemanticTurnParams | None = None,
+        weights: dict[str, float] | None = None,
+    ):
+        super().__init__(sample_rate=sample_rate)
+        self.turns = 0
+        self.silence = LatencyHistogram()
+        self.score_time = LatencyHistogram()
+        self._params = params or SemanticTurnParams()
+        self._weights = weights or TURN_CONFIG["weights"]
+        self._speech_triggered = False
+        self._silence_ms = 0.0
+        self._speech: deque[np.ndarray] = deque()
+        self._speech_samples = 0
+        self._finals: list[str] = []
+        self._interim = ""
+        self._score: float | None = None
+
+    @property
+    def speech_triggered(self) -> bool:
+        return self._speech_triggered
+
+    @property
+    def params(self) -> SemanticTurnParams:
+        return self._params
+
+    @property
+    def text(self) -> str:
+        return " ".join([*self._finals, self._interim]).strip()
+
+    def observe_transcript(self, text: str, final: bool):
+        if final:
+            self._finals.append(text)
+            self._interim = ""
+        else:
+            self._interim = text
+        self._score = None
+
+    def append_audio(self, buffer: bytes, is_speech: bool) -> EndOfTurnState:
+        samples = np.frombuffer(buffer, dtype=np.int16)
+        if is_speech:
+            if not self._speech_triggered:
+                # A new turn; transcripts of the previous one are done
+                self._finals = []
+                self._interim = ""
+            self._speech_triggered = True
+            self._silence_ms = 0.0
+            self._append_speech(samples)
+            self._score = None
+        elif self._speech_triggered:
+            self._silence_ms += len(samples) * 1000 / self.sample_rate
+            if self._silence_ms >= self.stop_ms():
+                self._end_turn()
+                return EndOfTurnState.COMPLETE
+        return EndOfTurnState.INCOMPLETE
+
+    async def analyze_end_of_turn(self) -> tuple[EndOfTurnState, SmartTurnMetricsData]:
+        start = time.perf_counter()
+        score = self.score()
+        elapsed = (time.perf_counter() - start) * 1000
+        state = EndOfTurnState.INCOMPLETE
+        if self._speech_triggered and self._silence_ms >= self.stop_ms():
+            self._end_turn()
+            state = EndOfTurnState.COMPLETE
+        metrics = SmartTurnMetricsData(
+            processor=self.__class__.__name__,
+            is_complete=state == EndOfTurnState.COMPLETE,
+            probability=score,
+            inference_time_ms=elapsed,
+            server_total_time_ms=0.0,
+            e2e_processing_time_ms=elapsed,
+        )
+        return state, metrics
+
+    def clear(self):
+        self._speech_triggered = False
+        self._silence_ms = 0.0
+        self._speech.clear()
+        self._speech_samples = 0
+        self._score = None
+
+    def score(self) -> float:
+        """Probability that the user has finished their turn."""
+        if self._score is None:
+            start = time.perf_counter()
+            features = self.features()
+            z = self._weights["bias"] + sum(
+                self._weights[name] * value for name, value in features.items()
+            )
+            self._score = 1 / (1 + math.exp(-z))
+            self.score_time.record((time.perf_counter() - start) * 1000)
+        return self._score
+
+    def features(self) -> dict[str, float]:
+        features = text_features(self.text)
+        if self._speech and self.sample_rate:
+            audio = np.concatenate(self._speech)
+            features.update(
+                prosody_features(
+                    audio, self.sample_rate, self._params.prosody_window_secs
+                )
+            )
+        return features
+
+    def stop_ms(self) -> float:
+        """Silence after the VAD stop that ends the turn at its current score."""
+        params = self._params
+        stop_secs = params.stop_secs - self.score() * (
+            params.stop_secs - params.min_stop_secs
+        )
+        return stop_secs * 1000
+
+    def as_dict(self) -> dict:
+        return {
+            "turns": self.turns,
+            "silence_ms": self.silence.as_dict(),
+            "score_ms": self.score_time.as_dict(),
+        }
+
+    def _append_speech(self, samples: np.ndarray):
+        # Keep twice the prosody window, as the VAD still reports speech for
+        # a while after the user stops
+        keep = int(2 * self._params.prosody_window_secs * self.sample_rate)
+        self._speech.append(samples)
+        self._speech_samples += len(samples)
+        while len(self._speech) > 1 and (
+            self._speech_samples - len(self._speech[0]) >= keep
+        ):
+            self._speech_samples -= len(self._speech.popleft())
+
+    def _end_turn(self):
+        self.turns += 1
+        self.silence.record(self._silence_ms)
+        log.debug("turn_end", self._silence_ms, self.score())
+        self.clear()
+
+
+class TurnTranscriptTap(FrameProcessor):
+    """Feeds STT transcripts to a `SemanticTurnAnalyzer`.
+
+    Placed right after the STT service; frames pass through unchanged.
+    """
+
+    def __init__(self, analyzer: SemanticTurnAnalyzer, **kwargs):
+        super().__init__(**kwargs)
+        self._analyzer = analyzer
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InterimTranscriptionFrame):
+            self._analyzer.observe_transcript(frame.text, final=False)
+        elif isinstance(frame, TranscriptionFrame):
+            self._analyzer.observe_transcript(frame.text, final=True)
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        log.info("turn_stats", self._analyzer.as_dict())
+
+
+def create_turn_analyzers(
+    vad_pool: "VADModelPool",
+) -> tuple[VADAnalyzer, SemanticTurnAnalyzer | None]:
+    """Return the VAD and turn analyzers for a session's transport.
+
+    With SEMANTIC_TURN set, the VAD stops after a short silence and
+    `SemanticTurnAnalyzer` decides when the turn ends; otherwise the turn
+    ends on the VAD's own silence timeout.
+    """
+    if not os.getenv(ENV_VARS["SEMANTIC_TURN"]):
+        return vad_pool.create_analyzer(), None
+    vad_params = VADParams(stop_secs=TURN_CONFIG["vad_stop_secs"])
+    return vad_pool.create_analyzer(params=vad_params), SemanticTurnAnalyzer()
@@ -0,0 +1,215 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from importlib import resources
+
+import numpy as np
+from pipecat.audio.vad.silero import SileroOnnxModel
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+from audio_buffers import AudioBufferPool
+from config import AUDIO_CONFIG, ENV_VARS, VAD_CONFIG
+from structured_logging import log
+
+SILERO_MODEL_PACKAGE = "pipecat.audio.vad.data"
+SILERO_MODEL_NAME = "silero_vad.onnx"
+
+
+class SileroState(SileroOnnxModel):
+    """Per-call Silero recurrent state bound to a borrowed ONNX session.
+
+    Reuses `SileroOnnxModel.__call__` for inference but skips loading the
+    model; the pool swaps a shared `InferenceSession` in before each call.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.sample_rates = [8000, 16000]
+        self.reset_states()
+
+
+class VADModelPool:
+    """Process-wide pool of Silero ONNX inference sessions.
+
+    Loading the Silero model allocates a new ONNX session, which is the most
+    expensive part of creating a `SileroVADAnalyzer`. The pool loads a bounded
+    number of sessions once per process and lends them out for the duration of
+    a single inference, while each call keeps its own lightweight state.
+
+    Attributes:
+        size: Number of ONNX sessions held by the pool
+    """
+
+    def __init__(self, size: int):
+        """Initialize an empty pool.
+
+        Args:
+            size: Number of ONNX sessions to load on `preload()`
+        """
+        self.size = size
+        self._sessions: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._loaded = False
+        self._acquisitions = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._slow_waits = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def preload(self):
+        """Load all ONNX sessions. Safe to call more than once."""
+        with self._load_lock:
+            if self._loaded:
+                return
+            start = time.perf_counter()
+            model_path = str(
+                resources.files(SILERO_MODEL_PACKAGE).joinpath(SILERO_MODEL_NAME)
+            )
+            for _ in range(self.size):
+                model = SileroOnnxModel(model_path, force_onnx_cpu=True)
+                self._sessions.put_nowait(model.session)
+            self._loaded = True
+            log.info(
+                "vad_pool_loaded",
+                self.size,
+                time.perf_counter() - start,
+            )
+
+    def prime(self, frames: int):
+        """Run every ONNX session on silence at both supported sample rates.
+
+        The first inference on a session pays for memory allocation and
+        kernel selection inside onnxruntime; priming moves that off the
+        first call. Must run before sessions are lent out.
+        """
+        self.preload()
+        sessions = [self._sessions.get_nowait() for _ in range(self.size)]
+        try:
+            state = SileroState()
+            for session in sessions:
+                state.session = session
+                for sample_rate, num_samples in ((16000, 512), (8000, 256)):
+                    silence = np.zeros(num_samples, dtype=np.float32)
+                    for _ in range(frames):
+                        state(silence, sample_rate)
+                    state.reset_states()
+        finally:
+            for session in sessions:
+                self._sessions.put_nowait(session)
+
+    @contextmanager
+    def session(self):
+        """Borrow an ONNX session, blocking until one is free."""
+        if not self._loaded:
+            self.preload()
+        start = time.perf_counter()
+        session = self._sessions.get()
+        self._record_wait(time.perf_counter() - start)
+        try:
+            yield session
+        finally:
+            self._sessions.put_nowait(session)
+
+    def create_analyzer(
+        self, *, sample_rate: int | None = None, params: VADParams | None = None
+    ) -> "PooledSileroVADAnalyzer":
+        """Create a VAD analyzer for one call that draws from this pool."""
+        return PooledSileroVADAnalyzer(self, sample_rate=sample_rate, params=params)
+
+    def stats(self) -> dict:
+        """Return pool wait-time metrics, in seconds."""
+        with self._stats_lock:
+            acquisitions = self._acquisitions
+            return {
+                "size": self.size,
+                "available": self._sessions.qsize(),
+                "acquisitions": acquisitions,
+                "mean_wait": self._total_wait / acquisitions if acquisitions else 0.0,
+                "max_wait": self._max_wait,
+                "slow_waits": self._slow_waits,
+            }
+
+    def _record_wait(self, wait: float):
+        slow = wait > VAD_CONFIG["slow_wait_threshold"]
+        with self._stats_lock:
+            self._acquisitions += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            if slow:
+                self._slow_waits += 1
+        if slow:
+            log.warning("vad_pool_slow_wait", wait)
+
+
+class PooledSileroVADAnalyzer(VADAnalyzer):
+    """Silero VAD analyzer that borrows ONNX sessions from a `VADModelPool`.
+
+    Drop-in replacement for `SileroVADAnalyzer` in `DailyParams`. With
+    `zero_copy`, each window is converted to float into a reused buffer.
+    """
+
+    def __init__(
+        self,
+        pool: VADModelPool,
+        *,
+        sample_rate: int | None = None,
+        params: VADParams | None = None,
+    ):
+        super().__init__(sample_rate=sample_rate, params=params)
+        self._pool = pool
+        self._state = SileroState()
+        self._last_reset_time = 0.0
+        self._buffers = AudioBufferPool() if AUDIO_CONFIG["zero_copy"] else None
+
+    def set_sample_rate(self, sample_rate: int):
+        if sample_rate != 16000 and sample_rate != 8000:
+            raise ValueError(
+                "Silero VAD sample rate needs to be 16000 or 8000 "
+                f"(sample rate: {sample_rate})"
+            )
+        super().set_sample_rate(sample_rate)
+
+    def num_frames_required(self) -> int:
+        return 512 if self.sample_rate == 16000 else 256
+
+    def voice_confidence(self, buffer) -> float:
+        try:
+            audio_int16 = np.frombuffer(buffer, np.int16)
+            if self._buffers:
+                audio_float32 = self._buffers.get("window", len(audio_int16))
+                np.divide(audio_int16, 2**15, out=audio_float32, dtype=np.float32)
+            else:
+                audio_float32 = np.divide(audio_int16, 2**15, dtype=np.float32)
+            with self._pool.session() as session:
+                self._state.session = session
+                new_confidence = self._state(audio_float32, self.sample_rate)[0]
+                self._state.session = None
+
+            # Reset the recurrent state periodically to avoid drift
+            curr_time = time.time()
+            if curr_time - self._last_reset_time >= VAD_CONFIG["reset_states_time"]:
+                self._state.reset_states()
+                self._last_reset_time = curr_time
+
+            return new_confidence
+        except Exception as e:
+            log.error("vad_error", e)
+            return 0
+
+
+_vad_pool: VADModelPool | None = None
+
+
+def get_vad_pool() -> VADModelPool:
+    """Return the process-wide VAD pool, creating it on first use."""
+    global _vad_pool
+    if _vad_pool is None:
+        size = int(os.getenv(ENV_VARS["VAD_POOL_SIZE"], VAD_CONFIG["pool_size"]))
+        _vad_pool = VADModelPool(size)
+    return _vad_pool
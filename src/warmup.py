@@ -0,0 +1,82 @@
+import importlib
+import sys
+import time
+
+import numpy as np
+
+from config import WARMUP_CONFIG
+from loop_monitor import process_uptime
+from structured_logging import log
+from vad_pool import VADModelPool
+
+
+def warm_up(vad_pool: VADModelPool) -> dict:
+    """Pay every one-time startup cost before the first session arrives.
+
+    Imports the provider and transport modules, loads and primes the Silero
+    sessions, and primes the resampler, timing each step. Runs when the bot
+    module is imported at container start.
+
+    Returns:
+        Seconds spent per stage, the total, and the process uptime when
+        warm-up finished
+    """
+    stages = {}
+    start = time.perf_counter()
+
+    for name in WARMUP_CONFIG["modules"]:
+        if name in sys.modules:
+            continue
+        step = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            log.warning("warmup_import_error", name, e)
+            continue
+        stages[f"import:{name}"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    vad_pool.preload()
+    stages["vad_load"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    vad_pool.prime(WARMUP_CONFIG["vad_prime_frames"])
+    stages["vad_prime"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    _prime_resampler()
+    stages["resampler_prime"] = time.perf_counter() - step
+
+    report = {
+        "stages": stages,
+        "total": time.perf_counter() - start,
+        "process_uptime": process_uptime(),
+    }
+    log.info("warmup_completed", report["total"], stages)
+    return report
+
+
+async def warm_connections():
+    """Open provider connections and cache fixed phrases ahead of sessions.
+
+    Runs once when a worker or a local run starts, in the process that will
+    host the sessions, so the first session does not wait for it. Only the
+    OpenAI and Cartesia providers are warmed; stubs have nothing to open.
+    """
+    from service_factory import get_service_factory
+    from tts_cache import get_tts_cache
+
+    factory = get_service_factory()
+    await factory.warm()
+    voices = factory.tts_voices()
+    if voices:
+        await get_tts_cache().preload(voices)
+
+
+def _prime_resampler():
+    try:
+        import soxr
+    except ImportError:
+        return
+    for in_rate, out_rate in WARMUP_CONFIG["resample_rates"]:
+        soxr.resample(np.zeros(in_rate // 50, dtype=np.int16), in_rate, out_rate)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules in src/ import each other by name, as when run from there; the
+# local runner lives at the top level
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from websockets.protocol import State
+
+from service_factory import ConnectionPool, LocalConnection, create_local_pool
+
+
+@pytest.mark.asyncio
+async def test_warm_connections_are_reused():
+    pool = create_local_pool(max_idle=2)
+    await pool.warm()
+    assert pool.stats() == {"idle": 2, "hits": 0, "misses": 0}
+
+    conn = await pool.acquire()
+    await pool.release(conn)
+    assert await pool.acquire() is conn
+    assert pool.stats()["hits"] == 2
+    assert pool.stats()["misses"] == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_acquire_connects_when_nothing_is_idle():
+    pool = create_local_pool(max_idle=0)
+    conn = await pool.acquire()
+    assert conn.state is State.OPEN
+    assert pool.stats()["misses"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_release_beyond_max_idle_closes_the_connection():
+    pool = create_local_pool(max_idle=1)
+    first, second = LocalConnection(), LocalConnection()
+    await pool.release(first)
+    await pool.release(second)
+    assert pool.stats()["idle"] == 1
+    assert first.state is State.OPEN
+    assert second.state is State.CLOSED
+    await pool.close()
+    assert first.state is State.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_connection_closed_by_an_error_is_not_reused():
+    pool = create_local_pool(max_idle=2)
+    conn = LocalConnection()
+    # The provider closed the socket after an error mid-session
+    await conn.close()
+    await pool.release(conn)
+    assert pool.stats()["idle"] == 0
+    assert await pool.acquire() is not conn
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_idle_connections_are_dropped():
+    pool = create_local_pool(max_idle=1)
+    await pool.warm()
+    pool.ttl = 0
+    await pool.acquire()
+    # Stale connections are closed in the background
+    await asyncio.sleep(0)
+    assert pool.stats()["hits"] == 0
+    assert pool.stats()["misses"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_keeps_connections_that_opened():
+    attempts = 0
+
+    async def connect():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionError("refused")
+        return LocalConnection()
+
+    async def close(conn):
+        await conn.close()
+
+    pool = ConnectionPool(
+        "flaky",
+        connect,
+        is_open=lambda conn: conn.state is State.OPEN,
+        close=close,
+        max_idle=2,
+        ttl=60,
+    )
+    await pool.warm()
+    assert pool.stats()["idle"] == 1
+    await pool.close()
@@ -0,0 +1,88 @@
+import pytest
+
+from config import ROUTING_CONFIG
+from provider_registry import ProviderRegistry
+from service_factory import LLMRoute
+from stub_services import StubOpenAILLMService
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def create_llm(registry: ProviderRegistry, **options) -> StubOpenAILLMService:
+    routes = [
+        LLMRoute(spec["name"], None, "stub", {**spec, **options.get(spec["name"], {})})
+        for spec in registry.providers("llm")
+    ]
+    return StubOpenAILLMService(routes=routes, registry=registry)
+
+
+def samples(registry: ProviderRegistry, name: str) -> int:
+    return registry.health(name).as_dict()["samples"]
+
+
+@pytest.fixture
+def registry():
+    return ProviderRegistry(
+        {
+            "llm": [
+                {"name": "primary", "kind": "stub", "ttfb": 0.0},
+                {"name": "backup", "kind": "stub", "ttfb": 0.0},
+                {"name": "small", "kind": "stub", "ttfb": 0.0, "downgrade": True},
+            ]
+        },
+        downgrade=False,
+    )
+
+
+def test_downgrade_providers_need_the_flag(registry):
+    assert [s["name"] for s in registry.providers("llm")] == ["primary", "backup"]
+    with_downgrade = ProviderRegistry(
+        {"llm": [{"name": "small", "kind": "stub", "downgrade": True}]},
+        downgrade=True,
+    )
+    assert [s["name"] for s in with_downgrade.providers("llm")] == ["small"]
+
+
+@pytest.mark.asyncio
+async def test_primary_stays_first_when_slower(registry):
+    for _ in range(ROUTING_CONFIG["min_samples"]):
+        registry.record_success("primary", 2.0)
+        registry.record_success("backup", 0.1)
+
+    await create_llm(registry).open_chat_completions(None, MESSAGES)
+
+    assert samples(registry, "primary") == ROUTING_CONFIG["min_samples"] + 1
+    assert registry.in_order("llm")[0]["name"] == "primary"
+
+
+@pytest.mark.asyncio
+async def test_primary_is_skipped_during_its_cooldown(registry):
+    while registry.health("primary").healthy:
+        registry.record_error("primary")
+
+    await create_llm(registry).open_chat_completions(None, MESSAGES)
+
+    assert samples(registry, "backup") == 1
+    assert samples(registry, "primary") == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_first_token_is_not_failed_over(registry, monkeypatch):
+    monkeypatch.setitem(ROUTING_CONFIG, "llm_stall_timeout", 0.05)
+    llm = create_llm(registry, primary={"ttfb": 0.2})
+
+    await llm.open_chat_completions(None, MESSAGES)
+
+    assert samples(registry, "primary") == 1
+    assert samples(registry, "backup") == 0
+
+
+@pytest.mark.asyncio
+async def test_request_not_accepted_in_time_fails_over(registry, monkeypatch):
+    monkeypatch.setitem(ROUTING_CONFIG, "llm_stall_timeout", 0.05)
+    llm = create_llm(registry, primary={"stall": 1.0})
+
+    await llm.open_chat_completions(None, MESSAGES)
+
+    assert samples(registry, "backup") == 1
+    assert registry.health("primary").error_rate == 1.0
@@ -0,0 +1,20 @@
+import asyncio
+import json
+
+import pytest
+
+from profiler import SessionProfiler
+
+
+@pytest.mark.asyncio
+async def test_finish_writes_the_profile(tmp_path):
+    profiler = SessionProfiler("s1", [], directory=str(tmp_path))
+    profiler.start()
+    await asyncio.sleep(0.05)
+    await profiler.finish()
+
+    with open(tmp_path / "s1.json") as f:
+        summary = json.load(f)
+    assert summary["session_id"] == "s1"
+    assert summary["duration_seconds"] > 0
+    assert (tmp_path / "s1.folded").exists()
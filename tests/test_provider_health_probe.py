@@ -0,0 +1,30 @@
+import pytest
+from pipecat.frames.frames import ErrorFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from provider_registry import ProviderHealthProbe, ProviderRegistry
+
+
+@pytest.fixture
+def registry():
+    return ProviderRegistry({"tts": [{"name": "tts", "kind": "stub"}]})
+
+
+@pytest.mark.asyncio
+async def test_errors_the_service_reports_are_recorded(registry):
+    service = FrameProcessor(name="tts")
+    ProviderHealthProbe(registry, "tts", service)
+
+    await service.push_error(ErrorFrame("synthesis failed"))
+
+    assert registry.health("tts").error_rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_error_frames_from_other_processors_are_ignored(registry):
+    probe = ProviderHealthProbe(registry, "tts", FrameProcessor(name="tts"))
+
+    await probe.process_frame(ErrorFrame("transport failed"), FrameDirection.UPSTREAM)
+    await probe.process_frame(ErrorFrame("stt failed"), FrameDirection.DOWNSTREAM)
+
+    assert registry.health("tts").error_rate == 0.0
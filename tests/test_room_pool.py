@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import stat
+import time
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper
+
+import local_runner
+from local_runner import RoomPool
+from mock_daily_api import MockDailyAPI, start_mock_server
+
+PROPERTIES = {"enable_prejoin_ui": False}
+
+
+@pytest_asyncio.fixture
+async def daily():
+    api = MockDailyAPI(latency=0.0)
+    runner, url = await start_mock_server(api)
+    try:
+        async with aiohttp.ClientSession() as session:
+            helper = DailyRESTHelper(
+                daily_api_key="mock", daily_api_url=url, aiohttp_session=session
+            )
+            yield api, helper, session, url
+    finally:
+        await runner.cleanup()
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_acquire_hands_out_a_pooled_room_and_tops_up(daily):
+    api, helper, _, _ = daily
+    pool = RoomPool(helper, PROPERTIES, size=2)
+    await pool.fill()
+    pool.start()
+    try:
+        url, token = await pool.acquire()
+        assert url.startswith("https://mock.daily.co/")
+        assert token.startswith("mock-token-")
+        await wait_for(lambda: api.rooms_created == 3)
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_expiring_tokens_are_refreshed(daily):
+    api, helper, _, _ = daily
+    pool = RoomPool(helper, PROPERTIES, size=1, expiry_time=60, refresh_margin=30)
+    await pool.fill()
+    pool._rooms[0]["expires_at"] = time.time() + 10
+
+    await pool.fill()
+
+    assert api.rooms_created == 1
+    assert api.tokens_created == 2
+
+
+@pytest.mark.asyncio
+async def test_saved_pool_is_private_and_reloaded(daily, tmp_path):
+    api, helper, _, _ = daily
+    path = str(tmp_path / "rooms.json")
+    first = RoomPool(helper, PROPERTIES, size=2, store_path=path)
+    await first.fill()
+    await first.close()
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with open(path) as f:
+        assert len(json.load(f)) == 2
+
+    second = RoomPool(helper, PROPERTIES, size=2, store_path=path)
+    second.start()
+    try:
+        await second.acquire()
+        assert api.rooms_created == 2
+    finally:
+        await second.close()
+
+    other = RoomPool(helper, {"enable_prejoin_ui": True}, store_path=path)
+    other._load()
+    assert other._rooms == []
+
+
+@pytest.mark.asyncio
+async def test_room_pool_is_closed_with_its_session(daily, tmp_path, monkeypatch):
+    _, _, session, url = daily
+    monkeypatch.setenv("DAILY_API_KEY", "mock")
+    monkeypatch.setenv("DAILY_API_URL", url)
+    monkeypatch.setenv("DAILY_ROOM_POOL_FILE", str(tmp_path / "rooms.json"))
+    for name in ("BUCKET_NAME", "BUCKET_REGION", "ASSUME_ROLE_ARN"):
+        monkeypatch.setenv(name, "test")
+
+    await local_runner.configure(session)
+    pool = local_runner._room_pool
+    await local_runner.close_room_pool()
+
+    assert local_runner._room_pool is None
+    assert pool._task is None
+
+
+@pytest.mark.asyncio
+async def test_saved_rooms_with_expired_tokens_are_reused(daily, tmp_path):
+    api, helper, _, _ = daily
+    path = str(tmp_path / "rooms.json")
+    first = RoomPool(helper, PROPERTIES, size=2, store_path=path)
+    await first.fill()
+    await first.close()
+    with open(path) as f:
+        saved = json.load(f)
+    for room in saved:
+        room["expires_at"] = time.time() - 5 * 60
+    with open(path, "w") as f:
+        json.dump(saved, f)
+
+    second = RoomPool(helper, PROPERTIES, size=2, store_path=path)
+    second._load()
+    url, _ = await second.acquire()
+
+    assert url == saved[0]["url"]
+    assert api.rooms_created == 2
+    assert api.tokens_created == 3
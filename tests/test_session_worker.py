@@ -0,0 +1,46 @@
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from session_worker import create_app
+
+
+class FakeWorker:
+    def __init__(self):
+        self.submitted = []
+
+    async def submit(self, args):
+        self.submitted.append(args)
+        return None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        ("not json", "body is not JSON"),
+        ('["room"]', "body is not an object"),
+        ('{"room_url": "https://mock.daily.co/room"}', "missing token"),
+        ("{}", "missing room_url, token"),
+    ],
+)
+async def test_invalid_session_requests_are_rejected(body, error):
+    worker = FakeWorker()
+    async with TestClient(TestServer(create_app(worker))) as client:
+        response = await client.post("/sessions", data=body)
+
+        assert response.status == 400
+        assert await response.json() == {"error": error}
+    assert worker.submitted == []
+
+
+@pytest.mark.asyncio
+async def test_valid_session_request_is_submitted():
+    worker = FakeWorker()
+    async with TestClient(TestServer(create_app(worker))) as client:
+        response = await client.post(
+            "/sessions",
+            json={"room_url": "https://mock.daily.co/room", "token": "t"},
+        )
+
+        assert response.status == 202
+    assert worker.submitted[0].room_url == "https://mock.daily.co/room"
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from provider_registry import ProviderRegistry
+from service_factory import LLMRoute
+from speculative_llm import SpeculationManager
+from stub_services import StubOpenAILLMService
+
+SYSTEM = {"role": "system", "content": "You are helpful."}
+
+
+@pytest.fixture
+def registry():
+    return ProviderRegistry({"llm": [{"name": "primary", "kind": "stub"}]})
+
+
+def create_manager(registry: ProviderRegistry) -> SpeculationManager:
+    route = LLMRoute("primary", None, "stub", {"ttfb": 0.0, "token_delay": 0.0})
+    llm = StubOpenAILLMService(routes=[route], registry=registry)
+    return SpeculationManager(llm, OpenAILLMContext([SYSTEM]), min_words=1)
+
+
+@pytest.mark.asyncio
+async def test_hit_replays_the_speculative_stream(registry):
+    manager = create_manager(registry)
+    manager.observe_final("what is the weather")
+
+    stream = await manager.take(
+        [SYSTEM, {"role": "user", "content": "What is the weather?"}]
+    )
+    chunks = [chunk async for chunk in stream]
+
+    assert manager.hits == 1
+    assert chunks[-1].usage is not None
+
+
+@pytest.mark.asyncio
+async def test_missed_speculation_counts_its_tokens_and_not_provider_health(registry):
+    manager = create_manager(registry)
+    manager.observe_final("what is the weather")
+    await asyncio.sleep(0.05)
+
+    stream = await manager.take([SYSTEM, {"role": "user", "content": "Tell me a joke"}])
+
+    assert stream is None
+    assert manager.misses == 1
+    assert manager.wasted_tokens > 0
+    assert manager.stats()["wasted_tokens"] == manager.wasted_tokens
+    assert registry.health("primary").as_dict()["samples"] == 0
@@ -0,0 +1,19 @@
+from argparse import Namespace
+
+import pytest
+
+from benchmarks.startup import IMPORT_BUDGET_SECONDS, run
+
+
+@pytest.fixture(scope="module")
+def report():
+    # Imports the bot in a fresh interpreter, as a cold container would
+    return run(Namespace(wav=None, top=5))
+
+
+def test_bot_import_loads_no_provider_modules(report):
+    assert report["eagerly_imported"] == []
+
+
+def test_bot_import_is_within_budget(report):
+    assert report["import_seconds"] < IMPORT_BUDGET_SECONDS
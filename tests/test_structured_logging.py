@@ -0,0 +1,57 @@
+import json
+import multiprocessing
+import sys
+
+import pytest
+from loguru import logger
+
+from structured_logging import bind_log_session, configure_structured_logging, log
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "log.jsonl"
+    with open(path, "w") as stream:
+        sink = configure_structured_logging(stream)
+        try:
+            yield path
+        finally:
+            sink.close()
+            log.sink = None
+            logger.remove()
+            logger.add(sys.stderr)
+
+
+def read_records(path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def log_from_worker():
+    bind_log_session("s2")
+    log.info("worker_admitted", "s2", 1)
+    # As in session_supervisor._worker_process, which exits without atexit
+    log.sink.close()
+
+
+def test_records_are_written_as_json_lines(log_file):
+    bind_log_session("s1")
+    log.info("worker_rejected", "s1", "draining")
+    log.sink.close()
+
+    [record] = read_records(log_file)
+    assert record["event"] == "worker_rejected"
+    assert record["message"] == "Rejected session s1: draining"
+    assert record["session_id"] == "s1"
+    assert record["args"] == ["s1", "draining"]
+
+
+def test_forked_worker_process_logs(log_file):
+    process = multiprocessing.get_context("fork").Process(target=log_from_worker)
+    process.start()
+    process.join(10)
+    assert process.exitcode == 0
+
+    [record] = read_records(log_file)
+    assert record["event"] == "worker_admitted"
+    assert record["session_id"] == "s2"
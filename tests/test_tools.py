@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from pipecat.adapters.schemas.function_schema import FunctionSchema
+
+from tools import Tool, ToolExecutor, ToolResultCache
+
+
+class FakeLLM:
+    def __init__(self):
+        self.handlers = {}
+
+    def register_function(self, name, handler, **kwargs):
+        self.handlers[name] = handler
+
+
+def weather_tool(calls: list, **kwargs) -> Tool:
+    async def get_weather(params):
+        calls.append(params.arguments["city"])
+        return {"city": params.arguments["city"], "forecast": "sunny"}
+
+    schema = FunctionSchema(
+        name="get_weather",
+        description="Weather for a city",
+        properties={"city": {"type": "string"}},
+        required=["city"],
+    )
+    return Tool(schema, get_weather, cache_ttl=60, **kwargs)
+
+
+async def call(executor: ToolExecutor, city: str) -> list:
+    llm = FakeLLM()
+    executor.register(llm)
+    results = []
+
+    async def result_callback(result):
+        results.append(result)
+
+    params = SimpleNamespace(
+        arguments={"city": city}, llm=llm, result_callback=result_callback
+    )
+    await llm.handlers["get_weather"](params)
+    return results
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_within_the_session_only():
+    calls = []
+    tools = [weather_tool(calls)]
+    shared = ToolResultCache()
+    first = ToolExecutor(tools, "s1", shared_cache=shared, filler_after=None)
+    second = ToolExecutor(tools, "s2", shared_cache=shared, filler_after=None)
+
+    await call(first, "Paris")
+    await call(first, "Paris")
+    await call(second, "Paris")
+
+    assert calls == ["Paris", "Paris"]
+    assert shared.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_tool_results_are_reused_across_sessions():
+    calls = []
+    tools = [weather_tool(calls, shared=True)]
+    shared = ToolResultCache()
+    first = ToolExecutor(tools, "s1", shared_cache=shared, filler_after=None)
+    second = ToolExecutor(tools, "s2", shared_cache=shared, filler_after=None)
+
+    await call(first, "Paris")
+    results = await call(second, "Paris")
+
+    assert calls == ["Paris"]
+    assert results == [{"city": "Paris", "forecast": "sunny"}]
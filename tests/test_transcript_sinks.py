@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from transcript_sinks import (
+    JSONLSink,
+    LocalObjectStore,
+    RollingCompressedSink,
+    S3Uploader,
+    create_transcript_sinks,
+)
+
+RECORDS = [
+    {"session_id": "s1", "timestamp": "t1", "role": "user", "content": "hello"},
+    {"session_id": "s1", "timestamp": "t2", "role": "assistant", "content": "hi"},
+]
+
+
+def read_segment(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_sink_appends_records_and_hands_over_the_file(tmp_path):
+    closed = []
+    sink = JSONLSink(str(tmp_path / "s1.jsonl"), on_closed=closed.append)
+    sink.write_batch(RECORDS[:1])
+    sink.write_batch(RECORDS[1:])
+    sink.close()
+
+    with open(tmp_path / "s1.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == RECORDS
+    assert closed == [str(tmp_path / "s1.jsonl")]
+
+
+def test_rolling_sink_rolls_segments_by_size(tmp_path):
+    sink = RollingCompressedSink(str(tmp_path), "s1", max_bytes=1)
+    sink.write_batch(RECORDS)
+    sink.close()
+
+    assert len(sink.segments) == 2
+    assert [read_segment(path)[0] for path in sink.segments] == RECORDS
+
+
+def test_closed_segments_are_uploaded_to_the_object_store(tmp_path):
+    store = LocalObjectStore(str(tmp_path / "store"))
+    uploader = S3Uploader("transcripts", prefix="sessions", client=store)
+    sink = RollingCompressedSink(
+        str(tmp_path / "segments"), "s1", on_segment_closed=uploader
+    )
+    sink.write_batch(RECORDS)
+    sink.close()
+
+    (segment,) = sink.segments
+    uploaded = tmp_path / "store" / "transcripts" / "sessions"
+    assert os.listdir(uploaded) == [os.path.basename(segment)]
+    assert read_segment(str(uploaded / os.path.basename(segment))) == RECORDS
+    # Uploaded segments are not kept locally
+    assert not os.path.exists(segment)
+
+
+def test_failed_upload_keeps_the_local_segment(tmp_path):
+    class FailingStore:
+        def upload_file(self, filename, bucket, key):
+            raise OSError("unreachable")
+
+    uploader = S3Uploader("transcripts", client=FailingStore())
+    sink = RollingCompressedSink(str(tmp_path), "s1", on_segment_closed=uploader)
+    sink.write_batch(RECORDS)
+    sink.close()
+
+    assert os.path.exists(sink.segments[0])
+
+
+def test_no_sinks_without_a_transcript_directory(monkeypatch):
+    monkeypatch.delenv("TRANSCRIPT_DIR", raising=False)
+    assert create_transcript_sinks("s1") == []
+
+
+@pytest.mark.parametrize(
+    ("compression", "sink_type"),
+    [("gzip", RollingCompressedSink), ("none", JSONLSink)],
+)
+def test_sink_follows_the_configured_compression(
+    tmp_path, monkeypatch, compression, sink_type
+):
+    monkeypatch.setenv("TRANSCRIPT_DIR", str(tmp_path))
+    monkeypatch.setenv("TRANSCRIPT_COMPRESSION", compression)
+    monkeypatch.delenv("TRANSCRIPT_BUCKET", raising=False)
+
+    (sink,) = create_transcript_sinks("s1")
+    assert isinstance(sink, sink_type)
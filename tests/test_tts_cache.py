@@ -0,0 +1,53 @@
+import pytest
+
+from tts_cache import TTSAudioCache
+
+VOICE = ("sonic-2", "voice-a")
+OTHER_VOICE = ("sonic-2", "voice-b")
+
+
+class FakeSynthesisCache(TTSAudioCache):
+    """Synthesizes the key itself as audio instead of calling Cartesia."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.synthesized = []
+
+    async def _synthesize(self, key):
+        self.synthesized.append(key)
+        return repr(key).encode()
+
+
+@pytest.mark.asyncio
+async def test_phrases_are_cached_per_voice():
+    cache = FakeSynthesisCache()
+    await cache.preload([VOICE], ["Goodbye!"], 24000)
+
+    assert (
+        cache.get(VOICE, "Goodbye!", 24000)
+        == repr(("sonic-2", "voice-a", "Goodbye!", 24000)).encode()
+    )
+    assert cache.get(OTHER_VOICE, "Goodbye!", 24000) is None
+    assert cache.get(VOICE, "Goodbye!", 16000) is None
+
+
+@pytest.mark.asyncio
+async def test_preload_reads_persisted_audio_instead_of_synthesizing(tmp_path):
+    first = FakeSynthesisCache(cache_dir=str(tmp_path))
+    await first.preload([VOICE], ["Goodbye!"], 24000)
+
+    second = FakeSynthesisCache(cache_dir=str(tmp_path))
+    await second.preload([VOICE], ["Goodbye!"], 24000)
+    assert second.synthesized == []
+    assert second.get(VOICE, "Goodbye!", 24000) == first.get(VOICE, "Goodbye!", 24000)
+
+
+@pytest.mark.asyncio
+async def test_lookups_do_not_read_the_disk(tmp_path):
+    first = FakeSynthesisCache(cache_dir=str(tmp_path))
+    await first.preload([VOICE], ["Goodbye!"], 24000)
+
+    # Persisted, but not loaded into this cache's memory yet
+    second = FakeSynthesisCache(cache_dir=str(tmp_path))
+    assert second.get(VOICE, "Goodbye!", 24000) is None
+    assert second.misses == 1